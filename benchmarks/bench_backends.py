@@ -0,0 +1,66 @@
+"""
+Benchmark: the watchdog engine on the non-Windows backends.
+
+Times one central ProcessSampler tick fanned out to 1000 has_no_window rules on
+the in-memory fake backend (fully deterministic, no OS calls), and a full
+process-table enumeration on the Linux backend (batch-parsing /proc/[pid]/stat)
+next to psutil.process_iter for reference. The Linux rows are skipped elsewhere.
+
+    python benchmarks/bench_backends.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault('CI', '1')  # skip the admin check in sysmaid/__init__.py
+os.environ['SYSMAID_BACKEND'] = 'fake'
+
+import psutil  # noqa: E402
+import sysmaid as maid  # noqa: E402
+from sysmaid import maid as maid_module  # noqa: E402
+from sysmaid.backends.linux import LinuxBackend  # noqa: E402
+
+# Fixed-rate polling, so that every tick fans out to every rule
+maid.configure_polling(adaptive=False)
+
+RULES = 1000
+PROCESSES = 5000
+REPEAT = 20
+
+
+def per_call(func):
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def bench_fake_sampler():
+    backend = maid_module.get_backend()
+    for i in range(PROCESSES):
+        backend.add_process(f'proc_{i}.exe', windows=i % 2)
+    for i in range(RULES):
+        maid.attend(f'proc_{i}.exe').has_no_window(lambda: None)
+    sampler = maid_module.ProcessSampler()
+    for dog in maid_module._watchdogs:
+        dog._is_running = True
+        sampler.register(dog)
+    return per_call(sampler.tick)
+
+
+def main():
+    print(f"{'fake backend: sampler tick':>36} | {bench_fake_sampler() * 1000:8.2f} ms "
+          f"({RULES} rules, {PROCESSES} processes)")
+    if sys.platform.startswith('linux'):
+        linux = LinuxBackend()
+        count = len(linux.list_processes())
+        proc_t = per_call(linux.list_processes)
+        psutil_t = per_call(lambda: [p.info for p in psutil.process_iter(['name', 'ppid'])])
+        print(f"{'linux backend: /proc enumeration':>36} | {proc_t * 1000:8.2f} ms ({count} processes)")
+        print(f"{'psutil.process_iter(name, ppid)':>36} | {psutil_t * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: startup cost of `import sysmaid` for short-lived scripts.
+
+Each scenario runs in a fresh interpreter under `python -X importtime`. The
+table reports the best cumulative import time of the `sysmaid` package itself,
+the best wall time of the whole snippet over a bare interpreter, and which
+heavy dependencies ended up in sys.modules. "all actions" touches every public
+action, i.e. what the previous eager `__init__` imported up front.
+
+    python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+REPEAT = 5
+HEAVY = ('numpy', 'cv2', 'mss', 'psutil', 'asyncio', 'wmi', 'pythoncom')
+
+SCENARIOS = {
+    'import sysmaid': "import sysmaid",
+    'all actions': "import sysmaid\nfor name in sysmaid.__all__: getattr(sysmaid, name)",
+    'process rules': ("import sysmaid\n"
+                      "w = sysmaid.attend('app.exe')\n"
+                      "w.is_running(lambda: None)\n"
+                      "w.has_no_window(lambda: None)"),
+    'cpu rule': "import sysmaid\nsysmaid.attend('cpu').is_too_busy(90, 10)(lambda: None)",
+}
+
+
+def run(code):
+    script = code + "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+    env = dict(os.environ, CI='1', SYSMAID_BACKEND='fake', PYTHONPATH=SRC)
+    best_wall = best_import = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                                capture_output=True, text=True, env=env, check=True)
+        best_wall = min(best_wall, time.perf_counter() - start)
+        # "import time: self [us] | cumulative | name"; the package's own line is unindented
+        for line in result.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].rstrip() == ' sysmaid':
+                best_import = min(best_import, int(fields[1]) / 1e6)
+    return best_wall, best_import, (result.stdout.strip().splitlines() or [''])[-1]
+
+
+def main():
+    baseline, _, _ = run("pass")
+    print(f"{'scenario':>16} | {'import sysmaid ms':>17} | {'wall ms':>7} | heavy modules loaded")
+    for label, code in SCENARIOS.items():
+        wall, imported, loaded = run(code)
+        print(f"{label:>16} | {imported * 1000:>17.1f} | {(wall - baseline) * 1000:>7.1f} | {loaded or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: per-tick cost of the hot-path metrics.
+
+Times a no-op check_state called directly, through MetricsRegistry.run_check
+with metrics enabled and disabled, and a record_call of an external query made
+from inside a check. The difference to the direct call is the overhead every
+tick pays for the check-duration histogram and missed-deadline accounting.
+
+    python benchmarks/bench_metrics.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from sysmaid.metrics import MetricsRegistry  # noqa: E402
+
+ROUNDS = 200000
+
+
+class NoopWatchdog:
+    name = 'noop'
+    interval = 1
+
+    def check_state(self):
+        pass
+
+
+class QueryWatchdog(NoopWatchdog):
+    def __init__(self, registry):
+        self.registry = registry
+
+    def check_state(self):
+        self.registry.record_call('query', 0.0001)
+
+
+def per_call(func, *args):
+    func(*args)  # warm-up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    registry = MetricsRegistry()
+    dog = NoopWatchdog()
+    bare = per_call(dog.check_state)
+    enabled = per_call(registry.run_check, dog)
+    registry.enabled = False
+    disabled = per_call(registry.run_check, dog)
+    registry.enabled = True
+    query = per_call(registry.run_check, QueryWatchdog(registry))
+    print(f"{'scenario':>28} | {'us/tick':>8} | {'overhead us':>11}")
+    for label, t in (('direct check_state', bare), ('run_check (enabled)', enabled),
+                     ('run_check (disabled)', disabled), ('run_check + record_call', query)):
+        print(f"{label:>28} | {t * 1e6:>8.2f} | {(t - bare) * 1e6:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: per-tick cost of process polling as the number of has_no_window rules grows.
+
+Compares the legacy path (every watchdog issues its own `Win32_Process(name=...)`
+query and walks the desktop windows itself) against the central ProcessSampler
+(one enumeration and one shared window index per tick, fanned out).
+Runs against the same kind of mocked `wmi`/`win32gui` modules as tests/test_stress.py,
+with a simulated WMI round-trip latency so the number of queries shows up in the timing.
+
+    python benchmarks/bench_process_sampler.py
+"""
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault('CI', '1')  # skip the UAC prompt in sysmaid/__init__.py
+os.environ['SYSMAID_BACKEND'] = 'windows'  # the mocked WMI below is what is being measured
+
+for _mod in ('wmi', 'win32gui', 'win32process', 'pythoncom', 'pywintypes'):
+    sys.modules[_mod] = MagicMock()
+
+import sysmaid as maid  # noqa: E402
+from sysmaid import maid as maid_module  # noqa: E402
+
+# Fixed-rate polling, so that every tick fans out to every rule
+maid.configure_polling(adaptive=False)
+
+WMI_ROUND_TRIP = 0.0005  # simulated cost of a single WMI query, in seconds
+RULE_COUNTS = (10, 100, 1000)
+TICKS = 3
+
+
+class _FakeProcess:
+    __slots__ = ('Name', 'ProcessId', 'ParentProcessId')
+
+    def __init__(self, name, pid):
+        self.Name = name
+        self.ProcessId = pid
+        self.ParentProcessId = 4
+
+
+class FakeWmi:
+    def __init__(self, processes):
+        self.processes = processes
+        self.queries = 0
+
+    def Win32_Process(self, fields=None, name=None):
+        self.queries += 1
+        time.sleep(WMI_ROUND_TRIP)
+        if name is None:
+            return [_FakeProcess(n, pid) for n, pid in self.processes.items()]
+        pid = self.processes.get(name)
+        return [_FakeProcess(name, pid)] if pid is not None else []
+
+
+def _setup(num_rules):
+    maid_module._watchdogs.clear()
+    processes = {f'proc_{i}.exe': 1000 + i for i in range(num_rules)}
+    fake = FakeWmi(processes)
+    sys.modules['wmi'].WMI.side_effect = lambda *a, **kw: fake
+    maid_module.get_backend().release_thread()  # drop the pooled connection to the previous fake
+    for name in processes:
+        maid.attend(name).has_no_window(lambda: None)
+    dogs = list(maid_module._watchdogs)
+    for dog in dogs:
+        dog._is_running = True
+    return fake, dogs
+
+
+def bench_legacy(num_rules):
+    fake, dogs = _setup(num_rules)
+    walks_before = maid_module._window_index.walks
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for dog in dogs:
+            dog.check_state()
+    elapsed = (time.perf_counter() - start) / TICKS
+    return elapsed, fake.queries / TICKS, (maid_module._window_index.walks - walks_before) / TICKS
+
+
+def bench_sampler(num_rules):
+    fake, dogs = _setup(num_rules)
+    sampler = maid_module.ProcessSampler()
+    for dog in dogs:
+        sampler.register(dog)
+    walks_before = maid_module._window_index.walks
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        sampler.tick()
+    elapsed = (time.perf_counter() - start) / TICKS
+    return elapsed, fake.queries / TICKS, (maid_module._window_index.walks - walks_before) / TICKS
+
+
+def main():
+    print(f"{'rules':>6} | {'legacy ms/tick':>14} {'queries':>8} {'walks':>6} "
+          f"| {'sampler ms/tick':>15} {'queries':>8} {'walks':>6}")
+    for n in RULE_COUNTS:
+        legacy_t, legacy_q, legacy_w = bench_legacy(n)
+        sampler_t, sampler_q, sampler_w = bench_sampler(n)
+        print(f"{n:>6} | {legacy_t * 1000:>14.2f} {legacy_q:>8.0f} {legacy_w:>6.0f} "
+              f"| {sampler_t * 1000:>15.2f} {sampler_q:>8.0f} {sampler_w:>6.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: pyramid (coarse-to-fine) template matching versus full resolution.
+
+Matches a template against synthetic 1080p, 1440p and 4K desktops, once at its
+original size and once scaled by 125% (a different DPI setting), and reports the
+time per full-frame match and the speedup of `pyramid=True`.
+
+    python benchmarks/bench_screen_pyramid.py
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault('CI', '1')  # skip the UAC prompt in sysmaid/__init__.py
+
+for _mod in ('wmi', 'win32gui', 'win32process', 'pythoncom', 'pywintypes'):
+    sys.modules[_mod] = MagicMock()
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider  # noqa: E402
+
+RESOLUTIONS = ((1920, 1080), (2560, 1440), (3840, 2160))
+SCALES = (1.0, 1.25)
+REPEAT = 3
+
+
+def smooth_noise(rng, shape):
+    """Blurred noise: textured like a real desktop, unlike raw per-pixel noise."""
+    img = cv2.GaussianBlur(rng.random(shape).astype(np.float32), (0, 0), 2)
+    return cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def time_match(path, frame, pyramid):
+    best, found = float('inf'), False
+    for _ in range(REPEAT):
+        dog = WindowsMatchingWatchdog('screen', template_image_path=path, pyramid=pyramid, scales=SCALES)
+        provider = dog.frame_provider = SharedFrameProvider()
+        start = time.perf_counter()
+        found = dog.match_frame(*provider.update(frame.copy()))
+        best = min(best, time.perf_counter() - start)
+    return best, found
+
+
+def main():
+    rng = np.random.default_rng(0)
+    template = smooth_noise(rng, (80, 120))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'template.png')
+        cv2.imencode('.png', template)[1].tofile(path)
+
+        print(f"{'frame':>10} {'dpi':>5} | {'full ms':>8} {'found':>5} | {'pyramid ms':>10} {'found':>5} | {'speedup':>7}")
+        for width, height in RESOLUTIONS:
+            for dpi in SCALES:
+                frame = smooth_noise(rng, (height, width))
+                placed = cv2.resize(template, None, fx=dpi, fy=dpi, interpolation=cv2.INTER_LINEAR)
+                y, x = height // 3, width // 2
+                frame[y:y + placed.shape[0], x:x + placed.shape[1]] = placed
+
+                full_t, full_found = time_match(path, frame, pyramid=False)
+                pyramid_t, pyramid_found = time_match(path, frame, pyramid=True)
+                print(f"{width:>5}x{height:<4} {dpi:>5.2f} | {full_t * 1000:>8.1f} {str(full_found):>5} "
+                      f"| {pyramid_t * 1000:>10.1f} {str(pyramid_found):>5} | {full_t / pyramid_t:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: cost of get_top_processes with 5000 synthetic processes.
+
+Compares the previous implementation (walk process_iter, call cpu_percent on
+fresh objects, fully sort the list) against the cached path (a PID cache kept
+warm by the hardware sampler plus heapq.nlargest). The sampler's periodic
+refresh is timed separately, since it happens off the alert path. Each
+cpu_percent() call busy-waits for a simulated syscall cost so the number of
+per-process reads shows up in the timing.
+
+    python benchmarks/bench_top_processes.py
+"""
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault('CI', '1')  # skip the UAC prompt in sysmaid/__init__.py
+
+for _mod in ('wmi', 'win32gui', 'win32process', 'pythoncom', 'pywintypes'):
+    sys.modules[_mod] = MagicMock()
+
+import random  # noqa: E402
+from sysmaid.action import get_top_processes as top_module  # noqa: E402
+from sysmaid.sampler import ProcessCache  # noqa: E402
+
+PROCESSES = 5000
+COUNT = 10
+REPEAT = 20
+SYSCALL_COST = 0.00002  # simulated cost of reading one process's CPU times, in seconds
+
+
+class FakeProcess:
+    __slots__ = ('pid', 'info', '_cpu')
+
+    def __init__(self, pid, name, cpu):
+        self.pid = pid
+        self.info = {'pid': pid, 'name': name, 'create_time': float(pid)}
+        self._cpu = cpu
+
+    def cpu_percent(self, interval=None):
+        deadline = time.perf_counter() + SYSCALL_COST
+        while time.perf_counter() < deadline:
+            pass
+        return self._cpu
+
+
+def legacy_top(table, count):
+    processes = []
+    for p in table:
+        p.info['cpu_percent'] = p.cpu_percent(interval=None)
+        processes.append(p)
+    processes = [p for p in processes if p.info['name'] != 'System Idle Process']
+    processes.sort(key=lambda p: p.info['cpu_percent'], reverse=True)
+    return processes[:count]
+
+
+def per_call(func):
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    rng = random.Random(0)
+    table = [FakeProcess(pid, f'proc_{pid}.exe', rng.uniform(0, 100)) for pid in range(PROCESSES)]
+    cache = ProcessCache(max_age=60)
+
+    with patch('sysmaid.sampler.psutil.process_iter', side_effect=lambda *a, **kw: iter(table)), \
+            patch.object(top_module, '_process_cache', cache), \
+            patch.object(top_module, '_PRIME_DELAY', 0):
+        legacy_t = per_call(lambda: legacy_top(table, COUNT))
+        refresh_t = per_call(cache.refresh)
+        cached_t = per_call(lambda: top_module.get_top_processes(COUNT, structured=True))
+
+    print(f"{PROCESSES} processes, top {COUNT}")
+    print(f"{'legacy (walk + full sort)':>36} | {legacy_t * 1000:8.2f} ms/call")
+    print(f"{'sampler refresh (off the alert path)':>36} | {refresh_t * 1000:8.2f} ms/tick")
+    print(f"{'cached (warm cache + nlargest)':>36} | {cached_t * 1000:8.2f} ms/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,507 @@
+"""
+Benchmark suite for the watchdog engine, for tracking regressions between releases.
+
+Runs entirely on Linux: processes come from the in-memory fake backend, the
+Win32/WMI modules are MagicMock stand-ins and the screen is a stand-in `mss`
+session serving synthetic frames. Scenarios:
+
+    process_polling   ProcessSampler ticks/sec and CPU per tick for 10..10000
+                      has_no_window rules (fixed-rate polling: every tick checks every rule)
+    adaptive_polling  sampler wake-ups and rule checks per simulated minute for 1000
+                      has_no_window rules on absent processes, fixed versus adaptive
+    process_events    is_running / is_exited event dispatch throughput
+    schedulers        1000 polling rules on the thread, pool and asyncio models:
+                      achieved checks/sec, threads, CPU and missed deadlines
+    shutdown          sysmaid.stop() wall time for 1000 sleeping rules (plus a paused one)
+                      on the thread and pool models, until every thread has exited
+    rule_files        compiling and loading 1000..10000 declarative rules over 100 distinct
+                      conditions: compile time and watchdogs created
+    cpu_rules         is_too_busy evaluation cost per rule, for every aggregate
+    screen_matching   has_windows_look_like CPU per tick on synthetic 1080p frames,
+                      full-frame versus incremental versus pyramid
+
+Every scenario yields rows of {'params': {...}, 'metrics': {...}}. The whole run is
+written as JSON; `--compare` diffs it against an earlier run and exits with 1 if a
+metric got worse by more than `--tolerance`.
+
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --quick --only process_polling screen_matching
+    python benchmarks/suite.py --output new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault('CI', '1')  # skip the admin check in sysmaid/__init__.py
+os.environ['SYSMAID_BACKEND'] = 'fake'
+
+for _mod in ('wmi', 'win32gui', 'win32process', 'pythoncom', 'pywintypes'):
+    sys.modules.setdefault(_mod, MagicMock())
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import sysmaid as maid  # noqa: E402
+from sysmaid import maid as maid_module  # noqa: E402
+from sysmaid.backends import set_backend  # noqa: E402
+from sysmaid.backends.fake import FakeBackend  # noqa: E402
+from sysmaid.condition import has_windows_look_like as screen_module  # noqa: E402
+from sysmaid.condition.is_exited import ExitedWatchdog  # noqa: E402
+from sysmaid.condition.is_running import RunningWatchdog  # noqa: E402
+from sysmaid.condition.is_too_busy import IsTooBusyWatchdog  # noqa: E402
+from sysmaid.metrics import _metrics  # noqa: E402
+from sysmaid.sampler import HardwareSampler  # noqa: E402
+from sysmaid.scheduler import AsyncScheduler, PoolScheduler  # noqa: E402
+
+SCHEMA = 1
+HIGHER_IS_BETTER = ('ticks_per_sec', 'events_per_sec', 'checks_per_sec')
+
+
+def measure(func, rounds):
+    """Run func() once to warm up, then `rounds` times; returns (wall s/call, CPU s/call)."""
+    func()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - wall) / rounds, (time.process_time() - cpu) / rounds
+
+
+def reset(adaptive=False):
+    """Forget every rule and metric of the previous scenario and start on a fresh fake OS."""
+    maid_module._watchdogs.clear()
+    _metrics.reset()
+    maid.configure_polling(adaptive=adaptive)
+    backend = FakeBackend()
+    set_backend(backend)
+    return backend
+
+
+def process_polling(quick):
+    rows = []
+    for rules in (10, 100, 1000) if quick else (10, 100, 1000, 10000):
+        backend = reset()
+        # Every watched process runs, half of them with a window; plus unrelated background processes
+        for i in range(rules):
+            backend.add_process(f'app_{i}.exe', windows=i % 2)
+        for i in range(2000):
+            backend.add_process(f'background_{i}.exe')
+        sampler = maid_module.ProcessSampler()
+        for i in range(rules):
+            maid.attend(f'app_{i}.exe').has_no_window(lambda: None)
+        for dog in maid_module._watchdogs:
+            dog._is_running = True
+            sampler.register(dog)
+        wall, cpu = measure(sampler.tick, max(5, 20000 // rules))
+        rows.append({
+            'params': {'rules': rules, 'processes': len(backend.processes)},
+            'metrics': {'ticks_per_sec': 1 / wall, 'cpu_ms_per_tick': cpu * 1000,
+                        'cpu_us_per_rule': cpu * 1e6 / rules},
+        })
+    return rows
+
+
+def adaptive_polling(quick):
+    rows = []
+    rules, minutes = 1000, (1 if quick else 10)
+    for adaptive in (False, True):
+        backend = reset(adaptive)
+        for i in range(2000):
+            backend.add_process(f'background_{i}.exe')
+        sampler = maid_module.ProcessSampler()
+        for i in range(rules):
+            maid.attend(f'absent_{i}.exe').has_no_window(lambda: None)
+        for dog in maid_module._watchdogs:
+            dog._is_running = True
+            sampler.register(dog)
+        # Follow the sampler's own interval on a simulated clock instead of sleeping
+        clock = [0.0]
+        ticks = 0
+        cpu = time.process_time()
+        with patch('sysmaid.maid.time.monotonic', lambda: clock[0]):
+            while clock[0] < minutes * 60:
+                sampler.tick()
+                ticks += 1
+                clock[0] += sampler.interval
+        cpu = time.process_time() - cpu
+        checks = sum(r['checks']['count'] for r in _metrics.snapshot()['rules'])
+        rows.append({
+            'params': {'adaptive': adaptive, 'rules': rules, 'minutes': minutes},
+            'metrics': {'wakeups_per_min': ticks / minutes,
+                        'enumerations_per_min': sampler.enumerations / minutes,
+                        'checks_per_min': checks / minutes,
+                        'cpu_ms_per_min': cpu * 1000 / minutes},
+        })
+    return rows
+
+
+def process_events(quick):
+    rows = []
+    events = 2000 if quick else 20000
+    for event_type, factory in (('started', RunningWatchdog), ('exited', ExitedWatchdog)):
+        for rules in (10, 1000):
+            backend = reset()
+            handled = threading.Semaphore(0)
+            multiplexer = maid_module.ProcessEventMultiplexer(event_type)
+            for i in range(rules):
+                dog = factory(f'app_{i}.exe')
+                dog._callbacks['is_running' if event_type == 'started' else 'is_exited'] = handled.release
+                dog._is_running = True
+                multiplexer.add(dog)
+            thread = multiplexer.start()
+            while multiplexer.subscriptions == 0 or not backend._subscriptions:
+                time.sleep(0.01)
+
+            pids = [backend.add_process(f'app_{i % rules}.exe') for i in range(events)]
+            if event_type == 'started':
+                for _ in range(events):
+                    handled.acquire()
+            wall, cpu = time.perf_counter(), time.process_time()
+            if event_type == 'started':
+                for i in range(events):
+                    backend.add_process(f'app_{i % rules}.exe')
+            else:
+                for pid in pids:
+                    backend.remove_process(pid)
+            for _ in range(events):
+                handled.acquire()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+            for dogs in multiplexer._dogs.values():
+                for dog in dogs:
+                    dog._is_running = False
+            thread.join(timeout=2)
+            rows.append({
+                'params': {'event': event_type, 'rules': rules, 'events': events},
+                'metrics': {'events_per_sec': events / wall, 'cpu_us_per_event': cpu * 1e6 / events},
+            })
+    return rows
+
+
+class CountingWatchdog(maid_module.BaseWatchdog):
+    def __init__(self, name, interval):
+        super().__init__(name)
+        self.interval = interval
+        self.checks = 0
+
+    def check_state(self):
+        self.checks += 1
+
+
+def _run_model(model, dogs, duration):
+    if model == 'thread':
+        for dog in dogs:
+            dog.start()
+        time.sleep(duration)
+        threads = threading.active_count()
+        for dog in dogs:
+            dog._is_running = False
+        for dog in dogs:
+            dog._thread.join(timeout=2)
+    elif model == 'pool':
+        pool = PoolScheduler(max_workers=8)
+        for dog in dogs:
+            dog.start(pool)
+        time.sleep(duration)
+        threads = threading.active_count()
+        for dog in dogs:
+            dog._is_running = False
+        timer = pool._thread
+        pool.shutdown()
+        timer.join(timeout=2)
+    else:
+        async def main():
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=8)
+            runner = AsyncScheduler(asyncio.get_running_loop(), executor)
+            for dog in dogs:
+                dog.start(runner)
+            await asyncio.sleep(duration)
+            count = threading.active_count()
+            for dog in dogs:
+                dog._is_running = False
+            await runner.join()
+            executor.shutdown(wait=True)
+            return count
+        threads = asyncio.run(main())
+    return threads
+
+
+def schedulers(quick):
+    rows = []
+    rules, interval = 1000, 0.05
+    duration = 1.0 if quick else 3.0
+    for model in ('thread', 'pool', 'asyncio'):
+        reset()
+        dogs = [CountingWatchdog(f'rule_{i}', interval) for i in range(rules)]
+        baseline = threading.active_count()
+        wall, cpu = time.perf_counter(), time.process_time()
+        threads = _run_model(model, dogs, duration)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        checks = sum(dog.checks for dog in dogs)
+        missed = sum(r['missed_deadlines'] for r in _metrics.snapshot()['rules'])
+        rows.append({
+            'params': {'model': model, 'rules': rules, 'interval': interval},
+            'metrics': {'checks_per_sec': checks / duration,
+                        'target_checks_per_sec': rules / interval,
+                        'threads': threads - baseline,
+                        'cpu_percent': cpu / wall * 100,
+                        'missed_deadlines': missed},
+        })
+    return rows
+
+
+def shutdown(quick):
+    rows = []
+    rules = 200 if quick else 1000
+    for model in ('thread', 'pool'):
+        reset()
+        dogs = [CountingWatchdog(f'rule_{i}', 60) for i in range(rules)]
+        dogs[0].pause()
+        maid_module.start(scheduler=model, max_workers=8, wait=False)
+        deadline = time.monotonic() + 10
+        while sum(dog.checks for dog in dogs) < rules - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        threads = {dog._thread for dog in dogs}
+        wall = time.perf_counter()
+        maid_module.stop()
+        wall = time.perf_counter() - wall
+        rows.append({
+            'params': {'model': model, 'rules': rules},
+            'metrics': {'shutdown_ms': wall * 1000,
+                        'threads': sum(thread.is_alive() for thread in threads)},
+        })
+    return rows
+
+
+def rule_files(quick):
+    from sysmaid.rules import compile_rules, load_rules
+    rows = []
+    for rules in ((1000,) if quick else (1000, 10000)):
+        reset()
+        data = {'rules': [{'attend': f'app_{i % 100 // 2}.exe', 'when': 'has_no_window' if i % 2 else 'is_running',
+                           'do': [{'kill_process': f'app_{i % 100 // 2}.exe'}]} for i in range(rules)]}
+        wall, _ = measure(lambda: compile_rules(data), 3 if quick else 10)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            ruleset = load_rules(path, watch=False)
+            rows.append({
+                'params': {'rules': rules, 'conditions': 100},
+                'metrics': {'compile_ms': wall * 1000, 'watchdogs': len(maid_module._watchdogs)},
+            })
+            ruleset.close()
+    return rows
+
+
+def cpu_rules(quick):
+    rows = []
+    rules, cores = (100 if quick else 1000), 8
+    for aggregate in IsTooBusyWatchdog.AGGREGATES:
+        reset()
+        sampler = HardwareSampler()
+        with patch('sysmaid.sampler.psutil.cpu_count', return_value=cores):
+            dogs = [IsTooBusyWatchdog('cpu', over=50 + i % 50, duration=10, aggregate=aggregate)
+                    for i in range(rules)]
+        for dog in dogs:
+            dog.sampler = sampler
+            dog._is_running = True
+            sampler.register(dog, window=dog.duration)
+        rng = np.random.default_rng(0)
+        clock = iter(range(10 ** 9))
+
+        def tick():
+            usage = rng.uniform(0, 100, cores)
+            sampler.record(next(clock), usage.mean(), usage)
+            for dog in dogs:
+                dog.check_state()
+
+        wall, cpu = measure(tick, 200)
+        rows.append({
+            'params': {'aggregate': aggregate, 'rules': rules},
+            'metrics': {'ticks_per_sec': 1 / wall, 'cpu_us_per_rule': cpu * 1e6 / rules},
+        })
+    return rows
+
+
+class FakeScreen:
+    """Stand-in for an `mss.mss()` session: grab() returns the next synthetic BGRA frame."""
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+        self.monitors = [None, {'left': 0, 'top': 0, 'width': frames[0].shape[1], 'height': frames[0].shape[0]}]
+
+    def grab(self, monitor):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return frame
+
+
+def _screen_frames(kind, rng, template, ticks, width=1920, height=1080):
+    base = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    base[500:500 + template.shape[0], 900:900 + template.shape[1]] = template
+    frames = []
+    for i in range(ticks):
+        if kind == 'static':
+            frame = base
+        elif kind == 'moving box':
+            frame = base.copy()
+            x = 100 + i * 20
+            frame[200:300, x:x + 200] = 255  # e.g. a progress bar or a tooltip
+        else:
+            frame = rng.integers(0, 256, (height, width), dtype=np.uint8)
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGRA))
+    return frames
+
+
+def screen_matching(quick):
+    rows = []
+    ticks = 10 if quick else 30
+    rng = np.random.default_rng(0)
+    template = rng.integers(0, 256, (80, 120), dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'template.png')
+        cv2.imencode('.png', template)[1].tofile(path)
+        for kind in ('static', 'moving box', 'full change'):
+            frames = _screen_frames(kind, rng, template, ticks + 1)
+            for mode in ('full', 'incremental', 'pyramid'):
+                reset()
+                screen = FakeScreen(frames)
+                stand_in = MagicMock()
+                stand_in.mss.return_value = screen
+                with patch.object(screen_module, 'mss', stand_in):
+                    provider = screen_module.SharedFrameProvider(ttl=0)
+                    dog = screen_module.WindowsMatchingWatchdog('screen', template_image_path=path,
+                                                                pyramid=mode == 'pyramid')
+                    dog.frame_provider = provider
+                    dog.is_found(lambda: None)
+                    if mode == 'full':
+                        def check():
+                            # Forget the previous frame so every tick re-matches the whole screen
+                            dog._frame_id = None
+                            dog.check_state()
+                    else:
+                        check = dog.check_state
+                    wall, cpu = measure(check, ticks)
+                rows.append({
+                    'params': {'screen': kind, 'mode': mode, 'resolution': '1920x1080'},
+                    'metrics': {'ticks_per_sec': 1 / wall, 'cpu_ms_per_tick': cpu * 1000},
+                })
+    return rows
+
+
+SCENARIOS = {
+    'process_polling': process_polling,
+    'adaptive_polling': adaptive_polling,
+    'process_events': process_events,
+    'schedulers': schedulers,
+    'shutdown': shutdown,
+    'rule_files': rule_files,
+    'cpu_rules': cpu_rules,
+    'screen_matching': screen_matching,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        sysmaid_version = version('sysmaid')
+    except PackageNotFoundError:
+        sysmaid_version = None
+    return {
+        'schema': SCHEMA,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'sysmaid': sysmaid_version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def run(names, quick=False):
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = SCENARIOS[name](quick)
+        print(f"{name}: {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return {'environment': environment(), 'quick': quick, 'results': results}
+
+
+def print_table(report):
+    for name, rows in report['results'].items():
+        print(f"\n{name}")
+        for row in rows:
+            params = ', '.join(f"{k}={v}" for k, v in row['params'].items())
+            metrics = ', '.join(f"{k}={v:.4g}" for k, v in row['metrics'].items())
+            print(f"  {params:<56} {metrics}")
+
+
+def compare(baseline, report, tolerance):
+    """
+    Compares every metric present in both runs (rows are matched by their params).
+    Returns the list of regressions: metrics that got worse by more than `tolerance`.
+    """
+    regressions = []
+    for name, rows in report['results'].items():
+        previous = {json.dumps(r['params'], sort_keys=True): r['metrics'] for r in baseline['results'].get(name, ())}
+        for row in rows:
+            old = previous.get(json.dumps(row['params'], sort_keys=True))
+            if old is None:
+                continue
+            for metric, value in row['metrics'].items():
+                before = old.get(metric)
+                if not before or metric in ('target_checks_per_sec', 'threads', 'missed_deadlines', 'watchdogs'):
+                    continue
+                change = value / before - 1
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                if worse > tolerance:
+                    regressions.append((name, row['params'], metric, before, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes, for a smoke run")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON report of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    report = run(args.only or list(SCENARIOS), quick=args.quick)
+    print_table(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for name, params, metric, before, value in regressions:
+            print(f"REGRESSION {name} {params}: {metric} {before:.4g} -> {value:.4g}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,37 @@
-import ctypes
+import importlib
 import logging
 import os
+from .backends import get_backend, set_backend
 from .i18n import get_text
-from .maid import attend, start
-from .action.kill_process import kill_process
-from .action.stop_service import stop_service
-from .action.lock_volume import lock_volume
-from .action.alarm import alarm
-from .action.write_file import write_file
-from .action.get_top_processes import get_top_processes
+from .maid import attend, start, start_async, stop, running, configure_actions, action_stats, configure_polling, configure_metrics, stats, write_metrics
+from .rules import load_rules
 
 logger = logging.getLogger(__name__)
 
+# 公开动作 -> 定义它的模块。动作模块会带入 psutil、NumPy 以及平台相关的依赖，
+# 只在第一次访问时才导入，让只定义少量规则的一次性脚本启动更快
+_LAZY_ACTIONS = {
+    "kill_process": ".action.kill_process",
+    "kill_processes": ".action.kill_process",
+    "stop_service": ".action.stop_service",
+    "stop_services": ".action.stop_service",
+    "lock_volume": ".action.lock_volume",
+    "alarm": ".action.alarm",
+    "write_file": ".action.write_file",
+    "get_top_processes": ".action.get_top_processes",
+}
+
+def __getattr__(name):
+    module = _LAZY_ACTIONS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ACTIONS))
+
 def set_log_level(level):
     """
     Sets the logging level for the SysMaid library.
@@ -28,29 +48,38 @@ def set_log_level(level):
         datefmt='%H:%M:%S'
     )
 
-def _is_admin():
-    try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except:  # noqa: E722
-        return False
-
 # Library requires Admin privileges.
 # Skip this check in CI environments where admin rights are not available.
 if "CI" in os.environ:
     logger.warning(get_text("init.admin.skip.message"))
-else:
-    if not _is_admin():
-        ctypes.windll.user32.MessageBoxW(0, get_text("init.admin.error.message"), get_text("init.admin.error.title"), 0x10)
+elif not get_backend().is_admin():
+    if get_backend().name == 'windows':
+        get_backend().show_message(get_text("init.admin.error.title"), get_text("init.admin.error.message"), error=True)
         exit(0)
+    # 其它平台上只有部分动作（终止其他用户的进程、停止服务）需要 root，只提示，不退出宿主进程
+    logger.warning(get_text("init.admin.warning.message"))
 
 __all__ = [
     "attend",
     "kill_process",
+    "kill_processes",
     "stop_service",
+    "stop_services",
     "lock_volume",
     "alarm",
     "write_file",
     "get_top_processes",
     "start",
+    "start_async",
+    "stop",
+    "running",
+    "load_rules",
+    "configure_actions",
+    "action_stats",
+    "configure_polling",
+    "configure_metrics",
+    "stats",
+    "write_metrics",
     "set_log_level",
+    "set_backend",
 ]
\ No newline at end of file
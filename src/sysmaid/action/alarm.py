@@ -1,6 +1,6 @@
-import ctypes
 import logging
 import threading
+from ..backends import get_backend
 from ..i18n import get_text
 
 logger = logging.getLogger(__name__)
@@ -11,12 +11,8 @@ def _show_messagebox(content: str):
     This avoids blocking the main thread if the user doesn't close the box immediately.
     """
     try:
-        # MessageBoxW(HWND, text, caption, type)
-        # HWND = 0 for no owner window
-        # text = content to display
-        # caption = window title
-        # type = 0x40 (MB_ICONINFORMATION)
-        ctypes.windll.user32.MessageBoxW(0, str(content), get_text("alarm.title"), 0x40)
+        # A MessageBox on Windows; other backends use their own notification mechanism
+        get_backend().show_message(get_text("alarm.title"), content)
     except Exception as e:
         logger.error(f"Failed to show alarm messagebox: {e}", exc_info=True)
 
@@ -1,57 +1,56 @@
-import psutil
+import time
 import logging
 from ..i18n import get_text
+from ..sampler import _process_cache
 
 logger = logging.getLogger(__name__)
 
-def get_top_processes(count: int) -> str:
+# 缓存冷启动时，两次刷新之间等待的时长（秒），让 CPU 占用率有可比较的基准
+_PRIME_DELAY = 0.1
+
+def get_top_processes(count: int, structured: bool = False):
     """
     获取CPU占用率最高的N个进程的信息。
 
+    读数来自持久的 PID -> Process 缓存：有 CPU 规则时硬件采样器会在每个 tick 刷新它，
+    因此在 CPU 告警回调中调用时通常不需要再遍历进程表。
+
     Args:
         count (int): 要获取的进程数量。
+        structured (bool, optional): 为 True 时返回 [{'pid', 'name', 'cpu_percent'}, ...]，
+            否则返回格式化的字符串。默认为 False。
 
     Returns:
-        str: 格式化的进程信息字符串。
+        str | list[dict]: 格式化的进程信息字符串，或结构化的进程列表。
     """
     try:
-        processes = []
-        for p in psutil.process_iter(['pid', 'name']):
-            try:
-                # The pre-warming is now handled by the IsTooBusyWatchdog.
-                # This call retrieves the CPU usage since the watchdog was initialized.
-                p.info['cpu_percent'] = p.cpu_percent(interval=None)
-                processes.append(p)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        # Exclude System Idle Process
-        processes = [p for p in processes if p.info['name'] != 'System Idle Process']
+        if not _process_cache.is_warm():
+            # 新的 Process 对象第一次调用 cpu_percent 总是返回 0，需要先建立基准
+            _process_cache.refresh()
+            time.sleep(_PRIME_DELAY)
+            _process_cache.refresh()
+        else:
+            _process_cache.refresh_if_stale()
 
-        # Sort processes by CPU usage
-        processes.sort(key=lambda p: p.info['cpu_percent'], reverse=True)
+        # Exclude System Idle Process
+        top_processes = _process_cache.top(count, exclude=('System Idle Process',))
+        if structured:
+            return top_processes
 
         # Format the output string
-        top_processes = processes[:count]
         result = [get_text("get_top_processes.result.header").format(count=count)]
         for p in top_processes:
-            try:
-                result.append(
-                    get_text("get_top_processes.result.item").format(
-                        pid=p.info['pid'],
-                        name=p.info['name'],
-                        cpu=f"{p.info['cpu_percent']:.2f}"
-                    )
-                )
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                result.append(
-                    get_text("get_top_processes.result.item.error").format(
-                        pid=p.info.get('pid', 'N/A'),
-                        name=p.info.get('name', 'N/A')
-                    )
+            result.append(
+                get_text("get_top_processes.result.item").format(
+                    pid=p['pid'],
+                    name=p['name'],
+                    cpu=f"{p['cpu_percent']:.2f}"
                 )
+            )
         return "\n".join(result)
 
     except Exception as e:
         logger.error(f"Failed to get top processes: {e}", exc_info=True)
-        return get_text("get_top_processes.return.general_error").format(error=e)
\ No newline at end of file
+        if structured:
+            return []
+        return get_text("get_top_processes.return.general_error").format(error=e)
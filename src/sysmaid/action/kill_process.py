@@ -1,47 +1,172 @@
 import logging
-import subprocess
+import threading
+import time
+import psutil
+from ..backends import get_backend
 
 logger = logging.getLogger(__name__)
 
-def kill_process(process_name):
+# 中央进程采样器的快照在这个时长（秒）内视为仍然可用，否则用 psutil 重新枚举
+SNAPSHOT_MAX_AGE = 0.5
+# 等待被终止的进程真正退出的最长时间（秒）
+WAIT_TIMEOUT = 3
+BACKENDS = ('psutil', 'taskkill')
+
+_index_lock = threading.Lock()
+_psutil_index = None  # 最近一次用 psutil 建立的进程索引，规则风暴中的多次 kill 共用
+
+def _process_index():
     """
-    Forcefully terminates a process and its entire process tree using taskkill.
-    This requires administrator privileges to kill elevated/protected processes.
+    返回足够新的进程表快照（映像名 -> PID，父 PID -> 子 PID）。
+    优先复用中央进程采样器本 tick 拍摄的快照；过旧时用一次 psutil 遍历重建，并在短时间内共享。
+    """
+    global _psutil_index
+    from ..maid import _process_sampler, ProcessSnapshot
+    snapshot = _process_sampler.last_snapshot
+    if snapshot is not None and time.time() - snapshot.timestamp <= SNAPSHOT_MAX_AGE:
+        return snapshot
+    with _index_lock:
+        if _psutil_index is None or time.time() - _psutil_index.timestamp > SNAPSHOT_MAX_AGE:
+            by_name = {}
+            children = {}
+            for p in psutil.process_iter(['name', 'ppid']):
+                if p.info['name']:
+                    by_name.setdefault(p.info['name'].lower(), set()).add(p.pid)
+                children.setdefault(p.info['ppid'], []).append(p.pid)
+            _psutil_index = ProcessSnapshot(by_name, None, children)
+        return _psutil_index
+
+def _resolve_victims(process_name):
+    """把映像名解析为整棵进程树的 psutil.Process 列表（父进程在前），跳过已退出的进程。"""
+    snapshot = _process_index()
+    roots = snapshot.pids(process_name)
+    victims = {}
+    for pid in snapshot.tree(process_name):
+        try:
+            proc = psutil.Process(pid)
+            if pid in roots:
+                # 快照最多有 SNAPSHOT_MAX_AGE 秒的历史，期间进程可能已经退出、PID 被无关进程复用
+                if proc.name().lower() != process_name.lower():
+                    logger.debug(f"PID {pid} is no longer '{process_name}' (now '{proc.name()}'). Skipping.")
+                    continue
+            else:
+                # 父进程退出后其 PID 可能被复用：真正的子进程不可能早于父进程创建
+                parent = victims.get(proc.ppid())
+                if parent is None or proc.create_time() < parent.create_time():
+                    continue
+            victims[pid] = proc
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            continue
+    return list(victims.values())
+
+def _kill_with_psutil(process_names, timeout):
+    """
+    在进程内终止多个映像名的整棵进程树，并一起等待它们退出。
+
+    Returns:
+        dict: 映像名 -> (已终止的进程数, 仍存活或无权终止的进程数)。
+    """
+    counts = {name: [0, 0] for name in process_names}
+    owners = {}  # PID -> 映像名；同一进程只终止一次
+    killed = []
+    for name in process_names:
+        for proc in _resolve_victims(name):
+            if proc.pid in owners:
+                continue
+            owners[proc.pid] = name
+            try:
+                proc.kill()  # Windows 上等同于 TerminateProcess，即 taskkill /F
+                killed.append(proc)
+            except psutil.NoSuchProcess:
+                continue
+            except psutil.AccessDenied:
+                counts[name][1] += 1
+    gone, alive = psutil.wait_procs(killed, timeout=timeout)
+    for proc in gone:
+        counts[owners[proc.pid]][0] += 1
+    for proc in alive:
+        counts[owners[proc.pid]][1] += 1
+    return {name: tuple(c) for name, c in counts.items()}
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kill backend '{backend}'. Expected 'psutil' or 'taskkill'.")
+
+def _force_kill(process_name, counts, timeout):
+    """
+    交给平台后端强制终止一个映像名的进程树，返回更新后的 (已终止的进程数, 仍存活的进程数)。
+    taskkill 的输出随系统语言变化、不便解析，因此终止前先解析出进程树，事后以这些进程是否真的退出为准。
     """
-    logger.info(f"Executing force kill for '{process_name}' using taskkill.")
     try:
-        command = [
-            "taskkill",
-            "/F",       # Forcefully terminate
-            "/T",       # Terminate process tree
-            "/IM",      # Specify image name
-            process_name
-        ]
-        
-        # We use CREATE_NO_WINDOW to prevent the console from flashing.
-        # capture_output=True pipes stdout/stderr, preventing them from showing up.
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=False, # We will check the result manually
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        
-        # taskkill exit codes:
-        # 0: Success, the process was terminated.
-        # 128: The process was not found.
-        # 1: Access denied (permission issue).
-        if result.returncode == 0:
-            logger.info(f"Successfully sent termination signal to '{process_name}'. Output: {result.stdout.strip()}")
-        elif result.returncode == 128:
-            logger.info(f"Kill command ran, but no active '{process_name}' processes were found.")
-        elif result.returncode == 1:
-            logger.error(f"Failed to kill '{process_name}': Access Denied. Ensure SysMaid is run with administrator privileges. Details: {result.stderr.strip()}")
+        victims = _resolve_victims(process_name)
+    except Exception as e:
+        logger.debug(f"Could not resolve '{process_name}' before the forced kill: {e}")
+        victims = None
+    ok = get_backend().force_kill(process_name)
+    if victims is None:
+        # 无法确认谁被终止了，只能以后端报告的成败为准
+        return counts[0], 0 if ok else counts[1]
+    gone, alive = psutil.wait_procs(victims, timeout=timeout if ok else 0)
+    return counts[0] + len(gone), len(alive)
+
+def kill_processes(process_names, backend='psutil', timeout=WAIT_TIMEOUT):
+    """
+    Forcefully terminates the process trees of many image names at once.
+
+    All names are resolved against one process snapshot, every victim is killed
+    and then all of them are awaited together with a single `psutil.wait_procs`.
+    Names with survivors (e.g. access denied) are handed to the platform backend's
+    forced kill (`taskkill` on Windows), which can also be selected explicitly with
+    backend='taskkill'.
+
+    Returns:
+        dict: {process_name: {'killed': int, 'survivors': int, 'latency': float (seconds)}}.
+        'killed' counts the processes that actually exited, whichever path killed them.
+    """
+    started = time.perf_counter()
+    _check_backend(backend)
+    process_names = list(dict.fromkeys(process_names))
+
+    counts = {name: (0, 0) for name in process_names}
+    fallback = process_names if backend == 'taskkill' else []
+    if backend == 'psutil':
+        try:
+            counts = _kill_with_psutil(process_names, timeout)
+        except Exception as e:
+            logger.error(f"In-process kill of {process_names} failed: {e}. Falling back to a forced kill.", exc_info=True)
+            fallback = process_names
         else:
-            logger.error(f"taskkill failed for '{process_name}' with exit code {result.returncode}. Stderr: {result.stderr.strip()}")
+            for name, (killed, survivors) in counts.items():
+                if survivors:
+                    logger.warning(f"{survivors} process(es) of '{name}' survived the in-process kill. Falling back to a forced kill.")
+                    fallback.append(name)
+                elif not killed:
+                    logger.info(f"Kill command ran, but no active '{name}' processes were found.")
 
-    except FileNotFoundError:
-        logger.critical("`taskkill.exe` not found. This action is only supported on Windows.")
-    except Exception as e:
-        logger.error(f"A critical error occurred during taskkill for '{process_name}': {e}", exc_info=True)
\ No newline at end of file
+    for name in fallback:
+        counts[name] = _force_kill(name, counts[name], timeout)
+
+    latency = time.perf_counter() - started
+    killed = sum(k for k, _ in counts.values())
+    if killed:
+        logger.info(f"Killed {killed} process(es) of {len(process_names)} image(s) in {latency * 1000:.1f} ms.")
+    else:
+        logger.debug(f"Kill of {process_names} finished in {latency * 1000:.1f} ms.")
+    return {name: {'killed': k, 'survivors': s, 'latency': latency} for name, (k, s) in counts.items()}
+
+def kill_process(process_name, backend='psutil', timeout=WAIT_TIMEOUT, batch=True):
+    """
+    Forcefully terminates a process and its entire process tree.
+
+    When called from a rule callback while the action dispatcher is running,
+    kills requested in the same tick are merged into one `kill_processes` call
+    that runs after the callback returns. Otherwise (or with batch=False) the
+    kill runs immediately and the returned Future is already done.
+
+    Returns:
+        concurrent.futures.Future: Resolves to this name's
+        {'killed': int, 'survivors': int, 'latency': float (seconds)}, in every context.
+    """
+    from ..maid import submit_batched
+    _check_backend(backend)
+    return submit_batched(kill_processes, process_name, batch=batch, backend=backend, timeout=timeout)
@@ -1,10 +1,11 @@
 import logging
-import wmi
-import pythoncom
 import time
+from ..backends import get_backend
 
 logger = logging.getLogger(__name__)
 
+BITLOCKER_NAMESPACE = "root/cimv2/security/microsoftvolumeencryption"
+
 def lock_volume(drive_letter: str, timeout_seconds=30):
     """
     Locks a BitLocker-encrypted volume using WMI, with retries if the volume is in use.
@@ -19,12 +20,14 @@ def lock_volume(drive_letter: str, timeout_seconds=30):
         return
     drive = f"{clean_letter}:"
 
+    if get_backend().name != 'windows':
+        logger.error(f"Cannot lock volume {drive}: BitLocker is only available on Windows.")
+        return
+    from ..wmi_pool import _wmi_pool
+
     try:
-        pythoncom.CoInitialize()
-        c = wmi.WMI(namespace="root/cimv2/security/microsoftvolumeencryption")
-        
         # Find the encryptable volume
-        volumes = c.Win32_EncryptableVolume(DriveLetter=drive)
+        volumes = _wmi_pool.call(lambda c: c.Win32_EncryptableVolume(DriveLetter=drive), namespace=BITLOCKER_NAMESPACE)
         
         if not volumes:
             logger.warning(f"Could not find a BitLocker volume for drive '{drive}'. The drive may not exist or is not encryptable.")
@@ -61,5 +64,5 @@ def lock_volume(drive_letter: str, timeout_seconds=30):
     
     except Exception as e:
         logger.critical(f"An unexpected critical error occurred while trying to lock volume {drive}: {e}", exc_info=True)
-    finally:
-        pythoncom.CoUninitialize()
\ No newline at end of file
+        # 连接可能已经失效，下次调用时重新连接
+        _wmi_pool.invalidate(BITLOCKER_NAMESPACE)
\ No newline at end of file
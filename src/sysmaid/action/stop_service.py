@@ -1,43 +1,38 @@
 import logging
-import wmi
-import pythoncom
+from ..backends import get_backend
 
 logger = logging.getLogger(__name__)
 
-def stop_service(service_name):
+def stop_services(service_names):
     """
-    Finds and stops a Windows service by its name.
-    """
-    logger.info(f"Executing stop for service '{service_name}'.")
-    try:
-        pythoncom.CoInitialize()
-        c = wmi.WMI()
-        
-        # Find the service
-        services = c.Win32_Service(Name=service_name)
-        
-        if not services:
-            logger.warning(f"Stop command ran, but service '{service_name}' was not found.")
-            return
+    Finds and stops many system services at once through the platform backend.
+    On Windows, services are resolved with one `Name = ... OR Name = ...` WMI query
+    per chunk instead of one query per service.
 
-        service = services[0]
-
-        # Check if the service is already stopped
-        if service.State == 'Stopped':
-            logger.info(f"Service '{service_name}' is already stopped.")
-            return
+    Returns:
+        dict: {service_name: {'status': str, 'code': int | None}}, where status is one of
+        'stopped', 'already_stopped', 'not_running', 'failed', 'not_found' or 'error'.
+    """
+    service_names = list(dict.fromkeys(service_names))
+    logger.info(f"Executing stop for service(s) {service_names}.")
+    report = get_backend().stop_services(service_names)
+    for name, result in report.items():
+        if result['status'] == 'not_found':
+            logger.warning(f"Stop command ran, but service '{name}' was not found.")
+    return report
 
-        # Stop the service
-        result, = service.StopService()
+def stop_service(service_name, batch=True):
+    """
+    Finds and stops a Windows service by its name.
 
-        if result == 0:
-            logger.info(f"Successfully sent stop command to service '{service_name}'.")
-        elif result == 5:
-            logger.warning(f"Service '{service_name}' is not running, so it could not be stopped.")
-        else:
-            logger.error(f"Failed to stop service '{service_name}'. Error code: {result}")
+    When called from a rule callback while the action dispatcher is running,
+    stops requested in the same tick are merged into one `stop_services` call
+    that runs after the callback returns. Otherwise (or with batch=False) the
+    stop runs immediately and the returned Future is already done.
 
-    except Exception as e:
-        logger.error(f"A critical error occurred while trying to stop service '{service_name}': {e}", exc_info=True)
-    finally:
-        pythoncom.CoUninitialize()
\ No newline at end of file
+    Returns:
+        concurrent.futures.Future: Resolves to this service's {'status': str, 'code': int | None}
+        (see `stop_services`), in every context.
+    """
+    from ..maid import submit_batched
+    return submit_batched(stop_services, service_name, batch=batch)
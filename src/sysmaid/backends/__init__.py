@@ -0,0 +1,58 @@
+# nuitka-project: --include-package=sysmaid.backends
+import importlib
+import os
+import sys
+import threading
+from .base import Backend, Subscription  # noqa: F401
+
+# 后端名 -> (模块, 类名)。按需导入，Linux 上不会加载任何 Windows 依赖
+BACKENDS = {
+    'windows': ('.windows', 'WindowsBackend'),
+    'linux': ('.linux', 'LinuxBackend'),
+    'fake': ('.fake', 'FakeBackend'),
+}
+
+_backend = None
+_lock = threading.Lock()
+
+def default_backend_name():
+    """环境变量 SYSMAID_BACKEND 优先，否则按当前平台选择。"""
+    name = os.environ.get('SYSMAID_BACKEND')
+    if name:
+        return name
+    if sys.platform == 'win32':
+        return 'windows'
+    if sys.platform.startswith('linux'):
+        return 'linux'
+    raise RuntimeError(f"SysMaid has no backend for platform '{sys.platform}'. Set SYSMAID_BACKEND to one of {sorted(BACKENDS)}.")
+
+def create_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Expected one of {sorted(BACKENDS)}.")
+    module, cls = BACKENDS[name]
+    return getattr(importlib.import_module(module, __name__), cls)()
+
+def get_backend():
+    """返回当前使用的平台后端，第一次调用时创建。"""
+    global _backend
+    with _lock:
+        if _backend is None:
+            _backend = create_backend(default_backend_name())
+        return _backend
+
+def set_backend(backend):
+    """
+    替换当前使用的平台后端，应在 start() 之前调用。
+
+    Args:
+        backend (str | Backend): 后端名（'windows'、'linux'、'fake'）或后端实例。
+
+    Returns:
+        Backend: 生效的后端实例。
+    """
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _lock:
+        _backend = backend
+    return backend
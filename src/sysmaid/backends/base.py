@@ -0,0 +1,106 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """
+    某一类进程事件（'started' 或 'exited'）在一组映像名上的订阅。
+    由 Backend.subscribe() 创建，只能在创建它的线程中使用。
+    """
+    def next_event(self, timeout):
+        """
+        等待下一个事件，最多 timeout 秒。
+
+        Returns:
+            str | None: 发生事件的进程映像名；超时时返回 None。订阅失效时抛出异常，调用方会重新订阅。
+        """
+        raise NotImplementedError
+
+    def update(self, names):
+        """
+        把订阅的映像名改为 names，只重建受影响的部分，其余部分继续接收事件。
+
+        Returns:
+            bool: 是否已经就地更新。返回 False 时调用方关闭本订阅并重新订阅。
+        """
+        return False
+
+    def close(self):
+        pass
+
+class Backend:
+    """
+    平台后端接口：进程枚举、窗口枚举、进程事件以及依赖平台的动作。
+    watchdog 引擎只通过这个接口访问操作系统，因此同一套规则可以运行在
+    Windows（WMI / Win32）、Linux（/proc）或内存中的假后端上。
+    """
+    name = 'base'
+    has_windows = True  # 能否枚举桌面窗口；为 False 时 has_no_window 规则不会启动
+    errors = (OSError,)  # 枚举失败时可能抛出的异常类型，采样器捕获后在下一个 tick 重试
+
+    # --- 线程 ---
+    def thread_init(self):
+        """工作线程启动时调用，例如初始化 COM。"""
+
+    def release_thread(self):
+        """长期运行的线程退出前调用，释放该线程持有的连接等资源。"""
+
+    def invalidate(self):
+        """枚举或订阅失败后调用，丢弃当前线程可能已经失效的连接。"""
+
+    # --- 进程与窗口 ---
+    def list_processes(self):
+        """
+        枚举整个进程表。
+
+        Returns:
+            Iterable[tuple[int, int, str]]: (PID, 父 PID, 映像名) 的序列。
+        """
+        raise NotImplementedError
+
+    def process_pids(self, name):
+        """返回指定映像名（不区分大小写）的所有 PID。"""
+        name = name.lower()
+        return {pid for pid, _, n in self.list_processes() if n and n.lower() == name}
+
+    def window_counts(self):
+        """返回 PID -> 带标题的可见窗口数量。"""
+        raise NotImplementedError(f"The '{self.name}' backend cannot enumerate windows.")
+
+    def subscribe(self, kind, names):
+        """
+        订阅一组映像名的进程事件。
+
+        Args:
+            kind (str): 'started' 或 'exited'。
+            names (list[str]): 小写的映像名。
+
+        Returns:
+            Subscription
+        """
+        raise NotImplementedError
+
+    # --- 动作与系统交互 ---
+    def force_kill(self, name):
+        """进程内终止失败后的后备手段：强制终止指定映像名的整棵进程树，成功时返回 True。"""
+        raise NotImplementedError
+
+    def stop_services(self, names):
+        """
+        停止多个系统服务。
+
+        Returns:
+            dict: {服务名: {'status': str, 'code': int | None}}，status 为 'stopped'、'already_stopped'、
+            'not_running'、'failed'、'not_found' 或 'error' 之一。
+        """
+        raise NotImplementedError
+
+    def is_admin(self):
+        return False
+
+    def show_message(self, title, text, error=False):
+        """向用户显示一条消息（可能阻塞直到用户关闭），默认只写日志。"""
+        if error:
+            logger.error(f"{title}: {text}")
+        else:
+            logger.warning(f"{title}: {text}")
@@ -0,0 +1,130 @@
+import collections
+import itertools
+import logging
+import threading
+from .base import Backend, Subscription
+
+logger = logging.getLogger(__name__)
+
+class FakeSubscription(Subscription):
+    def __init__(self, backend, kind, names):
+        self.backend = backend
+        self.kind = kind
+        self.names = set(names)
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+        with backend._lock:
+            backend._subscriptions.append(self)
+
+    def _push(self, kind, name):
+        if kind == self.kind and name.lower() in self.names:
+            with self._cond:
+                self._events.append(name)
+                self._cond.notify()
+
+    def next_event(self, timeout):
+        with self._cond:
+            if not self._events:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def update(self, names):
+        self.names = set(names)
+        return True
+
+    def close(self):
+        with self.backend._lock:
+            if self in self.backend._subscriptions:
+                self.backend._subscriptions.remove(self)
+
+class FakeBackend(Backend):
+    """
+    完全在内存中的后端，用于确定性的测试和基准测试。
+    通过 add_process / remove_process / set_windows / add_service 构造“操作系统”的状态，
+    进程的增删会立即推送给对应的事件订阅；动作只记录在 killed / stopped / messages 中。
+    """
+    name = 'fake'
+
+    def __init__(self):
+        self.processes = {}  # PID -> [父 PID, 映像名]
+        self.windows = {}  # PID -> 可见窗口数量
+        self.services = {}  # 服务名 -> 'Running' | 'Stopped'
+        self.killed = []
+        self.stopped = []
+        self.messages = []
+        self.enumerations = 0
+        self._pids = itertools.count(1000)
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    def add_process(self, name, pid=None, ppid=0, windows=0):
+        """加入一个进程并返回它的 PID；windows 为它拥有的可见窗口数。"""
+        with self._lock:
+            pid = next(self._pids) if pid is None else pid
+            self.processes[pid] = [ppid, name]
+            if windows:
+                self.windows[pid] = windows
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._push('started', name)
+        return pid
+
+    def remove_process(self, pid):
+        with self._lock:
+            entry = self.processes.pop(pid, None)
+            self.windows.pop(pid, None)
+            subscriptions = list(self._subscriptions)
+        if entry is not None:
+            for subscription in subscriptions:
+                subscription._push('exited', entry[1])
+
+    def set_windows(self, pid, count):
+        with self._lock:
+            if count:
+                self.windows[pid] = count
+            else:
+                self.windows.pop(pid, None)
+
+    def add_service(self, name, state='Running'):
+        self.services[name] = state
+
+    def list_processes(self):
+        with self._lock:
+            self.enumerations += 1
+            return [(pid, ppid, name) for pid, (ppid, name) in self.processes.items()]
+
+    def window_counts(self):
+        with self._lock:
+            return dict(self.windows)
+
+    def subscribe(self, kind, names):
+        return FakeSubscription(self, kind, names)
+
+    def force_kill(self, name):
+        self.killed.append(name)
+        lowered = name.lower()
+        with self._lock:
+            victims = [pid for pid, (_, n) in self.processes.items() if n.lower() == lowered]
+        for pid in victims:
+            self.remove_process(pid)
+        return True
+
+    def stop_services(self, service_names):
+        report = {}
+        for name in service_names:
+            state = self.services.get(name)
+            if state is None:
+                report[name] = {'status': 'not_found', 'code': None}
+            elif state == 'Stopped':
+                report[name] = {'status': 'already_stopped', 'code': None}
+            else:
+                self.services[name] = 'Stopped'
+                self.stopped.append(name)
+                report[name] = {'status': 'stopped', 'code': 0}
+        return report
+
+    def is_admin(self):
+        return True
+
+    def show_message(self, title, text, error=False):
+        self.messages.append((title, str(text), error))
@@ -0,0 +1,224 @@
+import collections
+import logging
+import os
+import select
+import shutil
+import subprocess
+import time
+import psutil
+from .base import Backend, Subscription
+
+logger = logging.getLogger(__name__)
+
+# /proc/[pid]/stat 中的 comm 字段最多 15 个字符，更长的名字要从 cmdline 补全
+COMM_LENGTH = 15
+
+def _read_stat(pid):
+    """解析 /proc/[pid]/stat，返回 (父 PID, 进程名)；进程已退出（包括僵尸进程）时返回 None。"""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm 本身可能包含空格和括号，以最后一个右括号为界
+    rpar = data.rfind(b')')
+    if data[rpar + 2:rpar + 3] == b'Z':
+        return None
+    name = data[data.find(b'(') + 1:rpar].decode(errors='replace')
+    ppid = int(data[rpar + 2:].split(None, 2)[1])
+    if len(name) == COMM_LENGTH:
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                argv0 = os.path.basename(f.read().split(b'\0', 1)[0].decode(errors='replace'))
+            if argv0.startswith(name):
+                name = argv0
+        except OSError:
+            pass
+    return ppid, name
+
+def _pids():
+    return [int(entry.name) for entry in os.scandir('/proc') if entry.name.isdigit()]
+
+class ProcSubscription(Subscription):
+    """
+    在 /proc 上模拟进程事件。
+
+    每 rescan 秒扫描一次 /proc，与上一次扫描比较得到新出现的进程（'started'）；
+    对被关注的进程打开 pidfd 并用 poll 等待，进程退出时立即得到 'exited' 事件。
+    内核不支持 pidfd 时退回到扫描比较。第一次扫描只建立基准，不产生事件。
+    """
+    def __init__(self, kind, names, rescan=1.0):
+        self.kind = kind
+        self.names = set(names)
+        self.rescan = rescan
+        self._known = None  # PID -> 映像名，上一次扫描时被关注的进程
+        self._pidfds = {}  # pidfd -> (PID, 映像名)
+        self._poller = select.poll()
+        self._pending = collections.deque()
+        self._next_scan = 0
+
+    def _scan(self):
+        current = {}
+        for pid in _pids():
+            stat = _read_stat(pid)
+            if stat is not None and stat[1].lower() in self.names:
+                current[pid] = stat[1]
+        if self._known is not None:
+            if self.kind == 'started':
+                self._pending.extend(current[pid] for pid in current.keys() - self._known.keys())
+            else:
+                tracked = {pid for pid, _ in self._pidfds.values()}
+                # 没有 pidfd 的进程只能靠扫描比较发现退出
+                self._pending.extend(self._known[pid] for pid in self._known.keys() - current.keys()
+                                     if pid not in tracked)
+        if self.kind == 'exited':
+            tracked = {pid for pid, _ in self._pidfds.values()}
+            for pid in current.keys() - tracked:
+                self._watch(pid, current[pid])
+        self._known = current
+        self._next_scan = time.monotonic() + self.rescan
+
+    def _watch(self, pid, name):
+        try:
+            fd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            return
+        self._pidfds[fd] = (pid, name)
+        self._poller.register(fd, select.POLLIN)
+
+    def next_event(self, timeout):
+        if not self._pending and time.monotonic() >= self._next_scan:
+            self._scan()
+        if not self._pending:
+            wait = max(0.0, min(timeout, self._next_scan - time.monotonic()))
+            if self._pidfds:
+                for fd, _ in self._poller.poll(wait * 1000):
+                    pid, name = self._pidfds.pop(fd)
+                    self._poller.unregister(fd)
+                    os.close(fd)
+                    if self._known is not None:
+                        # 退出已经由 pidfd 报告，下一次扫描比较时不能再报告一次
+                        self._known.pop(pid, None)
+                    self._pending.append(name)
+            else:
+                time.sleep(wait)
+        return self._pending.popleft() if self._pending else None
+
+    def update(self, names):
+        """新加入的映像名以当前 /proc 为基准，已经在运行的进程不会被报告为刚启动。"""
+        names = set(names)
+        removed, added = self.names - names, names - self.names
+        self.names = names
+        for fd, (pid, name) in list(self._pidfds.items()):
+            if name.lower() in removed:
+                del self._pidfds[fd]
+                self._poller.unregister(fd)
+                os.close(fd)
+        if self._known is None:
+            return True
+        for pid, name in list(self._known.items()):
+            if name.lower() in removed:
+                del self._known[pid]
+        if added:
+            for pid in _pids():
+                stat = _read_stat(pid)
+                if stat is not None and stat[1].lower() in added:
+                    self._known[pid] = stat[1]
+                    if self.kind == 'exited':
+                        self._watch(pid, stat[1])
+        return True
+
+    def close(self):
+        for fd in self._pidfds:
+            os.close(fd)
+        self._pidfds.clear()
+
+class LinuxBackend(Backend):
+    """直接读取 /proc 的 Linux 后端，不依赖任何 Windows 组件。没有桌面窗口的概念。"""
+    name = 'linux'
+    has_windows = False
+
+    def list_processes(self):
+        processes = []
+        for pid in _pids():
+            stat = _read_stat(pid)
+            if stat is not None:
+                processes.append((pid, stat[0], stat[1]))
+        return processes
+
+    def subscribe(self, kind, names):
+        return ProcSubscription(kind, names)
+
+    def force_kill(self, process_name):
+        """用 SIGKILL 终止指定映像名的进程及其全部子孙进程，相当于 taskkill /F /T。"""
+        pids = self.process_pids(process_name)
+        if not pids:
+            logger.info(f"Kill command ran, but no active '{process_name}' processes were found.")
+            return True
+        victims = {}  # PID -> psutil.Process，父进程在前
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                descendants = proc.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            victims.setdefault(pid, proc)
+            for child in descendants:
+                victims.setdefault(child.pid, child)
+        ok = True
+        for proc in victims.values():
+            try:
+                # psutil 会先确认 PID 没有被复用，再发送 SIGKILL
+                proc.kill()
+            except psutil.NoSuchProcess:
+                continue
+            except psutil.AccessDenied:
+                logger.error(f"Failed to kill '{process_name}' (PID {proc.pid}): permission denied. Ensure SysMaid is run as root.")
+                ok = False
+        return ok
+
+    def stop_services(self, service_names):
+        """通过 systemctl 停止多个 systemd 单元：一次 show 查询状态，一次 stop 停止所有运行中的单元。"""
+        report = {name: {'status': 'not_found', 'code': None} for name in service_names}
+        if shutil.which('systemctl') is None:
+            logger.error("`systemctl` not found. Stopping services requires systemd on Linux.")
+            return {name: {'status': 'error', 'code': None} for name in service_names}
+
+        show = subprocess.run(['systemctl', 'show', '--property=LoadState,ActiveState', '--', *service_names],
+                              capture_output=True, text=True, check=False)
+        if show.returncode != 0:
+            logger.error(f"Failed to query service(s) {service_names}. Stderr: {show.stderr.strip()}")
+            return {name: {'status': 'error', 'code': show.returncode} for name in service_names}
+        # 每个单元输出一段 key=value，段与段之间以空行分隔，顺序与参数一致
+        blocks = [dict(line.split('=', 1) for line in block.splitlines() if '=' in line)
+                  for block in show.stdout.strip().split('\n\n')]
+        running = []
+        for name, props in zip(service_names, blocks):
+            if props.get('LoadState') == 'not-found':
+                continue
+            if props.get('ActiveState') in ('inactive', 'failed'):
+                logger.info(f"Service '{name}' is already stopped.")
+                report[name] = {'status': 'already_stopped', 'code': None}
+            else:
+                running.append(name)
+
+        if running:
+            stop = subprocess.run(['systemctl', 'stop', '--', *running], capture_output=True, text=True, check=False)
+            status = 'stopped' if stop.returncode == 0 else 'failed'
+            for name in running:
+                report[name] = {'status': status, 'code': stop.returncode}
+            if stop.returncode == 0:
+                logger.info(f"Successfully stopped service(s) {running}.")
+            else:
+                logger.error(f"Failed to stop service(s) {running}. Exit code: {stop.returncode}. Stderr: {stop.stderr.strip()}")
+        return report
+
+    def is_admin(self):
+        return os.geteuid() == 0
+
+    def show_message(self, title, text, error=False):
+        if shutil.which('notify-send'):
+            subprocess.run(['notify-send', '--urgency=critical' if error else '--urgency=normal', title, str(text)],
+                           capture_output=True, check=False)
+        else:
+            super().show_message(title, text, error)
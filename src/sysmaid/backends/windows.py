@@ -0,0 +1,253 @@
+import ctypes
+import logging
+import subprocess
+import time
+from .base import Backend, Subscription
+from ..wmi_pool import _wmi_pool
+
+logger = logging.getLogger(__name__)
+
+# 一条 WQL 语句中最多合并的服务名或进程名个数，避免查询语句过长
+QUERY_CHUNK = 64
+
+EVENT_CLASSES = {
+    'started': '__InstanceCreationEvent',
+    'exited': '__InstanceDeletionEvent',
+}
+
+def _escape(name):
+    return name.replace('\\', '\\\\').replace("'", "\\'")
+
+def build_event_query(kind, names):
+    """构建包含一组进程名的 WMI 事件查询语句。"""
+    conditions = " OR ".join(f"TargetInstance.Name = '{_escape(n)}'" for n in names)
+    return (f"SELECT * FROM {EVENT_CLASSES[kind]} "
+            f"WITHIN 2 WHERE TargetInstance ISA 'Win32_Process' "
+            f"AND ({conditions})")
+
+def build_event_queries(kind, names):
+    """把被关注的进程名按 QUERY_CHUNK 分组，每组构建一条事件查询语句。"""
+    names = list(names)
+    return [build_event_query(kind, names[i:i + QUERY_CHUNK]) for i in range(0, len(names), QUERY_CHUNK)]
+
+def _build_service_query(service_names):
+    conditions = " OR ".join(f"Name = '{_escape(n)}'" for n in service_names)
+    return f"SELECT * FROM Win32_Service WHERE {conditions}"
+
+def _stop_service(service):
+    """
+    Stops one resolved Win32_Service instance.
+
+    Returns:
+        dict: {'status': 'stopped' | 'already_stopped' | 'not_running' | 'failed', 'code': int | None}.
+    """
+    service_name = service.Name
+    # Check if the service is already stopped
+    if service.State == 'Stopped':
+        logger.info(f"Service '{service_name}' is already stopped.")
+        return {'status': 'already_stopped', 'code': None}
+
+    # Stop the service
+    result, = service.StopService()
+
+    if result == 0:
+        logger.info(f"Successfully sent stop command to service '{service_name}'.")
+        return {'status': 'stopped', 'code': result}
+    elif result == 5:
+        logger.warning(f"Service '{service_name}' is not running, so it could not be stopped.")
+        return {'status': 'not_running', 'code': result}
+    else:
+        logger.error(f"Failed to stop service '{service_name}'. Error code: {result}")
+        return {'status': 'failed', 'code': result}
+
+class WmiSubscription(Subscription):
+    """
+    一组进程名上的 WMI 事件订阅。进程名按 QUERY_CHUNK 分成若干条
+    ExecNotificationQuery，next_event 在它们之间轮流等待。
+    进程名变化时只重建包含变化的那几组查询，其余查询保持打开，不会错过事件。
+    """
+    # The HRESULT for WBEM_S_TIMEDOUT. This indicates an expected timeout of NextEvent.
+    WBEM_S_TIMEDOUT = -2147209215
+
+    def __init__(self, kind, names):
+        import pywintypes
+        self._com_error = pywintypes.com_error
+        self.kind = kind
+        self._chunks = []  # [进程名集合, 该组的事件查询]，每组最多 QUERY_CHUNK 个进程名
+        self._watchers = []
+        self._next = 0  # 下一次从哪条订阅开始等待，保证每条订阅都轮得到
+        self.update(names)
+
+    def update(self, names):
+        names = set(names)
+        changed = set()
+        for index, (chunk, _) in enumerate(self._chunks):
+            if chunk - names:
+                chunk.intersection_update(names)
+                changed.add(index)
+        watched = set().union(*(chunk for chunk, _ in self._chunks))
+        for name in sorted(names - watched):
+            # 新的进程名优先放进本来就要重建的组，其次是还有空位的组，都满了再新开一组
+            index = min((i for i in changed if len(self._chunks[i][0]) < QUERY_CHUNK), default=None)
+            if index is None:
+                index = next((i for i, (chunk, _) in enumerate(self._chunks) if len(chunk) < QUERY_CHUNK), None)
+            if index is None:
+                index = len(self._chunks)
+                self._chunks.append([set(), None])
+            self._chunks[index][0].add(name)
+            changed.add(index)
+        if changed:
+            c = _wmi_pool.get()
+            for index in sorted(changed):
+                chunk = self._chunks[index]
+                chunk[1] = c.ExecNotificationQuery(build_event_query(self.kind, sorted(chunk[0]))) if chunk[0] else None
+            self._chunks = [chunk for chunk in self._chunks if chunk[0]]
+            self._watchers = [watcher for _, watcher in self._chunks]
+            self._next = 0
+        return True
+
+    def next_event(self, timeout):
+        if not self._watchers:
+            time.sleep(timeout)
+            return None
+        # 超时时间平均分给每条订阅；至少等 1 毫秒，否则订阅很多时 NextEvent(0) 会空转
+        wait = max(1, int(timeout * 1000) // len(self._watchers))
+        for _ in range(len(self._watchers)):
+            watcher = self._watchers[self._next]
+            self._next = (self._next + 1) % len(self._watchers)
+            try:
+                event = watcher.NextEvent(wait)
+            except self._com_error as e:
+                # It's nested deep inside the exception object at e.args[2][5].
+                if len(e.args) > 2 and e.args[2] and e.args[2][5] == self.WBEM_S_TIMEDOUT:
+                    continue  # This is a timeout, try the next chunk
+                raise
+            return str(event.TargetInstance.Name)
+        return None
+
+class WindowsBackend(Backend):
+    """
+    通过 WMI 和 Win32 API 访问 Windows。WMI 连接按线程缓存在连接池中。
+    pywin32 和 wmi 在第一次用到时才导入，因此 `import sysmaid` 时的管理员检查只需要 ctypes。
+    """
+    name = 'windows'
+
+    @property
+    def errors(self):
+        import wmi
+        return (wmi.x_wmi,)
+
+    def thread_init(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def release_thread(self):
+        _wmi_pool.release_thread()
+
+    def invalidate(self):
+        _wmi_pool.invalidate()
+
+    def list_processes(self):
+        return [(p.ProcessId, p.ParentProcessId, p.Name)
+                for p in _wmi_pool.get().Win32_Process(['Name', 'ProcessId', 'ParentProcessId'])]
+
+    def process_pids(self, name):
+        return {p.ProcessId for p in _wmi_pool.call(lambda c: c.Win32_Process(name=name))}
+
+    def window_counts(self):
+        import win32gui
+        import win32process
+        counts = {}
+        def enum_windows_callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
+                _, found_pid = win32process.GetWindowThreadProcessId(hwnd)
+                counts[found_pid] = counts.get(found_pid, 0) + 1
+        win32gui.EnumWindows(enum_windows_callback, None)
+        return counts
+
+    def subscribe(self, kind, names):
+        return WmiSubscription(kind, names)
+
+    def force_kill(self, process_name):
+        """
+        Forcefully terminates a process and its entire process tree using taskkill.
+        This requires administrator privileges to kill elevated/protected processes.
+        """
+        logger.info(f"Executing force kill for '{process_name}' using taskkill.")
+        try:
+            command = [
+                "taskkill",
+                "/F",       # Forcefully terminate
+                "/T",       # Terminate process tree
+                "/IM",      # Specify image name
+                process_name
+            ]
+
+            # We use CREATE_NO_WINDOW to prevent the console from flashing.
+            # capture_output=True pipes stdout/stderr, preventing them from showing up.
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                check=False, # We will check the result manually
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+
+            # taskkill exit codes:
+            # 0: Success, the process was terminated.
+            # 128: The process was not found.
+            # 1: Access denied (permission issue).
+            if result.returncode == 0:
+                logger.info(f"Successfully sent termination signal to '{process_name}'. Output: {result.stdout.strip()}")
+            elif result.returncode == 128:
+                logger.info(f"Kill command ran, but no active '{process_name}' processes were found.")
+            elif result.returncode == 1:
+                logger.error(f"Failed to kill '{process_name}': Access Denied. Ensure SysMaid is run with administrator privileges. Details: {result.stderr.strip()}")
+            else:
+                logger.error(f"taskkill failed for '{process_name}' with exit code {result.returncode}. Stderr: {result.stderr.strip()}")
+            return result.returncode == 0
+
+        except FileNotFoundError:
+            logger.critical("`taskkill.exe` not found. This action is only supported on Windows.")
+        except Exception as e:
+            logger.error(f"A critical error occurred during taskkill for '{process_name}': {e}", exc_info=True)
+        return False
+
+    def stop_services(self, service_names):
+        """
+        Stops many services with the calling thread's pooled WMI connection.
+        Services are resolved with one `Name = ... OR Name = ...` query per chunk
+        instead of one query per service.
+        """
+        report = {name: {'status': 'not_found', 'code': None} for name in service_names}
+        try:
+            c = _wmi_pool.get()
+            by_name = {name.lower(): name for name in service_names}
+            for i in range(0, len(service_names), QUERY_CHUNK):
+                for service in c.query(_build_service_query(service_names[i:i + QUERY_CHUNK])):
+                    # 服务名不区分大小写，报告里沿用调用方给出的写法
+                    name = by_name.get(str(service.Name).lower(), service.Name)
+                    try:
+                        report[name] = _stop_service(service)
+                    except Exception as e:
+                        logger.error(f"A critical error occurred while trying to stop service '{name}': {e}", exc_info=True)
+                        report[name] = {'status': 'error', 'code': None}
+        except Exception as e:
+            logger.error(f"A critical error occurred while trying to stop service(s) {service_names}: {e}", exc_info=True)
+            for result in report.values():
+                if result['status'] == 'not_found':
+                    result['status'] = 'error'
+            # 连接可能已经失效，下次调用时重新连接
+            _wmi_pool.invalidate()
+        return report
+
+    def is_admin(self):
+        try:
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+
+    def show_message(self, title, text, error=False):
+        # MessageBoxW(HWND, text, caption, type)
+        # HWND = 0 for no owner window; type = 0x10 (MB_ICONERROR) or 0x40 (MB_ICONINFORMATION)
+        ctypes.windll.user32.MessageBoxW(0, str(text), title, 0x10 if error else 0x40)
@@ -1,31 +1,52 @@
 import logging
-import wmi
+from ..backends import get_backend
 from ..maid import ProcessWatchdog
 
 logger = logging.getLogger(__name__)
 
 class NoWindowWatchdog(ProcessWatchdog):
+    # 放慢的间隔会直接加到僵尸确认的时间上（原本是 GRACE_PERIOD 次检查，约 3 秒），因此只允许小幅放慢
+    MAX_INTERVAL = 2
+
     def __init__(self, process_name):
         super().__init__(process_name)
         self._no_window_checks_count = 0
+        self._windowless = 0  # 上一次检查时没有窗口的进程数
         self.GRACE_PERIOD = 3  # 3 seconds
 
+    def start(self, scheduler=None):
+        if not get_backend().has_windows:
+            logger.warning(f"The '{get_backend().name}' backend cannot enumerate windows. has_no_window rule for '{self.name}' will not run.")
+            return
+        super().start(scheduler)
+
     def has_no_window(self, func):
         self._callbacks['has_no_window'] = func
         return func
 
-    def check_process_state(self, pids_with_windows):
+    def check_process_state(self, pids_with_windows, pids=None):
+        backend = get_backend()
         try:
-            processes = self.c.Win32_Process(name=self.name)
-            if not processes:
+            if pids is None:
+                # 未经中央采样器分发时（例如单独调用），退回到单独的查询
+                pids = backend.process_pids(self.name)
+            if not pids:
                 if self._no_window_checks_count > 0:
                     logger.debug(f"'{self.name}' is no longer running. Resetting zombie check.")
                     self._no_window_checks_count = 0
+                self._windowless = 0
+                # 进程不存在是最常见的稳定状态，放慢轮询
+                self._back_off()
                 return
 
-            current_pids = {p.ProcessId for p in processes}
-            
-            app_has_a_window = any(pid in pids_with_windows for pid in current_pids)
+            windowless = sum(1 for pid in pids if pid not in pids_with_windows)
+            app_has_a_window = windowless < len(pids)
+            # 没有窗口的进程变多、或者已经在宽限期内，说明正在向触发条件靠近，按基础间隔确认
+            if windowless > self._windowless or not app_has_a_window:
+                self._snap_back()
+            else:
+                self._back_off()
+            self._windowless = windowless
 
             if app_has_a_window:
                 if self._no_window_checks_count > 0:
@@ -37,8 +58,8 @@ class NoWindowWatchdog(ProcessWatchdog):
                 if self._no_window_checks_count >= self.GRACE_PERIOD:
                     logger.info(f"ZOMBIE CONFIRMED for app '{self.name}'. All processes lack windows. Firing callback.")
                     if 'has_no_window' in self._callbacks:
-                        self._callbacks['has_no_window']()
+                        self._fire(self._callbacks['has_no_window'])
                         self._no_window_checks_count = 0
                         
-        except wmi.x_wmi as e:
-            logger.error(f"WMI query for '{self.name}' failed: {e}")
+        except backend.errors as e:
+            logger.error(f"Process query for '{self.name}' failed: {e}")
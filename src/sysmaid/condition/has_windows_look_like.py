@@ -3,15 +3,191 @@ import mss
 import cv2
 import numpy as np
 import os
+import threading
+import time
 from ..maid import HardwareWatchdog
+from ..metrics import _metrics
 
 logger = logging.getLogger(__name__)
 
 # 避免在SYSTEM账户下运行时，工作目录被强制指向System32的问题
 _BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+class SharedFrameProvider:
+    """
+    屏幕画面的共享提供者：在 TTL 内只截屏并转换灰度一次，
+    把同一块只读的 NumPy 缓冲区交给所有模板匹配规则。
+    同时按网格记录每个区域最近一次发生变化时的帧号，各规则据此只匹配
+    自己上次检查之后变化过的区域，即使它们的轮询间隔各不相同。
+
+    每一帧灰度画面都有自己的缓冲区，交出去之后不会再被改写：线程池调度下
+    不同规则可能同时持有不同 tick 的画面，谁也不会读到被后一次截屏覆盖的数据。
+    get_frame() / update() 交出的每一帧都记一次租用，使用方用完后调用 release(帧号) 归还；
+    只有租用全部归还、且已不是最新一帧的缓冲区才会被下一次截屏复用，没有归还的帧
+    不会被复用，交由垃圾回收。差分图和网格统计写入预先分配的缓冲区，稳态下几乎不产生
+    新的内存分配。
+    """
+    TILE_SIZE = 64  # 变化检测的网格大小（像素）
+    DIFF_THRESHOLD = 8  # 灰度差不超过该值视为噪声，不算变化
+    POOL_SIZE = 8  # 最多保留多少块可回收的灰度缓冲区，超出时新帧直接分配
+
+    def __init__(self, ttl=0.5):
+        self.ttl = ttl  # 截屏结果的缓存时间（秒）
+        self.frame_id = 0
+        self.captures = 0  # 实际截屏次数
+        self.requests = 0  # 规则请求画面的次数
+        self.consumers = 0  # 使用该提供者的规则数
+        self._frame = None  # 最新一帧的只读灰度画面
+        self._pool = []  # 当前分辨率下可以复用的空闲灰度缓冲区
+        self._leases = {}  # 帧号 -> [灰度缓冲区, 未归还的租用数]
+        self._shape = None  # 当前分辨率，变化时重新分配差分与统计缓冲区
+        self._captured_at = None
+        self._tile_changed = None  # 每个网格最近一次发生变化时的帧号
+        self._local = threading.local()  # mss 的截屏会话只能在创建它的线程中使用
+        self._lock = threading.Lock()
+
+    def _session(self):
+        """返回当前线程的持久截屏会话，避免每次截屏都重建截屏后端。"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def get_frame(self):
+        """返回 (灰度画面, 帧号)。TTL 内的重复请求复用同一帧。"""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if self._frame is not None and now - self._captured_at < self.ttl:
+                return self._lease(self._frame, self.frame_id)
+            sct = self._session()
+            start = time.perf_counter()
+            # 通过 __array_interface__ 直接引用截屏数据，不做复制
+            bgra = np.asarray(sct.grab(sct.monitors[1]))  # All monitors
+            _metrics.record_call('screen_capture', time.perf_counter() - start)
+            frame = self._new_frame(bgra.shape[:2])
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=frame)
+            self.captures += 1
+            self._captured_at = now
+            return self._lease(*self._commit(frame))
+
+    def update(self, img_gray):
+        """注入一帧灰度画面（截屏之外的来源，例如测试与基准），返回 (灰度画面, 帧号)。"""
+        with self._lock:
+            frame = self._new_frame(img_gray.shape)
+            np.copyto(frame, img_gray)
+            return self._lease(*self._commit(frame))
+
+    def release(self, frame_id):
+        """归还 get_frame() / update() 交出的一帧。归还之后不能再读取该帧的缓冲区。"""
+        with self._lock:
+            lease = self._leases.get(frame_id)
+            if lease is None:
+                return
+            lease[1] -= 1
+            if lease[1] <= 0:
+                del self._leases[frame_id]
+                # 最新一帧还要留作下一次差分的基准
+                if lease[0] is not self._frame:
+                    self._recycle(lease[0])
+
+    def _lease(self, frame, frame_id):
+        lease = self._leases.get(frame_id)
+        if lease is None:
+            lease = self._leases[frame_id] = [frame, 0]
+        lease[1] += 1
+        return frame, frame_id
+
+    def _recycle(self, frame):
+        # 分辨率变化之前的旧缓冲区直接丢弃
+        if frame.shape == self._shape and len(self._pool) < self.POOL_SIZE:
+            self._pool.append(frame)
+
+    def _new_frame(self, shape):
+        """取一块空闲的灰度缓冲区，没有时新分配。"""
+        if self._shape != shape:
+            self._allocate(shape)
+        if self._pool:
+            frame = self._pool.pop()
+            frame.flags.writeable = True
+            return frame
+        return np.empty(shape, dtype=np.uint8)
+
+    def _allocate(self, shape):
+        """按画面尺寸（重新）分配差分与统计缓冲区；分辨率变化后的第一帧视为全部变化。"""
+        tile = self.TILE_SIZE
+        height, width = shape
+        rows, cols = -(-height // tile), -(-width // tile)
+        self._shape = shape
+        self._pool = []
+        self._diff = np.empty(shape, dtype=np.uint8)
+        self._row_starts = np.arange(0, height, tile)
+        self._col_starts = np.arange(0, width, tile)
+        self._row_max = np.empty((rows, width), dtype=np.uint8)
+        self._tile_max = np.empty((rows, cols), dtype=np.uint8)
+        self._tile_dirty = np.empty((rows, cols), dtype=bool)
+        self._region_mask = np.empty((rows, cols), dtype=np.uint8)
+        self._tile_changed = np.zeros((rows, cols), dtype=np.int64)
+        self._frame = None
+
+    def _commit(self, frame):
+        self.frame_id += 1
+        if self._frame is None:
+            self._tile_changed.fill(self.frame_id)
+        else:
+            cv2.absdiff(self._frame, frame, dst=self._diff)
+            # 每个网格内的最大差值，两次向量化归约完成
+            np.maximum.reduceat(self._diff, self._row_starts, axis=0, out=self._row_max)
+            np.maximum.reduceat(self._row_max, self._col_starts, axis=1, out=self._tile_max)
+            np.greater(self._tile_max, self.DIFF_THRESHOLD, out=self._tile_dirty)
+            np.copyto(self._tile_changed, self.frame_id, where=self._tile_dirty)
+        # 规则之间共享同一帧，设为只读以防被某条规则意外修改
+        frame.flags.writeable = False
+        previous, self._frame = self._frame, frame
+        # 上一帧不再是差分基准，没有人租用时即可回收
+        if previous is not None and self.frame_id - 1 not in self._leases:
+            self._recycle(previous)
+        return frame, self.frame_id
+
+    def changed_regions(self, since_frame_id):
+        """返回帧号 since_frame_id 之后发生过变化的区域 (x0, y0, x1, y1) 列表。"""
+        tile = self.TILE_SIZE
+        with self._lock:
+            dirty = self._region_mask
+            np.greater(self._tile_changed, since_frame_id, out=dirty)
+            if not dirty.any():
+                return []
+            height, width = self._shape
+            # 相连的变化网格合并为一个矩形，避免在相邻区域上重复匹配
+            count, _, stats, _ = cv2.connectedComponentsWithStats(dirty, connectivity=8)
+
+        regions = []
+        for col, row, cols, rows, _ in stats[1:count]:
+            regions.append((col * tile, row * tile, min(width, (col + cols) * tile), min(height, (row + rows) * tile)))
+        return regions
+
+    def stats(self):
+        """截屏次数等指标。captures_per_tick 按“每条规则每个 tick 请求一次”估算。"""
+        with self._lock:
+            ticks = self.requests / self.consumers if self.consumers else 0
+            return {
+                'captures': self.captures,
+                'requests': self.requests,
+                'consumers': self.consumers,
+                'captures_per_tick': self.captures / ticks if ticks else 0.0,
+            }
+
+_frame_provider = SharedFrameProvider()
+
 class WindowsMatchingWatchdog(HardwareWatchdog):
-    def __init__(self, hardware_name, template_image_path=None, threshold=0.8, interval=1):
+    PYRAMID_FACTOR = 4  # 金字塔模式下粗匹配的缩小倍数
+    PYRAMID_MIN_SIZE = 8  # 缩小后的模板边长不能小于该值，否则该尺度退回全分辨率匹配
+    COARSE_MARGIN = 0.1  # 粗匹配的阈值比 threshold 宽松多少，以免降采样后漏掉真正的匹配
+    MAX_CANDIDATES = 16  # 每个区域最多在全分辨率下验证的候选位置数
+    SCRATCH_LIMIT = 1 << 18  # 可复用的匹配结果缓冲区大小上限（float32 个数），更大的全画面匹配照常分配
+
+    def __init__(self, hardware_name, template_image_path=None, threshold=0.8, interval=1,
+                 pyramid=False, scales=(1.0,)):
         super().__init__(hardware_name)
         self.interval = interval  # 设置轮询间隔，基类的_loop将会使用它
 
@@ -27,9 +203,40 @@ class WindowsMatchingWatchdog(HardwareWatchdog):
         self.template = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
         self.threshold = threshold
         self._callbacks = {}
+        self.frame_provider = _frame_provider
+        self.frame_provider.consumers += 1
+        self._frame_id = None  # 上一次检查时的帧号
+        self._frame_shape = None
+        self._matches = np.empty((0, 4), dtype=np.intp)  # 上一次检查时所有匹配的 (x, y, w, h)
+        self._scratch = np.empty(0, dtype=np.float32)  # 局部区域匹配结果的复用缓冲区
 
         if self.template is None:
             raise FileNotFoundError(f"Template image not found at path: {path}")
+
+        self.pyramid = pyramid
+        self.scales = tuple(scales)
+        self._levels = self._build_levels()
+
+    def _build_levels(self):
+        """
+        预先计算每个 DPI 缩放比例下的模板，以及金字塔模式下对应的缩小模板。
+        返回 [(全分辨率模板, 粗匹配模板或 None)]。
+        """
+        levels = []
+        for scale in self.scales:
+            if scale == 1.0:
+                template = self.template
+            else:
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                template = cv2.resize(self.template, None, fx=scale, fy=scale, interpolation=interpolation)
+            coarse = None
+            if self.pyramid and min(template.shape) // self.PYRAMID_FACTOR >= self.PYRAMID_MIN_SIZE:
+                th, tw = template.shape
+                coarse = cv2.resize(
+                    template, (tw // self.PYRAMID_FACTOR, th // self.PYRAMID_FACTOR), interpolation=cv2.INTER_AREA
+                )
+            levels.append((template, coarse))
+        return levels
             
     def check_state(self):
         if self.template is None:
@@ -38,23 +245,146 @@ class WindowsMatchingWatchdog(HardwareWatchdog):
             logger.warning("Template image is not loaded, skipping screen check.")
             return
 
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]  # All monitors
-            sct_img = sct.grab(monitor)
-            
-            img = np.array(sct_img)
-            img_gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
-            
-            res = cv2.matchTemplate(img_gray, self.template, cv2.TM_CCOEFF_NORMED)
-            loc = np.where(res >= self.threshold)
-            
-            if loc[0].size > 0:
-                logger.info("Found image matching template on screen. Firing callback.")
-                self.trigger_callback()
+        img_gray, frame_id = self.frame_provider.get_frame()
+        try:
+            found = self.match_frame(img_gray, frame_id)
+        finally:
+            self.frame_provider.release(frame_id)
+        if found:
+            logger.info("Found image matching template on screen. Firing callback.")
+            self.trigger_callback()
+
+    def match_frame(self, img_gray, frame_id):
+        """
+        增量匹配：只在本规则上次检查之后变化过的区域（按模板尺寸向外扩展）重新运行
+        matchTemplate；画面完全没变时直接沿用上一次的结果。
+
+        Args:
+            img_gray: 帧提供者给出的灰度画面（只读，不会被复制）。
+            frame_id (int): 该画面在帧提供者中的帧号。
+
+        Returns:
+            bool: 当前画面中是否存在与模板匹配的区域。
+        """
+        height, width = img_gray.shape
+        if frame_id == self._frame_id:
+            return self._matches.size > 0
+        if self._frame_id is None or self._frame_shape != img_gray.shape:
+            regions = [(0, 0, width, height)]
+        else:
+            regions = self.frame_provider.changed_regions(self._frame_id)
+        self._frame_id, self._frame_shape = frame_id, img_gray.shape
+        if not regions:
+            # 画面没有变化，放慢轮询；一旦有变化立即恢复
+            self._back_off()
+            return self._matches.size > 0
+        self._snap_back()
+
+        th = max(template.shape[0] for template, _ in self._levels)
+        tw = max(template.shape[1] for template, _ in self._levels)
+        # 没有被任何变化区域触及的旧匹配依然有效
+        keep = np.ones(len(self._matches), dtype=bool)
+        xs, ys, ws, hs = self._matches.T
+        for x0, y0, x1, y1 in regions:
+            keep &= ~((xs < x1) & (xs + ws > x0) & (ys < y1) & (ys + hs > y0))
+        found = [self._matches[keep]]
+
+        for x0, y0, x1, y1 in regions:
+            # 向外扩展一个模板尺寸，跨越变化区域边界的匹配也能被找到
+            found.append(self._match_region(
+                img_gray, max(0, x0 - tw + 1), max(0, y0 - th + 1), min(width, x1 + tw - 1), min(height, y1 + th - 1)
+            ))
+        self._matches = np.concatenate(found)
+
+        # 每个区域只记录得分最高的一个匹配。旧匹配失效而变化区域里又没有新匹配时，
+        # 同一区域里可能还有未被记录的匹配，此时退回一次全画面匹配
+        if self._matches.size == 0 and not keep.all():
+            self._matches = self._match_region(img_gray, 0, 0, width, height)
+        return self._matches.size > 0
+
+    def _match_region(self, img_gray, x0, y0, x1, y1):
+        """
+        在 img_gray[y0:y1, x0:x1] 中匹配模板，返回全图坐标系下的匹配 (x, y, w, h)。
+        任一尺度匹配成功即停止尝试其余尺度。
+        """
+        roi = img_gray[y0:y1, x0:x1]
+        coarse_roi = None
+        for template, coarse in self._levels:
+            th, tw = template.shape
+            if x1 - x0 < tw or y1 - y0 < th:
+                continue
+            if coarse is None:
+                loc = self._match_full(roi, template)
+            else:
+                if coarse_roi is None:
+                    f = self.PYRAMID_FACTOR
+                    coarse_roi = cv2.resize(roi, ((x1 - x0) // f, (y1 - y0) // f), interpolation=cv2.INTER_AREA)
+                loc = self._match_pyramid(roi, coarse_roi, template, coarse)
+            if loc is not None:
+                return np.array([[loc[0] + x0, loc[1] + y0, tw, th]], dtype=np.intp)
+        return np.empty((0, 4), dtype=np.intp)
+
+    def _match_full(self, roi, template):
+        """返回得分最高且达到阈值的位置 (x, y)，否则返回 None。"""
+        start = time.perf_counter()
+        res = cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED, result=self._result_buffer(roi, template))
+        _metrics.record_call('matchTemplate', time.perf_counter() - start)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        return max_loc if max_val >= self.threshold else None
+
+    def _result_buffer(self, roi, template):
+        """
+        为局部区域的匹配结果提供一块复用的连续缓冲区，避免稳态下每个 tick 都分配新数组。
+        结果过大（例如首次的全画面匹配）时返回 None，交给 OpenCV 自行分配。
+        """
+        rows, cols = roi.shape[0] - template.shape[0] + 1, roi.shape[1] - template.shape[1] + 1
+        size = rows * cols
+        if size > self.SCRATCH_LIMIT:
+            return None
+        if self._scratch.size < size:
+            self._scratch = np.empty(self.SCRATCH_LIMIT, dtype=np.float32)
+        return self._scratch[:size].reshape(rows, cols)
+
+    def _match_pyramid(self, roi, coarse_roi, template, coarse):
+        """先在缩小的画面上粗匹配，再按粗匹配得分从高到低，在候选位置附近的小窗口里做全分辨率验证。"""
+        f = self.PYRAMID_FACTOR
+        th, tw = template.shape
+        if coarse_roi.shape[0] < coarse.shape[0] or coarse_roi.shape[1] < coarse.shape[1]:
+            return self._match_full(roi, template)
+        start = time.perf_counter()
+        res = cv2.matchTemplate(coarse_roi, coarse, cv2.TM_CCOEFF_NORMED, result=self._result_buffer(coarse_roi, coarse))
+        _metrics.record_call('matchTemplate', time.perf_counter() - start)
+        coarse_threshold = self.threshold - self.COARSE_MARGIN
+        if cv2.minMaxLoc(res)[1] < coarse_threshold:
+            return None
+
+        scores = res.ravel()
+        candidates = np.flatnonzero(scores >= coarse_threshold)
+        if candidates.size > self.MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(scores[candidates], -self.MAX_CANDIDATES)[-self.MAX_CANDIDATES:]]
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+        height, width = roi.shape
+        for cy, cx in zip(*np.unravel_index(candidates, res.shape)):
+            # 粗坐标对应全分辨率下 f×f 的不确定范围，再各向外留一个 f 的余量
+            vx0, vy0 = max(0, (cx - 1) * f), max(0, (cy - 1) * f)
+            vx1, vy1 = min(width, (cx + 2) * f + tw), min(height, (cy + 2) * f + th)
+            loc = self._match_full(roi[vy0:vy1, vx0:vx1], template)
+            if loc is not None:
+                return loc[0] + vx0, loc[1] + vy0
+        return None
+
+    def close(self):
+        """规则被永久移除时调用：停止检查，并不再计入帧提供者的使用方。"""
+        self.stop()
+        if self.frame_provider is not None:
+            with self.frame_provider._lock:
+                self.frame_provider.consumers -= 1
+            self.frame_provider = None
 
     def trigger_callback(self):
         if 'is_found' in self._callbacks:
-            self._callbacks['is_found']()
+            self._fire(self._callbacks['is_found'])
     
     @property
     def is_found(self):
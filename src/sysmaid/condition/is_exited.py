@@ -1,17 +1,17 @@
 import logging
-from ..maid import BaseWmiEvent
+from ..maid import BaseProcessEvent
 
 logger = logging.getLogger(__name__)
 
-class ExitedWatchdog(BaseWmiEvent):
+class ExitedWatchdog(BaseProcessEvent):
     def __init__(self, process_name):
-        super().__init__(name=process_name, event_type='__InstanceDeletionEvent')
+        super().__init__(name=process_name, event_type='exited')
 
     def is_exited(self, func):
         self._callbacks['is_exited'] = func
         return func
 
-    def handle_event(self, event):
+    def handle_event(self, name):
         logger.info(f"'{self.name}' has exited. Firing callback.")
         if 'is_exited' in self._callbacks:
-            self._callbacks['is_exited']()
\ No newline at end of file
+            self._fire(self._callbacks['is_exited'])
\ No newline at end of file
@@ -1,41 +1,34 @@
 import logging
-from ..maid import BaseWmiEvent
+from ..maid import BaseProcessEvent
+from ..backends import get_backend
 
 logger = logging.getLogger(__name__)
 
-class RunningWatchdog(BaseWmiEvent):
+class RunningWatchdog(BaseProcessEvent):
     def __init__(self, process_name):
-        super().__init__(name=process_name, event_type='__InstanceCreationEvent')
+        super().__init__(name=process_name, event_type='started')
         self._initial_check_done = False
 
-    def start(self):
+    def start(self, scheduler=None):
         # 在启动事件监听前，先做一次性检查
         # 这避免了重写_loop所带来的代码重复
         if not self._initial_check_done:
-            import pythoncom
-            import wmi
-            
-            pythoncom.CoInitialize()
-            try:
-                c = wmi.WMI()
-                existing_processes = c.Win32_Process(Name=self.name)
-                if existing_processes:
-                    logger.info(f"'{self.name}' is already running. Firing callback on start.")
-                    if 'is_running' in self._callbacks:
-                        self._callbacks['is_running']()
-            finally:
-                pythoncom.CoUninitialize()
+            existing_processes = get_backend().process_pids(self.name)
+            if existing_processes:
+                logger.info(f"'{self.name}' is already running. Firing callback on start.")
+                if 'is_running' in self._callbacks:
+                    self._fire(self._callbacks['is_running'])
 
             self._initial_check_done = True
         
         # 调用父类的start，启动标准的事件监听循环
-        super().start()
+        super().start(scheduler)
 
     def is_running(self, func):
         self._callbacks['is_running'] = func
         return func
 
-    def handle_event(self, event):
+    def handle_event(self, name):
         logger.info(f"'{self.name}' has started. Firing callback.")
         if 'is_running' in self._callbacks:
-            self._callbacks['is_running']()
\ No newline at end of file
+            self._fire(self._callbacks['is_running'])
\ No newline at end of file
@@ -1,70 +1,154 @@
-import time
-import psutil
+import math
 import logging
+import numpy as np
 from ..maid import HardwareWatchdog
+from ..sampler import _hardware_sampler, busy_since, MeanAggregate, PercentileAggregate, EwmaAggregate, CountAboveAggregate
 
 logger = logging.getLogger(__name__)
 
 class IsTooBusyWatchdog(HardwareWatchdog):
-    def __init__(self, hardware_name, over, duration):
+    """
+    硬件读数持续超过阈值时触发。支持的硬件与单位：
+    cpu / ram / swap / gpu 为占用率（%），disk / net 为吞吐量（字节每秒）。
+    不再自己阻塞采样，而是基于中央硬件采样器的环形缓冲区判断，
+    任意多个阈值组合共用同一轮 psutil 采样。
+
+    over 为列表时按分项比较：cpu 为各逻辑核心，disk 为 [读, 写]，net 为 [发送, 接收]，gpu 为各块 GPU。
+
+    aggregate 为 'all' 时要求 duration 内每个读数都超过阈值（原有语义）；
+    其余方式在 duration / interval 个读数的滑动窗口上聚合后再与阈值比较，
+    不会因为一次短暂回落而重置，也不会因为一次尖峰而开始计时。
+    """
+    AGGREGATES = ('all', 'mean', 'percentile', 'ewma', 'n_of_m')
+    NEAR_RATIO = 0.8  # 读数达到阈值的该比例即视为接近阈值，恢复按基础间隔轮询
+
+    def __init__(self, hardware_name, over, duration, aggregate='all', q=95, alpha=None, n=None):
         super().__init__(hardware_name)
-        if self.name.lower() != 'cpu':
-            raise ValueError("is_too_busy condition is currently only supported for 'CPU'")
-        
+        if aggregate not in self.AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{aggregate}'. Expected one of {self.AGGREGATES}.")
+        self.sampler = _hardware_sampler
+        metric = self.sampler.metric(self.name)
+
         self.percpu = isinstance(over, list)
         if self.percpu:
-            core_count = psutil.cpu_count()
-            if len(over) != core_count:
-                raise ValueError(f"The length of 'over' list ({len(over)}) must match the number of CPU cores ({core_count}).")
-            if not all(isinstance(x, int) for x in over):
-                raise ValueError("All elements in the 'over' list must be integers.")
+            part_count = metric.part_count()
+            if part_count == 0:
+                raise ValueError(f"'{self.name}' has no per-part readings; 'over' must be a single number.")
+            if part_count is not None and len(over) != part_count:
+                raise ValueError(f"The length of 'over' list ({len(over)}) must match the number of '{self.name}' parts ({part_count}).")
+            if not all(isinstance(x, (int, float)) for x in over):
+                raise ValueError("All elements in the 'over' list must be numbers.")
+            # -1 表示不关心该分项，换成无穷大后可以直接做向量比较
+            self._thresholds = np.array([np.inf if x == -1 else x for x in over], dtype=float)
+        else:
+            self._thresholds = np.array([over], dtype=float)
 
         self.over = over
         self.duration = duration
+        self.aggregate = aggregate
+        self.window = max(1, math.ceil(duration / self.base_interval))  # 滑动窗口的读数个数
+        self.n = self.window if n is None else n
+        if aggregate == 'n_of_m' and not 1 <= self.n <= self.window:
+            raise ValueError(f"n must be between 1 and the window size ({self.window}).")
+        self._aggregate = self._make_aggregate(q, alpha)
+        self._last_seen = float('-inf')  # 已经喂给聚合器的最新读数的时间戳
         self.busy_start_time = None
+        self._reset_at = float('-inf')  # 触发后只看之后的新读数，避免连续触发
         self._callbacks = []
 
+    def _make_aggregate(self, q, alpha):
+        width = len(self._thresholds)
+        if self.aggregate == 'mean':
+            return MeanAggregate(self.window, width)
+        elif self.aggregate == 'percentile':
+            return PercentileAggregate(self.window, width, q=q)
+        elif self.aggregate == 'ewma':
+            return EwmaAggregate(self.window, width, alpha=alpha)
+        elif self.aggregate == 'n_of_m':
+            return CountAboveAggregate(self.window, width, self._thresholds)
+        return None
+
+    def start(self, scheduler=None):
+        """注册到中央硬件采样器，由采样器统一采样后通知本规则。"""
+        if not self._is_running:
+            self._is_running = True
+            self._driver = self.sampler
+            self.sampler.register(self, window=self.duration)
+            self._thread = self.sampler.start(scheduler)
+
     def check_state(self):
-        # Currently, only CPU is implemented
-        if self.name != 'cpu':
+        if self._aggregate is not None:
+            self._check_aggregate()
+            return
+
+        timestamps, readings = self.sampler.since(self._reset_at, metric=self.name)
+        if not len(timestamps):
             return
-            
-        is_currently_busy = False
-        usages = psutil.cpu_percent(interval=self.interval, percpu=self.percpu)
-        
+        self._adapt(readings[-1])
+
         if self.percpu:
-            # When percpu is True, usages is a list of floats
-            if isinstance(usages, list):
-                for i, (usage, threshold) in enumerate(zip(usages, self.over)):
-                    if threshold != -1 and usage > threshold:
-                        is_currently_busy = True
-                        logger.debug(f"CPU core {i} usage {usage}% exceeded threshold {threshold}%.")
-                        break
-        else:
-            # When percpu is False, usages is a single float or int
-            usage = usages
-            if isinstance(usage, (float, int)) and usage > self.over:
-                is_currently_busy = True
-                logger.debug(f"Overall CPU usage {usage}% exceeded threshold {self.over}.")
-
-        if is_currently_busy:
-            if self.busy_start_time is None:
-                self.busy_start_time = time.time()
-                logger.debug(f"CPU busy condition met. Starting timer for {self.duration} seconds.")
-            elif time.time() - self.busy_start_time >= self.duration:
-                logger.info(f"CPU has been too busy for {self.duration} seconds. Triggering action.")
-                for callback in self._callbacks:
-                    callback()
-                # Reset after triggering to avoid continuous firing
-                self.busy_start_time = None
+            busy = (readings[:, 1:] > self._thresholds).any(axis=1)
         else:
+            busy = readings[:, 0] > self._thresholds[0]
+
+        start = busy_since(timestamps, busy)
+        if start is None:
             if self.busy_start_time is not None:
-                logger.debug("CPU usage fell below threshold(s). Resetting timer.")
+                logger.debug(f"{self.name.upper()} usage fell below threshold(s). Resetting timer.")
             self.busy_start_time = None
+            return
+
+        if self.busy_start_time is None:
+            logger.debug(f"{self.name.upper()} busy condition met. Starting timer for {self.duration} seconds.")
+        self.busy_start_time = start
+
+        if timestamps[-1] - self.busy_start_time >= self.duration:
+            logger.info(f"{self.name.upper()} has been too busy for {self.duration} seconds. Triggering action.")
+            for callback in self._callbacks:
+                self._fire(callback)
+            # Reset after triggering to avoid continuous firing
+            self._reset_at = timestamps[-1]
+            self.busy_start_time = None
+
+    def _check_aggregate(self):
+        timestamps, readings = self.sampler.since(self._last_seen, metric=self.name)
+        if not len(timestamps):
+            return
+        self._last_seen = timestamps[-1]
+        self._adapt(readings[-1])
+        columns = readings[:, 1:] if self.percpu else readings[:, :1]
+        for row in columns:
+            self._aggregate.update(row)
+
+        value = self._aggregate.value()
+        if value is None:
+            return
+        if self.aggregate == 'n_of_m':
+            busy = value >= self.n
+        else:
+            busy = value > self._thresholds
+        if busy.any():
+            logger.info(f"{self.name.upper()} {self.aggregate} over the last {self.window} samples exceeded the threshold(s). Triggering action.")
+            for callback in self._callbacks:
+                self._fire(callback)
+            # 触发后需要一个全新的窗口才会再次触发
+            self._aggregate.reset()
+
+    def _adapt(self, row):
+        """最新读数接近阈值时按基础间隔轮询，远低于阈值时放慢。"""
+        if self._aggregate is not None:
+            # 聚合窗口按读数个数（duration / base_interval）计算，放慢采样会让同样个数的读数
+            # 覆盖远长于 duration 的时间，因此使用聚合窗口的规则始终按基础间隔轮询
+            return
+        latest = row[1:] if self.percpu else row[:1]
+        if (latest >= self._thresholds * self.NEAR_RATIO).any():
+            self._snap_back()
+        else:
+            self._back_off()
 
     @property
     def is_too_busy(self):
         def decorator(func):
             self._callbacks.append(func)
             return func
-        return decorator
\ No newline at end of file
+        return decorator
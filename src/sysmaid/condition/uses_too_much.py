@@ -0,0 +1,69 @@
+import logging
+import numpy as np
+from ..maid import BaseWatchdog
+from ..sampler import _process_resource_sampler, busy_since
+
+logger = logging.getLogger(__name__)
+
+class UsesTooMuchWatchdog(BaseWatchdog):
+    """
+    进程（按映像名汇总所有 PID）的资源占用持续超过任一上限时触发。
+    读数来自中央进程资源采样器，任意多条规则共用同一次 process_iter 遍历。
+    """
+    NEAR_RATIO = 0.8  # 任一读数达到上限的该比例即视为接近上限，恢复按基础间隔轮询
+    def __init__(self, process_name, cpu=None, rss=None, handles=None, io=None, duration=10):
+        super().__init__(name=process_name)
+        limits = {'cpu': cpu, 'rss': rss, 'handles': handles, 'io': io}
+        if all(v is None for v in limits.values()):
+            raise ValueError("uses_too_much requires at least one of 'cpu', 'rss', 'handles' or 'io'.")
+        # 未指定的上限换成无穷大，之后可以直接做向量比较
+        self._limits = np.array([np.inf if limits[c] is None else limits[c]
+                                 for c in _process_resource_sampler.COLUMNS], dtype=float)
+        self.duration = duration
+        self.busy_start_time = None
+        self.sampler = _process_resource_sampler
+        self._reset_at = float('-inf')  # 触发后只看之后的新读数，避免连续触发
+        self._callbacks = []
+
+    def start(self, scheduler=None):
+        """注册到中央进程资源采样器，由采样器统一采样后通知本规则。"""
+        if not self._is_running:
+            self._is_running = True
+            self._driver = self.sampler
+            self.sampler.register(self, window=self.duration)
+            self._thread = self.sampler.start(scheduler)
+
+    def check_state(self):
+        timestamps, readings = self.sampler.since(self._reset_at, self.name)
+        if not len(timestamps):
+            return
+        if (readings[-1] >= self._limits * self.NEAR_RATIO).any():
+            self._snap_back()
+        else:
+            self._back_off()
+
+        start = busy_since(timestamps, (readings > self._limits).any(axis=1))
+        if start is None:
+            if self.busy_start_time is not None:
+                logger.debug(f"'{self.name}' resource usage fell below the limit(s). Resetting timer.")
+            self.busy_start_time = None
+            return
+
+        if self.busy_start_time is None:
+            logger.debug(f"'{self.name}' exceeded a resource limit. Starting timer for {self.duration} seconds.")
+        self.busy_start_time = start
+
+        if timestamps[-1] - self.busy_start_time >= self.duration:
+            over = [c for c, v, limit in zip(self.sampler.COLUMNS, readings[-1], self._limits) if v > limit]
+            logger.info(f"'{self.name}' has used too much {', '.join(over)} for {self.duration} seconds. Triggering action.")
+            for callback in self._callbacks:
+                self._fire(callback)
+            self._reset_at = timestamps[-1]
+            self.busy_start_time = None
+
+    @property
+    def uses_too_much(self):
+        def decorator(func):
+            self._callbacks.append(func)
+            return func
+        return decorator
@@ -0,0 +1,276 @@
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+class _PendingAction:
+    __slots__ = ('func', 'args', 'key', 'batch', 'enqueued')
+
+    def __init__(self, func, args, key, batch=None):
+        self.func = func
+        self.args = args
+        self.key = key
+        self.batch = batch  # 批次键；批次动作不计入队列上限，也不会被溢出策略丢弃
+        self.enqueued = time.perf_counter()
+
+class _Batch:
+    __slots__ = ('func', 'options', 'futures')
+
+    def __init__(self, func, options):
+        self.func = func
+        self.options = options
+        self.futures = {}  # 条目 -> 等待该条目结果的 Future 列表
+
+class ActionDispatcher:
+    """
+    有界的动作队列 + 工作线程池。
+    检测线程只负责把触发的动作放进队列，慢动作（例如 lock_volume 的重试、
+    taskkill 子进程）由工作线程执行，从而把检测延迟与动作延迟解耦。
+
+    Args:
+        workers (int): 工作线程数。
+        maxsize (int): 队列中最多等待的动作数。
+        overflow (str): 队列满时的策略：
+            'drop_oldest' 丢弃最早排队的动作；'drop_new' 丢弃新动作；
+            'block' 阻塞提交方直到有空位（在工作线程中提交时改为直接执行，避免死锁）；
+            'inline' 在提交方线程里直接执行。
+    """
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_new', 'block', 'inline')
+
+    def __init__(self, workers=4, maxsize=1000, overflow='drop_oldest'):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Expected one of {self.OVERFLOW_POLICIES}.")
+        self.workers = workers
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._queue = collections.deque()
+        self._pending = {}  # 合并键 -> 仍在排队的动作
+        self._batches = {}  # (批量函数, 参数) -> 尚未执行的批次
+        self._queued_batches = 0  # 队列中的批次动作数
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._shutdown = False  # 为 True 时工作线程在队列清空后退出
+        self._active = 0
+        self._submitted = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._completed = 0
+        self._failed = 0
+        self._batched = 0
+        self._batch_runs = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def submit(self, func, *args, key=None):
+        """
+        把一个动作放入队列。
+
+        Args:
+            func (callable): 要执行的动作。
+            *args: 传给动作的参数。
+            key (hashable, optional): 合并键。同一个键的动作还在排队时，新的提交会被合并掉。
+
+        Returns:
+            bool: 动作是否被接受（合并或丢弃时为 False）。
+        """
+        item = _PendingAction(func, args, key)
+        inline = False
+        with self._cond:
+            if key is not None and key in self._pending:
+                self._coalesced += 1
+                return False
+            if self._full():
+                if self.overflow == 'drop_new':
+                    self._dropped += 1
+                    logger.warning(f"Action queue is full ({self.maxsize}). Dropping new action {func!r}.")
+                    return False
+                elif self.overflow == 'drop_oldest':
+                    oldest = self._evict_oldest()
+                    self._dropped += 1
+                    logger.warning(f"Action queue is full ({self.maxsize}). Dropping oldest action {oldest.func!r}.")
+                elif self.overflow == 'block' and not self.in_worker():
+                    while self._full():
+                        self._cond.wait()
+                else:
+                    # 工作线程在 'block' 下等待空位可能永远等不到（所有工作线程都在等），直接执行
+                    inline = True
+            self._submitted += 1
+            if not inline:
+                self._queue.append(item)
+                if key is not None:
+                    self._pending[key] = item
+                self._ensure_workers()
+                self._cond.notify_all()
+        if inline:
+            self._run(item)
+        return True
+
+    def _full(self):
+        return len(self._queue) - self._queued_batches >= self.maxsize
+
+    def _evict_oldest(self):
+        # 跳过批次动作：丢掉它会让 _batches 中的批次永远不再排队，后续 batch() 的 Future 也永远不会完成。
+        # 队列满时普通动作至少有 maxsize 个，所以一定能找到
+        for index, item in enumerate(self._queue):
+            if item.batch is None:
+                del self._queue[index]
+                if item.key is not None:
+                    self._pending.pop(item.key, None)
+                return item
+
+    def batch(self, func, item, **options):
+        """
+        把一个条目（例如进程名）加入 func 的待执行批次。
+        同一 (func, options) 的第一个条目会把批次作为一个动作排到队尾，
+        在它执行之前加入的条目（通常是同一 tick 触发的其它回调）都会合并成一次 func(条目列表, **options) 调用。
+
+        Args:
+            func (callable): 批量函数，接收条目列表，返回 {条目: 结果} 的字典。
+            item (hashable): 本次要处理的条目，重复的条目只处理一次。
+
+        Returns:
+            concurrent.futures.Future: 批次执行后得到该条目的结果。
+        """
+        key = (func, tuple(sorted(options.items())))
+        future = Future()
+        with self._cond:
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(func, options)
+                # 批次不计入队列上限，也不会被 drop_oldest 丢弃，否则整批动作会一起丢失
+                self._queue.append(_PendingAction(self._run_batch, (key,), None, batch=key))
+                self._queued_batches += 1
+                self._submitted += 1
+                self._ensure_workers()
+                self._cond.notify_all()
+            batch.futures.setdefault(item, []).append(future)
+            self._batched += 1
+        return future
+
+    def _run_batch(self, key):
+        with self._cond:
+            batch = self._batches.pop(key)
+            self._batch_runs += 1
+        items = list(batch.futures)
+        try:
+            results = batch.func(items, **batch.options)
+        except Exception as e:
+            for futures in batch.futures.values():
+                for future in futures:
+                    future.set_exception(e)
+            raise
+        for item, futures in batch.futures.items():
+            for future in futures:
+                future.set_result(results.get(item))
+
+    def in_worker(self):
+        """当前线程是否是本分发器的工作线程。"""
+        return getattr(self._local, 'is_worker', False)
+
+    def _ensure_workers(self):
+        # 按需启动工作线程，直到达到上限
+        self._threads = [t for t in self._threads if t.is_alive()]
+        if len(self._threads) < self.workers and len(self._queue) > len(self._threads) - self._active:
+            thread = threading.Thread(target=self._worker, name=f'sysmaid-action-{len(self._threads)}')
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        self._local.is_worker = True
+        while True:
+            with self._cond:
+                while not self._queue:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                item = self._queue.popleft()
+                # 出队即不再参与合并：执行期间的新触发需要再执行一次
+                if item.key is not None:
+                    self._pending.pop(item.key, None)
+                if item.batch is not None:
+                    self._queued_batches -= 1
+                self._active += 1
+                self._cond.notify_all()
+            try:
+                self._run(item)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _run(self, item):
+        started = time.perf_counter()
+        try:
+            item.func(*item.args)
+        except Exception as e:
+            with self._cond:
+                self._failed += 1
+            logger.error(f"Action {item.func!r} failed: {e}", exc_info=True)
+        finally:
+            finished = time.perf_counter()
+            wait, latency = started - item.enqueued, finished - item.enqueued
+            with self._cond:
+                self._completed += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+
+    def join(self, timeout=None):
+        """等待队列清空且没有正在执行的动作。返回是否在超时前完成。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=None):
+        """
+        等待队列清空后让工作线程退出，并等待它们结束。可以在工作线程中调用（不会等待自己）。
+        返回是否在超时前完成。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = self.join(timeout)
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        current = threading.current_thread()
+        for thread in threads:
+            if thread is not current:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return drained and not any(t.is_alive() for t in threads if t is not current)
+
+    def stats(self):
+        """返回队列深度、吞吐与延迟（秒）的快照。"""
+        with self._cond:
+            done = self._completed or 1
+            return {
+                'depth': len(self._queue),
+                'active': self._active,
+                'submitted': self._submitted,
+                'coalesced': self._coalesced,
+                'dropped': self._dropped,
+                'completed': self._completed,
+                'failed': self._failed,
+                'batched': self._batched,
+                'batch_runs': self._batch_runs,
+                'queue_wait_avg': self._wait_total / done,
+                'queue_wait_max': self._wait_max,
+                'latency_avg': self._latency_total / done,
+                'latency_max': self._latency_max,
+            }
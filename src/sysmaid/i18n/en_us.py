@@ -3,6 +3,7 @@ translations = {
   "init.admin.error.title": "Permission Error",
   "init.admin.error.message": "SysMaid requires administrator privileges to run properly.",
   "init.admin.skip.message": "CI mode activated: UAC check is bypassed. If you are a regular user, please stop and check your environment variables.",
+  "init.admin.warning.message": "SysMaid is not running as root. Killing other users' processes and stopping services may fail.",
   "get_top_processes.result.header": "Top {count} CPU-consuming processes:",
   "get_top_processes.result.item": "  - PID: {pid}, Name: {name}, CPU: {cpu}%",
   "get_top_processes.result.item.error": "  - PID: {pid}, Name: {name}, CPU: N/A (process has exited)",
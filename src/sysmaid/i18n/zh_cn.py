@@ -3,6 +3,7 @@ translations = {
   "init.admin.error.title": "权限错误",
   "init.admin.error.message": "SysMaid 需要管理员权限才能正常运行。",
   "init.admin.skip.message": "已进入CI模式：UAC检查已被跳过。如果您是普通用户，请立即停止并检查您的环境变量。",
+  "init.admin.warning.message": "SysMaid 没有以 root 身份运行，终止其他用户的进程和停止服务可能会失败。",
   "get_top_processes.result.header": "消耗CPU资源最多的 {count} 个进程：",
   "get_top_processes.result.item": "  - PID: {pid}, 名称: {name}, CPU: {cpu}%",
   "get_top_processes.result.item.error": "  - PID: {pid}, 名称: {name}, CPU: N/A (进程已退出)",
@@ -1,15 +1,17 @@
+import contextlib
+import inspect
 import logging
+import sys
 import threading
-import pythoncom
-import wmi
 import time
-import win32gui
-import win32process
+from concurrent.futures import Future
 from typing import overload, Literal
-import pywintypes
+from .backends import get_backend
+from .metrics import _metrics, PrometheusFileWriter, write_prometheus
+from .polling import _polling_config, back_off, due, next_interval, all_paused, announce_exit, is_serving, _lifecycle
 
 @overload
-def attend(name: Literal['cpu', 'ram', 'gpu', 'CPU', 'RAM', 'GPU', 'Screen']) -> 'HardwareWatcher': ... # type: ignore
+def attend(name: Literal['cpu', 'ram', 'swap', 'disk', 'net', 'gpu', 'CPU', 'RAM', 'SWAP', 'DISK', 'NET', 'GPU', 'Screen']) -> 'HardwareWatcher': ... # type: ignore
 @overload
 def attend(name: str) -> 'ProcessWatcher': ...
 
@@ -18,37 +20,263 @@ logger = logging.getLogger(__name__)
 # 全局的 watchdog 列表，为统一Start做准备
 _watchdogs = []
 
-HARDWARE_KEYWORDS = ['cpu', 'ram', 'gpu', 'CPU', 'RAM', 'GPU', 'Screen']
+HARDWARE_KEYWORDS = ['cpu', 'ram', 'swap', 'disk', 'net', 'gpu', 'CPU', 'RAM', 'SWAP', 'DISK', 'NET', 'GPU', 'Screen']
+
+# start_async() 运行期间的事件循环，协程回调会被调度到这里 await
+_event_loop = None
+
+# start()/start_async() 运行期间的动作分发器，触发的回调交给它在工作线程中执行
+_dispatcher = None
+# 当前 start() / start_async() 使用的调度器，stop() 需要关闭它
+_scheduler = None
+# stop() 被调用后置位，阻塞中的 start() 随之返回
+_stop_event = threading.Event()
+_action_config = {'workers': 4, 'maxsize': 1000, 'overflow': 'drop_oldest'}
+
+# start()/start_async() 运行期间定期写出 Prometheus 指标文件的线程
+_metrics_writer = None
+_metrics_config = {'prometheus_file': None, 'interval': 15}
+
+def configure_actions(workers: int = 4, maxsize: int = 1000,
+                      overflow: Literal['drop_oldest', 'drop_new', 'block', 'inline'] = 'drop_oldest'):
+    """
+    配置动作分发器，需在 start() 之前调用。
+
+    Args:
+        workers (int, optional): 执行回调的工作线程数。为 0 时回调在检测线程中同步执行。
+        maxsize (int, optional): 队列中最多等待的动作数。
+        overflow (str, optional): 队列满时的策略，见 ActionDispatcher。
+    """
+    from .dispatcher import ActionDispatcher
+    if overflow not in ActionDispatcher.OVERFLOW_POLICIES:
+        raise ValueError(f"Unknown overflow policy '{overflow}'. Expected one of {ActionDispatcher.OVERFLOW_POLICIES}.")
+    _action_config.update(workers=workers, maxsize=maxsize, overflow=overflow)
+
+def _start_dispatcher():
+    global _dispatcher
+    if _dispatcher is None and _action_config['workers'] > 0:
+        from .dispatcher import ActionDispatcher
+        _dispatcher = ActionDispatcher(**_action_config)
+
+def _stop_dispatcher(timeout=5):
+    """等待排队中的动作执行完毕后停用分发器，并等待它的工作线程退出。"""
+    global _dispatcher
+    dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None and not dispatcher.shutdown(timeout):
+        logger.warning(f"Action queue did not drain within {timeout} seconds; pending actions are abandoned.")
+
+def action_stats():
+    """返回动作分发器的队列深度与动作延迟统计；未启用分发器时返回空字典。"""
+    return _dispatcher.stats() if _dispatcher is not None else {}
+
+def configure_polling(adaptive: bool = False, max_interval: float = 10, backoff: float = 2):
+    """
+    配置自适应轮询，需在 start() 之前调用。默认关闭，所有规则按固定间隔轮询。
+    被关注的状态保持稳定时（例如进程不存在、CPU 远低于阈值、画面没有变化），规则的轮询间隔
+    在每次检查后按 backoff 倍数放慢，最长为 max_interval；状态向触发条件靠近时立即恢复到配置的间隔。
+
+    Args:
+        adaptive (bool, optional): 是否启用自适应轮询。放慢期间状态变化最多推迟 max_interval 秒才被发现，
+            对触发延迟敏感的条件（例如 has_no_window）有各自更低的上限。默认为 False。
+        max_interval (float, optional): 放慢后的最长间隔（秒）。默认为 10。
+        backoff (float, optional): 每次放慢的倍数。默认为 2。
+    """
+    if backoff < 1:
+        raise ValueError("backoff must be at least 1.")
+    _polling_config.update(adaptive=adaptive, max_interval=max_interval, backoff=backoff)
+
+def configure_metrics(enabled: bool = True, prometheus_file: str = None, interval: float = 15):
+    """
+    配置热路径指标，需在 start() 之前调用。
+
+    Args:
+        enabled (bool, optional): 是否记录每条规则的检查耗时、调用开销、触发与回调延迟。默认为 True。
+        prometheus_file (str, optional): 运行期间每隔 interval 秒把指标以 Prometheus 文本格式写入该文件，
+            可交给 node_exporter 的 textfile 收集器读取。默认不写文件。
+        interval (float, optional): 写文件的间隔（秒）。默认为 15。
+    """
+    _metrics.enabled = enabled
+    _metrics_config.update(prometheus_file=prometheus_file, interval=interval)
+
+def stats():
+    """
+    返回所有指标的快照：每条规则（及中央采样器）的检查耗时直方图、错过节拍次数、
+    触发次数、回调延迟与外部调用开销，以及动作分发器、WMI 连接池和各采样器的计数。
+    """
+    snapshot = _metrics.snapshot()
+    snapshot['actions'] = action_stats()
+    from .wmi_pool import _wmi_pool
+    snapshot['wmi_pool'] = _wmi_pool.stats()
+    samplers = {
+        'process_enumerations': _process_sampler.enumerations,
+        'window_walks': _window_index.walks,
+    }
+    # 只读取已经加载的模块，避免为了统计而导入 NumPy / OpenCV
+    sampler = sys.modules.get(f'{__package__}.sampler')
+    if sampler is not None:
+        samplers['hardware_ticks'] = sampler._hardware_sampler.ticks
+        samplers['process_resource_ticks'] = sampler._process_resource_sampler.ticks
+        samplers['process_cache_refreshes'] = sampler._process_cache.refreshes
+    screen = sys.modules.get(f'{__package__}.condition.has_windows_look_like')
+    if screen is not None:
+        samplers['screen_captures'] = screen._frame_provider.captures
+    snapshot['samplers'] = samplers
+    return snapshot
+
+def write_metrics(path: str):
+    """立即把 stats() 的快照以 Prometheus 文本格式写入 path。"""
+    write_prometheus(path, stats())
+
+def _start_metrics_writer():
+    global _metrics_writer
+    if _metrics_writer is None and _metrics_config['prometheus_file']:
+        _metrics_writer = PrometheusFileWriter(_metrics_config['prometheus_file'], stats, _metrics_config['interval'])
+        _metrics_writer.start()
+
+def _stop_metrics_writer():
+    global _metrics_writer
+    writer, _metrics_writer = _metrics_writer, None
+    if writer is not None:
+        writer.stop()
+
+def invoke_callback(func, *args, key=None, rule=None):
+    """
+    触发用户注册的回调。
+    分发器运行时，回调进入有界队列由工作线程执行，同一 key 仍在排队的回调会被合并；
+    否则直接在当前线程执行。
+
+    Args:
+        func (callable): 回调函数，可以是协程函数。
+        key (hashable, optional): 合并键，通常为 (回调, 规则目标)。
+        rule (optional): 触发回调的规则，用于记录触发次数和回调延迟。
+    """
+    if rule is not None:
+        args = (rule, _metrics.record_trigger(rule), func) + args
+        func = _run_rule_callback
+    dispatcher = _dispatcher
+    if dispatcher is not None:
+        dispatcher.submit(_run_callback, func, *args, key=key)
+    else:
+        _run_callback(func, *args)
+
+def _run_rule_callback(rule, fired_at, func, *args):
+    try:
+        _run_callback(func, *args)
+    finally:
+        _metrics.record_callback(rule, fired_at)
+
+def submit_batched(func, item, batch=True, **options):
+    """
+    执行批量动作中的一个条目。动作在分发器的工作线程里（即某个回调中）被调用时，
+    把同一 tick 内的同类动作合并成一次批量调用；否则（或 batch 为 False 时）立即执行 func([item])。
+
+    Args:
+        func (callable): 批量函数，接收条目列表，返回 {条目: 结果}。
+        item (hashable): 本次调用要处理的条目。
+        batch (bool, optional): 为 False 时总是立即执行。
+
+    Returns:
+        Future: 该条目结果的 Future。立即执行时返回的 Future 已经完成，调用方在任何线程里拿到的都是同一种类型。
+    """
+    dispatcher = _dispatcher
+    if batch and dispatcher is not None and dispatcher.in_worker():
+        return dispatcher.batch(func, item, **options)
+    future = Future()
+    future.set_result(func([item], **options).get(item))
+    return future
+
+def _run_callback(func, *args):
+    """
+    普通函数直接调用；协程函数在 start_async() 的事件循环上被 await，
+    若没有运行中的事件循环，则在当前线程里用 asyncio.run 执行完毕。
+    """
+    result = func(*args)
+    if inspect.iscoroutine(result):
+        import asyncio
+        loop = _event_loop
+        if loop is not None and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(result, loop)
+            future.add_done_callback(_log_callback_error)
+        else:
+            asyncio.run(result)
+
+def _log_callback_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Coroutine callback failed: {future.exception()}", exc_info=future.exception())
 
 class BaseWatchdog:
     """
     所有 Watchdog 的基类，处理通用的线程管理和事件循环。
     """
+    MAX_INTERVAL = None  # 自适应轮询时本条件允许放慢到的最长间隔（秒），None 表示沿用 max_interval
+
     def __init__(self, name):
         self.name = name
         self.interval = 1 # 默认轮询间隔（秒）
+        self._next_check = 0.0  # 由中央采样器驱动时，下一次需要检查的时刻（monotonic）
         self._callbacks = {}
         self._thread = None
+        self._driver = None  # 驱动本规则的调度器或中央采样器，恢复时需要唤醒它
         self._is_running = False
         self._is_paused = False  # 新增：员工的暂停状态
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._stopped = threading.Event()  # 轮询间隔的等待落在它上面，stop() 可以立即打断
         _watchdogs.append(self)
 
+    @property
+    def interval(self):
+        """当前的轮询间隔（秒）。自适应轮询时在 base_interval 与 max_interval 之间变化。"""
+        return self._interval
+
+    @interval.setter
+    def interval(self, value):
+        # 用户或子类设置的间隔就是基础间隔
+        self.base_interval = self._interval = value
+
+    def _back_off(self):
+        """被关注的状态保持稳定，放慢一级轮询。"""
+        self._interval = back_off(self._interval, self.base_interval, self.MAX_INTERVAL)
+
+    def _snap_back(self):
+        """状态正在向触发条件靠近，立即恢复到基础间隔。"""
+        self._interval = self.base_interval
+
     def pause(self):
         """暂停工作循环。"""
+        self._resumed.clear()
         self._is_paused = True
 
     def resume(self):
-        """恢复工作循环。"""
+        """恢复工作循环，并立即唤醒阻塞中的线程或调度器。"""
         self._is_paused = False
+        self._resumed.set()
+        driver = self._driver
+        if driver is not None:
+            driver.wake(self)
+
+    def stop(self):
+        """停止本规则。阻塞在轮询间隔或暂停中的线程、调度器和采样器会被立即唤醒。"""
+        self._is_running = False
+        self._stopped.set()
+        self._resumed.set()
+        driver = self._driver
+        if driver is not None:
+            driver.wake(self)
+
+    def _fire(self, callback):
+        """通过动作分发器触发回调；同一规则的同一回调仍在排队时会被合并。"""
+        invoke_callback(callback, key=(callback, self.name), rule=self)
 
     def _check_and_wait(self):
         """封装了暂停检查、任务执行和等待的原子操作。"""
         if self._is_paused:
-            time.sleep(1)  # 在暂停时休眠，以降低CPU使用率
+            # 暂停期间阻塞在事件上，直到 resume()，不再每秒醒来一次
+            self._resumed.wait()
             return
 
-        self.check_state()
-        time.sleep(self.interval)
+        _metrics.run_check(self)
+        self._stopped.wait(self.interval)
 
     def _loop(self):
         """每个watchdog自己的轮询循环（模板方法）。"""
@@ -60,10 +288,21 @@ class BaseWatchdog:
             logger.critical(f"Watchdog thread for '{self.name}' has crashed: {e}", exc_info=True)
         finally:
             logger.info(f"Watchdog thread for '{self.name}' is shutting down.")
+            announce_exit()
 
-    def start(self):
+    def start(self, scheduler=None):
+        """
+        Args:
+            scheduler (PoolScheduler, optional): 为 None 时沿用每条规则一个守护线程的模型；
+                否则交由调度器的线程池按 interval 执行。
+        """
         if not self._is_running:
             self._is_running = True
+            self._stopped.clear()
+            if scheduler is not None:
+                self._driver = scheduler
+                self._thread = scheduler.add(self)
+                return
             self._thread = threading.Thread(target=self._loop)
             self._thread.daemon = True
             self._thread.start()
@@ -75,52 +314,264 @@ class ProcessWatchdog(BaseWatchdog):
     """专门用于监控进程状态的 Watchdog"""
     def __init__(self, process_name):
         super().__init__(name=process_name)
-    
-    def _loop(self):
+
+    def start(self, scheduler=None):
         """
-        为进程监控定制的循环，在基类循环的基础上增加了WMI初始化和反初始化。
+        进程类 watchdog 不再各自开线程轮询，而是注册到中央进程采样器，
+        由采样器统一拍摄进程表快照后分发。
         """
-        try:
-            pythoncom.CoInitialize()
-            self.c = wmi.WMI()
-            logger.info(f"Process watchdog for '{self.name}' started polling with WMI in thread {threading.get_ident()}.")
-            
-            # 调用基类的循环模板
-            super()._loop()
-
-        except Exception as e:
-            logger.critical(f"Watchdog thread for '{self.name}' has crashed: {e}", exc_info=True)
-        finally:
-            logger.info(f"Watchdog thread for '{self.name}' is shutting down.")
-            pythoncom.CoUninitialize()
+        if not self._is_running:
+            self._is_running = True
+            self._driver = _process_sampler
+            _process_sampler.register(self)
+            self._thread = _process_sampler.start(scheduler)
 
-    def check_state(self):
+    def check_state(self, snapshot=None):
         """
         覆盖基类方法，加入进程特有的窗口信息获取，
         然后调用子类（如NoWindowWatchdog）的最终实现。
+
+        Args:
+            snapshot (ProcessSnapshot, optional): 中央采样器本 tick 拍摄的进程表快照。
+                同一快照代内的所有规则共享同一份窗口索引。
         """
-        pids_with_windows = set()
-        def enum_windows_callback(hwnd, _):
-            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
-                _, found_pid = win32process.GetWindowThreadProcessId(hwnd)
-                pids_with_windows.add(found_pid)
-        win32gui.EnumWindows(enum_windows_callback, None)
-        
+        generation = snapshot.generation if snapshot is not None else None
+        pids_with_windows = _window_index.get(generation)
+
+        pids = snapshot.pids(self.name) if snapshot is not None else None
         # 调用真正的检查逻辑，这个方法将在NoWindowWatchdog等子类中实现
-        self.check_process_state(pids_with_windows)
+        self.check_process_state(pids_with_windows, pids)
 
-    def check_process_state(self, pids_with_windows):
+    def check_process_state(self, pids_with_windows, pids=None):
         raise NotImplementedError("This method should be implemented by specific process condition subclasses.")
 
-class BaseWmiEvent:
+class ProcessSnapshot:
+    """
+    某一时刻的进程表快照：映像名（小写）-> PID 集合，以及父 PID -> 子 PID 列表。
+    """
+    _EMPTY = frozenset()
+
+    def __init__(self, by_name, generation, children=None):
+        self.by_name = by_name
+        self.generation = generation
+        self.children = children if children is not None else {}
+        self.timestamp = time.time()
+
+    def pids(self, name):
+        # Windows 的映像名不区分大小写，与 WMI 的 Name= 查询保持一致
+        return self.by_name.get(name.lower(), self._EMPTY)
+
+    def tree(self, name):
+        """返回指定映像名的所有进程及其全部后代的 PID（父进程在前）。"""
+        result = []
+        seen = set()
+        pending = list(self.pids(name))
+        while pending:
+            pid = pending.pop(0)
+            if pid in seen:
+                continue
+            seen.add(pid)
+            result.append(pid)
+            pending.extend(self.children.get(pid, ()))
+        return result
+
+class WindowIndex:
+    """
+    PID -> 可见窗口数量 的索引。
+    每一代（generation）只遍历一次桌面窗口，同一 tick 内调度的规则直接复用。
+    """
+    def __init__(self):
+        self.generation = None
+        self.walks = 0  # 累计的 EnumWindows 遍历次数
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, generation=None):
+        """
+        返回指定代的索引。generation 为 None 时（未经采样器调度）总是重新遍历。
+        返回的字典在下一代到来后不会再被修改，调用方可以放心持有。
+        """
+        with self._lock:
+            if generation is None or generation != self.generation:
+                self._counts = self._walk()
+                self.generation = generation
+                self.walks += 1
+            return self._counts
+
+    def _walk(self):
+        start = time.perf_counter()
+        try:
+            return get_backend().window_counts()
+        finally:
+            _metrics.record_call('window_enumeration', time.perf_counter() - start)
+
+_window_index = WindowIndex()
+
+class ProcessSampler:
+    """
+    中央进程采样器。每个 tick 只枚举一次进程表（Windows 上是一次 WMI 往返），
+    然后把同一份快照分发给所有已注册 ProcessWatchdog 的 check_state。
+
+    已经放慢轮询的规则只在到期时检查；所有规则都放慢时，采样器自己的间隔也随之拉长。
+    """
+    def __init__(self):
+        self.interval = 1
+        self.base_interval = 1  # 各规则基础间隔中最短的一个
+        self.generation = 0
+        self.enumerations = 0  # 累计的进程表枚举次数，供基准测试观察
+        self._dogs = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._scheduler = None
+        self.last_snapshot = None  # 最近一次拍摄的快照，供 kill_process 等动作复用
+
+    @property
+    def name(self):
+        return 'process sampler'
+
+    @property
+    def _is_running(self):
+        """调度器接口：只要还有一条已启动的规则，采样器就继续工作。"""
+        with self._lock:
+            return any(d._is_running for d in self._dogs)
+
+    @property
+    def _is_paused(self):
+        """调度器接口：所有已启动的规则都暂停时采样器也暂停，直到其中一条恢复。"""
+        with self._lock:
+            return all_paused(self._dogs)
+
+    def register(self, dog):
+        with self._lock:
+            if dog not in self._dogs:
+                self._dogs.append(dog)
+                self.interval = self.base_interval = min(d.base_interval for d in self._dogs)
+        self.wake(dog)
+
+    def wake(self, dog=None):
+        """有规则恢复或新加入时立即唤醒采样器，不必等到当前间隔结束。"""
+        self._wakeup.set()
+        scheduler = self._scheduler
+        if scheduler is not None:
+            scheduler.wake(self)
+
+    def unregister(self, dog):
+        with self._lock:
+            if dog in self._dogs:
+                self._dogs.remove(dog)
+                if self._dogs:
+                    # 移除的可能正是间隔最短的规则，按剩余规则重新计算
+                    self.interval = self.base_interval = min(d.base_interval for d in self._dogs)
+
+    def take_snapshot(self):
+        """一次性枚举整个进程表，按映像名建立 PID 索引，并按父进程建立子进程索引。"""
+        by_name = {}
+        children = {}
+        start = time.perf_counter()
+        processes = get_backend().list_processes()
+        _metrics.record_call('process_enumeration', time.perf_counter() - start)
+        for pid, ppid, name in processes:
+            if name:
+                by_name.setdefault(name.lower(), set()).add(pid)
+            children.setdefault(ppid, []).append(pid)
+        self.enumerations += 1
+        self.generation += 1
+        self.last_snapshot = ProcessSnapshot(by_name, self.generation, children)
+        return self.last_snapshot
+
+    def tick(self):
+        """拍摄一次快照并分发给所有处于工作状态且已到期的 watchdog。"""
+        now = time.monotonic()
+        with self._lock:
+            dogs = due(self._dogs, now)
+        if not dogs:
+            self._reschedule(now)
+            return None
+
+        backend = get_backend()
+        try:
+            snapshot = self.take_snapshot()
+        except backend.errors as e:
+            logger.error(f"Process enumeration failed: {e}")
+            backend.invalidate()  # 下一个 tick 重新连接
+            return None
+
+        for dog in dogs:
+            try:
+                _metrics.run_check(dog, snapshot)
+            except Exception as e:
+                # 单条规则的异常不应影响同一 tick 内的其它规则
+                logger.error(f"Watchdog for '{dog.name}' failed during check: {e}", exc_info=True)
+            dog._next_check = now + dog.interval
+        self._reschedule(now)
+        return snapshot
+
+    def _reschedule(self, now):
+        with self._lock:
+            self.interval = next_interval(self._dogs, now, self.base_interval)
+
+    def check_state(self):
+        """调度器接口，等同于 tick()。"""
+        self.tick()
+
+    def _loop(self):
+        logger.info(f"Process sampler started in thread {threading.get_ident()}.")
+        try:
+            while True:
+                with self._lock:
+                    if not any(d._is_running for d in self._dogs):
+                        self._thread = None
+                        break
+                self._wakeup.clear()
+                if self._is_paused:
+                    self._wakeup.wait()
+                    continue
+                _metrics.run_check(self)
+                self._wakeup.wait(self.interval)
+        except Exception as e:
+            logger.critical(f"Process sampler has crashed: {e}", exc_info=True)
+            with self._lock:
+                self._thread = None
+        finally:
+            logger.info("Process sampler is shutting down.")
+            get_backend().release_thread()
+            announce_exit()
+
+    def start(self, scheduler=None):
+        """
+        确保采样器在运行，并返回承载它的线程。
+
+        Args:
+            scheduler (PoolScheduler, optional): 为 None 时使用独立的采样线程，
+                否则把采样器作为一个调度单元交给调度器。
+        """
+        if scheduler is not None:
+            with self._lock:
+                if self._scheduler is scheduler:
+                    return scheduler._thread
+                self._scheduler = scheduler
+            return scheduler.add(self)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._thread
+
+_process_sampler = ProcessSampler()
+
+class BaseProcessEvent:
+    """
+    由进程事件（启动 / 退出）驱动的规则的基类，事件来自平台后端的订阅。
+    """
     def __init__(self, name, event_type):
         self.name = name
-        self.event_type = event_type
+        self.event_type = event_type  # 'started' 或 'exited'
         self._callbacks = {}
         self._thread = None
         self._is_running = False
         self._is_paused = False # 新增：员工的暂停状态
-        self.query = self._build_query()
         _watchdogs.append(self)
 
     def pause(self):
@@ -131,47 +582,153 @@ class BaseWmiEvent:
         """恢复工作循环。"""
         self._is_paused = False
 
-    def _build_query(self):
-        """构建 WMI 事件查询语句。"""
-        return (f"SELECT * FROM {self.event_type} "
-                f"WITHIN 2 WHERE TargetInstance ISA 'Win32_Process' "
-                f"AND TargetInstance.Name = '{self.name}'")
+    def stop(self):
+        """停止本规则，并把它从统一订阅中移除。"""
+        self._is_running = False
+        multiplexer = _get_event_multiplexer(self.event_type)
+        multiplexer.remove(self)
+        multiplexer.wake()
+
+    def _fire(self, callback):
+        """通过动作分发器触发回调；同一规则的同一回调仍在排队时会被合并。"""
+        invoke_callback(callback, key=(callback, self.name), rule=self)
+
+    def start(self, scheduler=None):
+        """
+        不再各自订阅进程事件，而是把进程名加入同类事件的统一订阅中。
+        统一订阅的线程数是常量，因此不占用调度器的线程池。
+        """
+        if not self._is_running:
+            self._is_running = True
+            multiplexer = _get_event_multiplexer(self.event_type)
+            multiplexer.add(self)
+            self._thread = multiplexer.start()
+
+    def handle_event(self, name):
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+class ProcessEventMultiplexer:
+    """
+    某一类进程事件（'started' / 'exited'）的统一订阅。
+    所有被关注的进程名合并进同一个后端订阅（Windows 上是分组的 OR 查询），由一个线程接收事件，
+    再按进程名分发给对应的 watchdog。订阅数和线程数与关注的进程数量无关。
+    进程名变化时就地更新订阅，只重建受影响的查询，其余查询上的事件不会丢失。
+    """
+    def __init__(self, event_type):
+        self.event_type = event_type
+        self.subscriptions = 0  # 累计建立订阅的次数（不含就地更新）
+        self._dogs = {}  # 进程名（小写）-> [BaseProcessEvent]
+        self._dirty = False  # 进程名集合变化后，需要更新订阅
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()  # 打断订阅出错后的重连等待
+        self._thread = None
+
+    def add(self, dog):
+        """加入一个 watchdog；出现新的进程名时更新本类事件的订阅。"""
+        key = dog.name.lower()
+        with self._lock:
+            dogs = self._dogs.setdefault(key, [])
+            if dog not in dogs:
+                dogs.append(dog)
+                self._dirty = self._dirty or len(dogs) == 1
+
+    def remove(self, dog):
+        """移除一个 watchdog；进程名不再被关注时从订阅中去掉。"""
+        key = dog.name.lower()
+        with self._lock:
+            dogs = self._dogs.get(key)
+            if dogs and dog in dogs:
+                dogs.remove(dog)
+                if not dogs:
+                    del self._dogs[key]
+                    self._dirty = True
+
+    def wake(self):
+        """打断订阅线程的等待，让它立即重新检查是否还有需要关注的规则。"""
+        self._wakeup.set()
+
+    def names(self):
+        """当前被关注的所有进程名（小写，已排序）。"""
+        with self._lock:
+            return sorted(self._dogs)
+
+    def dispatch(self, name):
+        """按事件中的进程名，把事件交给对应的 watchdog。"""
+        with self._lock:
+            dogs = list(self._dogs.get(str(name).lower(), ()))
+        for dog in dogs:
+            if not dog._is_running or dog._is_paused:
+                continue
+            start = time.perf_counter()
+            try:
+                dog.handle_event(name)
+            except Exception as e:
+                logger.error(f"Process event handler for '{dog.name}' failed: {e}", exc_info=True)
+            _metrics.observe_event(dog, time.perf_counter() - start)
 
     def _loop(self):
-        """WMI事件订阅循环。"""
-        logger.info(f"WMI event watcher for '{self.name}' ({self.event_type}) started in thread {threading.get_ident()}.")
+        """进程事件订阅循环。"""
+        logger.info(f"Process event multiplexer for '{self.event_type}' started in thread {threading.get_ident()}.")
+        backend = get_backend()
+        subscription = None
         try:
-            pythoncom.CoInitialize()
-            c = wmi.WMI()
-            watcher = c.ExecNotificationQuery(self.query)
-            while self._is_running:
-                if self._is_paused:
-                    time.sleep(1) # 在暂停时休眠
-                    continue
+            while True:
+                with self._lock:
+                    if not any(d._is_running for dogs in self._dogs.values() for d in dogs):
+                        self._thread = None
+                        break
+                    resubscribe = self._dirty or subscription is None
+                    self._dirty = False
+                if resubscribe:
+                    names = self.names()
+                    if subscription is not None and subscription.update(names):
+                        logger.debug(f"'{self.event_type}' subscription updated to {len(names)} process name(s).")
+                    else:
+                        if subscription is not None:
+                            subscription.close()
+                        subscription = backend.subscribe(self.event_type, names)
+                        self.subscriptions += 1
+                        logger.debug(f"'{self.event_type}' subscription rebuilt for {len(names)} process name(s).")
                 try:
-                    event = watcher.NextEvent(100)
-                    self.handle_event(event)
-                except pywintypes.com_error as e:
-                    # The HRESULT for WBEM_S_TIMEDOUT is -2147209215. This indicates an expected timeout.
-                    # It's nested deep inside the exception object at e.args[2][5].
-                    if len(e.args) > 2 and e.args[2] and e.args[2][5] == -2147209215:
-                        continue  # This is a timeout, just continue waiting
-                    raise  # Re-raise other unexpected COM errors
+                    name = subscription.next_event(0.1)
+                except Exception as e:
+                    logger.error(f"'{self.event_type}' subscription failed: {e}. Reconnecting and resubscribing.")
+                    subscription.close()
+                    subscription = None
+                    self._wakeup.clear()
+                    self._wakeup.wait(1)
+                    backend.invalidate()
+                    continue
+                if name is not None:
+                    self.dispatch(name)
         except Exception as e:
-            logger.critical(f"WMI event watcher for '{self.name}' has crashed: {e}", exc_info=True)
+            logger.critical(f"Process event multiplexer for '{self.event_type}' has crashed: {e}", exc_info=True)
+            with self._lock:
+                self._thread = None
         finally:
-            logger.info(f"WMI event watcher for '{self.name}' is shutting down.")
-            pythoncom.CoUninitialize()
+            logger.info(f"Process event multiplexer for '{self.event_type}' is shutting down.")
+            if subscription is not None:
+                subscription.close()
+            backend.release_thread()
+            announce_exit()
 
     def start(self):
-        if not self._is_running:
-            self._is_running = True
-            self._thread = threading.Thread(target=self._loop)
-            self._thread.daemon = True
-            self._thread.start()
+        """确保订阅线程在运行，并返回该线程。"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._thread
 
-    def handle_event(self, event):
-        raise NotImplementedError("This method should be implemented by subclasses.")
+_event_multiplexers = {}
+_event_multiplexers_lock = threading.Lock()
+
+def _get_event_multiplexer(event_type):
+    with _event_multiplexers_lock:
+        if event_type not in _event_multiplexers:
+            _event_multiplexers[event_type] = ProcessEventMultiplexer(event_type)
+        return _event_multiplexers[event_type]
 
 
 class HardwareWatchdog(BaseWatchdog):
@@ -229,6 +786,24 @@ class ProcessWatcher:
         dog = self._get_or_create_watchdog('is_running', RunningWatchdog)
         return dog.is_running
 
+    def uses_too_much(self, cpu: float = None, rss: int = None, handles: int = None, io: float = None,
+                      duration: float = 10):
+        """
+        进程的资源占用（同名的所有进程相加）在 duration 秒内持续超过任一上限时触发。
+
+        Args:
+            cpu (float, optional): CPU 占用率上限（%），占满一个逻辑核心为 100。
+            rss (int, optional): 常驻内存上限（字节）。
+            handles (int, optional): 句柄数上限。
+            io (float, optional): 磁盘与其它 IO 的读写速率上限（字节每秒）。
+            duration (float, optional): 持续时间（秒）。默认为 10。
+        """
+        from .condition.uses_too_much import UsesTooMuchWatchdog
+        key = f'uses_too_much_{cpu}_{rss}_{handles}_{io}_{duration}'
+        dog = self._get_or_create_watchdog(key, UsesTooMuchWatchdog, cpu=cpu, rss=rss, handles=handles,
+                                           io=io, duration=duration)
+        return dog.uses_too_much
+
 class HardwareWatcher:
     def __init__(self, hardware_name):
         self.name = hardware_name
@@ -266,17 +841,41 @@ class HardwareWatcher:
             self._watchdogs[key] = dog
         return self._watchdogs[key]
 
-    def is_too_busy(self, over, duration):
+    def is_too_busy(self, over, duration,
+                    aggregate: Literal['all', 'mean', 'percentile', 'ewma', 'n_of_m'] = 'all',
+                    q: float = 95, alpha: float = None, n: int = None):
+        """
+        Args:
+            over (float | list): 总体阈值，或按分项给出的阈值列表（-1 表示不关心该分项）。
+                cpu / ram / swap / gpu 的单位是百分比，disk / net 的单位是字节每秒；
+                分项分别为各逻辑核心、[读, 写]、[发送, 接收] 和各块 GPU（ram / swap 没有分项）。
+            duration (float): 持续时间（秒），同时决定滑动窗口包含的读数个数。
+            aggregate (str, optional): 'all' 要求窗口内每个读数都超过阈值（默认）；
+                'mean' / 'percentile' / 'ewma' 比较窗口内的平均值 / 第 q 百分位数 / 指数加权平均；
+                'n_of_m' 要求窗口内至少 n 个读数超过阈值。
+            q (float, optional): aggregate='percentile' 时的百分位数。默认为 95。
+            alpha (float, optional): aggregate='ewma' 时的平滑系数。默认为 2 / (窗口读数个数 + 1)。
+            n (int, optional): aggregate='n_of_m' 时需要超过阈值的读数个数。默认为整个窗口。
+        """
         from .condition.is_too_busy import IsTooBusyWatchdog
         # 产生一个唯一的key，以便相同的参数得到同一个watchdog
-        key = f'is_too_busy_{over}_{duration}'
-        dog = self._get_or_create_watchdog(key, IsTooBusyWatchdog, over=over, duration=duration)
+        key = f'is_too_busy_{over}_{duration}_{aggregate}_{q}_{alpha}_{n}'
+        dog = self._get_or_create_watchdog(key, IsTooBusyWatchdog, over=over, duration=duration,
+                                           aggregate=aggregate, q=q, alpha=alpha, n=n)
         return dog.is_too_busy
 
-    def has_windows_look_like(self, template_image_path: str, threshold: float = 0.8, interval: int = 1):
+    def has_windows_look_like(self, template_image_path: str, threshold: float = 0.8, interval: int = 1,
+                              pyramid: bool = False, scales: tuple = (1.0,)):
+        """
+        Args:
+            pyramid (bool, optional): 先在缩小 4 倍的画面上粗匹配，再在候选位置做全分辨率验证。
+                高分辨率屏幕上快得多，但极小或细节很少的模板可能漏检。
+            scales (tuple, optional): 额外尝试的模板缩放比例，用于应对不同的 DPI 缩放，例如 (1.0, 1.25, 1.5)。
+        """
         from .condition.has_windows_look_like import WindowsMatchingWatchdog
-        key = f'look_like_{template_image_path}_{threshold}_{interval}'
-        dog = self._get_or_create_watchdog(key, WindowsMatchingWatchdog, template_image_path=template_image_path, threshold=threshold, interval=interval)
+        key = f'look_like_{template_image_path}_{threshold}_{interval}_{pyramid}_{tuple(scales)}'
+        dog = self._get_or_create_watchdog(key, WindowsMatchingWatchdog, template_image_path=template_image_path,
+                                           threshold=threshold, interval=interval, pyramid=pyramid, scales=scales)
         return dog.is_found
         
 def attend(name: str):
@@ -289,9 +888,9 @@ def attend(name: str):
         return ProcessWatcher(name)
 
 # --- Public Actions ---
-def get_top_processes(count: int) -> str:
+def get_top_processes(count: int, structured: bool = False):
    from .action.get_top_processes import get_top_processes as get_top_processes_func
-   return get_top_processes_func(count)
+   return get_top_processes_func(count, structured)
 
 def alarm(content: str):
     from .action.alarm import alarm as alarm_func
@@ -301,23 +900,164 @@ def write_file(path: str, content: str, append: bool = False):
     from .action.write_file import write_file as write_file_func
     write_file_func(path, content, append)
 
-def start():
+def _wait_for_exit(dogs):
+    """
+    阻塞到 stop() 被调用，或者所有规则的线程都已退出。
+    服务线程退出前会发出通知，因此不需要定期醒来检查；超时只是兜底。
+    """
+    def done():
+        return _stop_event.is_set() or not any(is_serving(dog._thread) for dog in dogs)
+    with _lifecycle:
+        while not _lifecycle.wait_for(done, timeout=10):
+            pass
+
+def start(scheduler: Literal['thread', 'pool'] = 'thread', max_workers: int = 8, wait: bool = True):
     """
-    启动所有已配置的 watchdog 的监控线程，并保持主线程存活直到所有监控结束。
+    启动所有已配置的 watchdog 的监控线程，并保持主线程存活直到所有监控结束或 stop() 被调用。
+
+    Args:
+        scheduler (str, optional): 'thread' 为每条轮询规则分配一个守护线程（默认）；
+            'pool' 使用按到期时间排序的定时器堆，在有界线程池中执行到期的检查。
+        max_workers (int, optional): 'pool' 模式下工作线程数的上限。默认为 8。
+        wait (bool, optional): 为 False 时启动后立即返回，之后由 stop() 停止。默认为 True。
     """
+    global _scheduler
     logger.info("SysMaid service starting all watchdogs...")
     dogs_to_watch = list(_watchdogs)
     if not dogs_to_watch:
         logger.warning("No watchdogs configured, SysMaid will exit.")
         return
-    
+
+    if scheduler == 'pool':
+        from .scheduler import PoolScheduler
+        # 线程池中的每个工作线程都可能访问平台后端（例如发起 WMI 调用，需要先初始化 COM）
+        pool = PoolScheduler(max_workers=max_workers, initializer=get_backend().thread_init)
+    elif scheduler == 'thread':
+        pool = None
+    else:
+        raise ValueError(f"Unknown scheduler '{scheduler}'. Expected 'thread' or 'pool'.")
+
+    _stop_event.clear()
+    _scheduler = pool
+    _start_dispatcher()
+    _start_metrics_writer()
     for dog in dogs_to_watch:
-        dog.start()
+        dog.start(pool)
     logger.info("All watchdogs have been started.")
+    if not wait:
+        return
 
     # 只要还有任何一个 watchdog 线程在运行，主线程就保持存活。
     # 这是一个容错机制，防止所有监控线程意外崩溃后主进程僵死。
-    while any(dog._thread and dog._thread.is_alive() for dog in dogs_to_watch):
-        time.sleep(10)
+    _wait_for_exit(dogs_to_watch)
 
+    _stop_dispatcher()
+    _stop_metrics_writer()
     logger.warning("All watchdog threads have stopped. SysMaid service is shutting down.")
+
+def stop(timeout: float = 5):
+    """
+    停止所有规则，并等待它们的线程退出。可以在任意线程中调用（包括回调）；
+    阻塞中的 start() / start_async() 随之返回。轮询间隔和暂停都基于事件等待，
+    因此停止不需要等到下一个 tick。
+
+    Args:
+        timeout (float, optional): 等待所有线程退出的总时长上限（秒）。默认为 5。
+
+    Returns:
+        bool: 所有线程是否都在 timeout 内退出。
+    """
+    global _scheduler
+    deadline = time.monotonic() + timeout
+    dogs = list(_watchdogs)
+    logger.info(f"Stopping {len(dogs)} watchdog(s)...")
+    for dog in dogs:
+        dog.stop()
+    scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown()
+    with _lifecycle:
+        _stop_event.set()
+        _lifecycle.notify_all()
+
+    current = threading.current_thread()
+    threads = {dog._thread for dog in dogs if dog._thread is not None and dog._thread is not current}
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    stopped = not any(thread.is_alive() for thread in threads)
+    if not stopped:
+        logger.warning(f"Some watchdog threads did not stop within {timeout} seconds.")
+
+    dispatcher = _dispatcher
+    if dispatcher is not None and dispatcher.in_worker():
+        # 在回调中调用时不能在这里等待动作队列排空（当前回调本身就在队列的工作线程上）
+        threading.Thread(target=_stop_dispatcher, name='sysmaid-stop', daemon=True).start()
+    else:
+        _stop_dispatcher(max(0.0, deadline - time.monotonic()))
+    _stop_metrics_writer()
+    return stopped
+
+@contextlib.contextmanager
+def running(scheduler: Literal['thread', 'pool'] = 'thread', max_workers: int = 8, timeout: float = 5):
+    """
+    在后台启动所有已配置的规则，离开 with 语句块时停止它们::
+
+        with sysmaid.running():
+            do_something()
+
+    参数同 start() 与 stop()。
+    """
+    start(scheduler, max_workers, wait=False)
+    try:
+        yield
+    finally:
+        stop(timeout)
+
+async def start_async(max_workers: int = 8):
+    """
+    start() 的 asyncio 版本：所有轮询规则作为任务运行在当前事件循环上，
+    阻塞的 WMI/psutil 调用通过有界线程池桥接，协程回调会在该事件循环上被 await。
+    直到所有监控结束或 stop() 被调用才返回。
+
+    Args:
+        max_workers (int, optional): 用于执行阻塞检查的线程数上限。默认为 8。
+    """
+    global _event_loop, _scheduler
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from .scheduler import AsyncScheduler
+
+    logger.info("SysMaid service starting all watchdogs on the event loop...")
+    dogs_to_watch = list(_watchdogs)
+    if not dogs_to_watch:
+        logger.warning("No watchdogs configured, SysMaid will exit.")
+        return
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix='sysmaid-async',
+        initializer=get_backend().thread_init,
+    )
+    runner = AsyncScheduler(loop, executor)
+    _stop_event.clear()
+    _scheduler = runner
+    _event_loop = loop
+    _start_dispatcher()
+    _start_metrics_writer()
+    try:
+        for dog in dogs_to_watch:
+            dog.start(runner)
+        logger.info("All watchdogs have been started.")
+
+        await runner.join()
+        # 进程事件规则运行在统一订阅线程上，同样要等它们结束
+        await loop.run_in_executor(None, _wait_for_exit, dogs_to_watch)
+    finally:
+        # 等待排队的动作执行完，期间不阻塞事件循环（协程回调仍需要它）
+        await loop.run_in_executor(None, _stop_dispatcher)
+        _stop_metrics_writer()
+        _event_loop = None
+        executor.shutdown(wait=False)
+
+    logger.warning("All watchdogs have stopped. SysMaid service is shutting down.")
@@ -0,0 +1,297 @@
+import bisect
+import itertools
+import logging
+import os
+import threading
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶的上界（秒）。检查耗时从几微秒（读缓冲区）到几秒（WMI 超时）不等
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+class Histogram:
+    """固定桶的耗时直方图。本身不加锁，并发写入由所属的 UnitMetrics.lock 串行化。"""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 最后一个桶是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'buckets': dict(zip(BUCKETS + (float('inf'),), self.counts)),
+        }
+
+class CallStats:
+    """
+    某一类外部调用（WMI 枚举、EnumWindows、psutil 遍历、matchTemplate……）的次数与耗时。
+    本身不加锁：全局合计由 MetricsRegistry._lock 保护，单元内的统计由 UnitMetrics.lock 保护。
+    """
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def snapshot(self):
+        return {'count': self.count, 'total': self.total, 'max': self.max}
+
+class UnitMetrics:
+    """
+    一条规则（或一个中央采样器）的指标。
+
+    同一单元的检查不会并发，但回调延迟在多个动作工作线程中记录，外部调用也可能来自
+    检查之外的线程，因此所有写入都在 lock 内完成。锁只在单元内部争用，开销很小。
+    """
+    __slots__ = ('id', 'kind', 'name', 'lock', 'checks', 'missed_deadlines', 'triggers', 'callbacks', 'calls')
+
+    def __init__(self, unit_id, kind, name):
+        self.id = unit_id
+        self.kind = kind
+        self.name = name
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.checks = Histogram()  # check_state（或事件处理）的耗时
+        self.missed_deadlines = 0  # 一次检查的耗时超过了 interval
+        self.triggers = 0
+        self.callbacks = Histogram()  # 从触发到回调执行完毕的延迟，包括在动作队列中的等待
+        self.calls = {}  # 调用名 -> CallStats
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'name': self.name,
+                'checks': self.checks.snapshot(),
+                'missed_deadlines': self.missed_deadlines,
+                'triggers': self.triggers,
+                'callback_latency': self.callbacks.snapshot(),
+                'calls': {op: stats.snapshot() for op, stats in self.calls.items()},
+            }
+
+class MetricsRegistry:
+    """
+    热路径指标的登记处。
+
+    每个调度单元第一次被记录时分配一个 UnitMetrics 并挂在单元自身上，
+    之后的记录只是几次属性访问、一次单元内的加锁和一次 bisect，单个 tick 的开销在微秒以内。
+    外部调用的耗时按“当前正在检查的单元”归属：线程局部变量记录了哪个单元正在执行 check_state。
+    """
+    def __init__(self):
+        self.enabled = True
+        self.calls = {}  # 调用名 -> CallStats，所有单元合计
+        self._units = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def unit(self, unit):
+        metrics = getattr(unit, '_metrics', None)
+        if metrics is None:
+            with self._lock:
+                metrics = getattr(unit, '_metrics', None)
+                if metrics is None:
+                    metrics = UnitMetrics(next(self._ids), type(unit).__name__, str(getattr(unit, 'name', unit)))
+                    unit._metrics = metrics
+                    self._units.append(metrics)
+        return metrics
+
+    def run_check(self, unit, *args):
+        """执行 unit.check_state(*args) 并记录耗时；耗时超过 unit.interval 记为一次错过节拍。"""
+        if not self.enabled:
+            return unit.check_state(*args)
+        metrics = self.unit(unit)
+        local = self._local
+        outer = getattr(local, 'current', None)
+        local.current = metrics
+        start = perf_counter()
+        try:
+            return unit.check_state(*args)
+        finally:
+            elapsed = perf_counter() - start
+            local.current = outer
+            interval = getattr(unit, 'interval', None)
+            with metrics.lock:
+                metrics.checks.observe(elapsed)
+                if interval and elapsed > interval:
+                    metrics.missed_deadlines += 1
+
+    def observe_event(self, unit, seconds):
+        """记录一次事件驱动规则的事件处理耗时（事件规则没有节拍，不计错过节拍）。"""
+        if self.enabled:
+            metrics = self.unit(unit)
+            with metrics.lock:
+                metrics.checks.observe(seconds)
+
+    def record_call(self, op, seconds):
+        """记录一次外部调用，同时计入当前线程正在检查的单元（如果有）。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.calls.get(op)
+            if stats is None:
+                stats = self.calls[op] = CallStats()
+            stats.add(seconds)
+        current = getattr(self._local, 'current', None)
+        if current is not None:
+            with current.lock:
+                stats = current.calls.get(op)
+                if stats is None:
+                    stats = current.calls[op] = CallStats()
+                stats.add(seconds)
+
+    def record_trigger(self, unit):
+        """记录一次触发，返回触发时刻，用于之后计算回调延迟。"""
+        if not self.enabled:
+            return None
+        metrics = self.unit(unit)
+        with metrics.lock:
+            metrics.triggers += 1
+        return perf_counter()
+
+    def record_callback(self, unit, fired_at):
+        """记录一次回调延迟。会在多个动作工作线程中同时调用。"""
+        if fired_at is not None:
+            metrics = self.unit(unit)
+            with metrics.lock:
+                metrics.callbacks.observe(perf_counter() - fired_at)
+
+    def snapshot(self):
+        with self._lock:
+            units = list(self._units)
+            calls = {op: stats.snapshot() for op, stats in self.calls.items()}
+        return {'rules': [m.snapshot() for m in units], 'calls': calls}
+
+    def reset(self):
+        with self._lock:
+            for metrics in self._units:
+                with metrics.lock:
+                    metrics.clear()
+            self.calls.clear()
+
+_metrics = MetricsRegistry()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+def _format_le(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+def format_prometheus(stats):
+    """把 sysmaid.stats() 的快照转换为 Prometheus 文本格式。"""
+    lines = []
+
+    def header(name, kind, text):
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def histogram(name, rule_labels, snapshot):
+        cumulative = 0
+        for bound, count in snapshot['buckets'].items():
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**rule_labels, le=_format_le(bound))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**rule_labels)} {snapshot['sum']!r}")
+        lines.append(f"{name}_count{_labels(**rule_labels)} {snapshot['count']}")
+
+    rules = [(dict(id=r['id'], kind=r['kind'], rule=r['name']), r) for r in stats['rules']]
+    header('sysmaid_check_duration_seconds', 'histogram', 'Duration of each check_state call (or event handler) per rule.')
+    for labels, r in rules:
+        histogram('sysmaid_check_duration_seconds', labels, r['checks'])
+    header('sysmaid_callback_latency_seconds', 'histogram', 'Time from a trigger until its callback finished, per rule.')
+    for labels, r in rules:
+        histogram('sysmaid_callback_latency_seconds', labels, r['callback_latency'])
+    header('sysmaid_missed_deadlines_total', 'counter', 'Checks that took longer than the rule interval.')
+    for labels, r in rules:
+        lines.append(f"sysmaid_missed_deadlines_total{_labels(**labels)} {r['missed_deadlines']}")
+    header('sysmaid_triggers_total', 'counter', 'Times a rule fired its callback.')
+    for labels, r in rules:
+        lines.append(f"sysmaid_triggers_total{_labels(**labels)} {r['triggers']}")
+    header('sysmaid_rule_calls_total', 'counter', 'External calls (WMI, EnumWindows, psutil, matchTemplate...) made while checking a rule.')
+    for labels, r in rules:
+        for op, call in r['calls'].items():
+            lines.append(f"sysmaid_rule_calls_total{_labels(**labels, op=op)} {call['count']}")
+    header('sysmaid_rule_call_seconds_total', 'counter', 'Time spent in external calls while checking a rule.')
+    for labels, r in rules:
+        for op, call in r['calls'].items():
+            lines.append(f"sysmaid_rule_call_seconds_total{_labels(**labels, op=op)} {call['total']!r}")
+
+    header('sysmaid_calls_total', 'counter', 'External calls across all rules and samplers.')
+    for op, call in stats['calls'].items():
+        lines.append(f"sysmaid_calls_total{_labels(op=op)} {call['count']}")
+    header('sysmaid_call_seconds_total', 'counter', 'Time spent in external calls across all rules and samplers.')
+    for op, call in stats['calls'].items():
+        lines.append(f"sysmaid_call_seconds_total{_labels(op=op)} {call['total']!r}")
+
+    for section in ('actions', 'wmi_pool', 'samplers'):
+        values = {k: v for k, v in (stats.get(section) or {}).items() if isinstance(v, (int, float))}
+        if values:
+            name = f'sysmaid_{section}'
+            header(name, 'gauge', f"Counters and gauges reported by the {section.replace('_', ' ')}.")
+            for key, value in values.items():
+                lines.append(f"{name}{_labels(key=key)} {value!r}")
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, stats):
+    """原子地写入 Prometheus 文本格式文件（先写临时文件再替换），供 node_exporter 的 textfile 收集器读取。"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(format_prometheus(stats))
+    os.replace(tmp, path)
+
+class PrometheusFileWriter:
+    """每隔 interval 秒把 stats_func() 的快照写入 path 的后台线程。"""
+    def __init__(self, path, stats_func, interval=15):
+        self.path = path
+        self.interval = interval
+        self._stats_func = stats_func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            write_prometheus(self.path, self._stats_func())
+        except Exception as e:
+            logger.error(f"Writing metrics to '{self.path}' failed: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='sysmaid-metrics')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程，并写入最后一次快照。"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.write()
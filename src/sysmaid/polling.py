@@ -0,0 +1,51 @@
+import threading
+import weakref
+
+# 自适应轮询的全局配置，见 maid.configure_polling。默认关闭：放慢会推迟触发，需要显式启用
+_polling_config = {'adaptive': False, 'max_interval': 10, 'backoff': 2}
+
+# 距离到期不超过该比例个间隔的规则也在本 tick 检查，避免因为调度抖动整整推迟一轮
+DUE_SLACK = 0.1
+
+def back_off(interval, base, cap=None):
+    """
+    被关注的状态保持稳定：返回放慢一级后的间隔，最长为 max_interval（不会短于 base）。
+    cap 为条件自己允许的最长间隔，用于触发延迟敏感的条件。
+    """
+    if not _polling_config['adaptive']:
+        return base
+    limit = _polling_config['max_interval'] if cap is None else min(cap, _polling_config['max_interval'])
+    return min(interval * _polling_config['backoff'], max(base, limit))
+
+def due(dogs, now):
+    """
+    从已注册的规则中挑出本 tick 需要检查的规则。
+    处于基础间隔的规则每个 tick 都检查（与以前相同）；已经放慢的规则只在到期时检查。
+    """
+    return [d for d in dogs if d._is_running and not d._is_paused
+            and (d.interval <= d.base_interval or d._next_check - now <= DUE_SLACK * d.interval)]
+
+def next_interval(dogs, now, floor):
+    """中央采样器下一次 tick 的间隔：到最早一条规则到期为止，但不短于 floor（各规则基础间隔中最短的一个）。"""
+    pending = [d._next_check - now for d in dogs if d._is_running and not d._is_paused]
+    return max(min(pending), floor) if pending else floor
+
+def all_paused(dogs):
+    """已启动的规则全部暂停时，驱动它们的采样器也随之暂停。"""
+    running = [d for d in dogs if d._is_running]
+    return bool(running) and all(d._is_paused for d in running)
+
+# 服务线程（轮询线程、采样器、调度器、事件订阅）退出前通过它通知 start()，
+# start() 因此不必定期醒来检查线程是否存活
+_lifecycle = threading.Condition()
+_exiting = weakref.WeakSet()  # 已经宣布退出、即将结束的线程
+
+def announce_exit():
+    """在服务线程退出前调用。"""
+    with _lifecycle:
+        _exiting.add(threading.current_thread())
+        _lifecycle.notify_all()
+
+def is_serving(thread):
+    """线程仍在运行，且没有宣布即将退出。"""
+    return thread is not None and thread.is_alive() and thread not in _exiting
@@ -0,0 +1,382 @@
+"""
+声明式规则文件（JSON / TOML / YAML）与规则编译器。
+
+一条规则由关注对象、条件和动作组成::
+
+    rules:
+      - name: canva-zombie
+        attend: Canva.exe
+        when: has_no_window
+        do:
+          - kill_process: Canva.exe
+      - attend: cpu
+        when: {is_too_busy: {over: 80, duration: 10}}
+        do:
+          - alarm: CPU is too busy
+          - write_file: [logs/cpu.log, "CPU is too busy\\n", true]
+
+动作的参数可以是单个值、位置参数列表或关键字参数表。
+
+编译器把条件规范化（关注对象名、补全默认参数、列表转元组）后去重：
+无论有多少条规则写了同一个条件，执行计划中都只有一个 watchdog，
+触发时依次执行这些规则去重后的动作。执行计划按数据源（进程快照、窗口索引、
+进程事件、进程资源采样、硬件采样、屏幕帧）分组，同一数据源的所有条件共用一个中央采样器。
+
+文件变化时重新编译并与当前计划比较：新增的条件创建并启动，消失的条件停止并移除，
+保留的条件只替换动作，采样状态（例如持续时间计时）不受影响。
+"""
+import inspect
+import json
+import logging
+import os
+import threading
+from . import maid
+from .maid import BaseWatchdog, HardwareWatcher, ProcessWatcher, HARDWARE_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# 条件 -> 它读取的数据源
+SOURCES = {
+    'has_no_window': 'window_index',  # 进程表快照 + 可见窗口索引
+    'is_running': 'process_events',
+    'is_exited': 'process_events',
+    'uses_too_much': 'process_resources',
+    'is_too_busy': 'hardware',
+    'has_windows_look_like': 'screen',
+}
+PROCESS_CONDITIONS = ('has_no_window', 'is_running', 'is_exited', 'uses_too_much')
+HARDWARE_CONDITIONS = ('is_too_busy', 'has_windows_look_like')
+
+def _freeze(value):
+    """把参数转换为可哈希、可比较的规范形式。"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+class PlanEntry:
+    """执行计划中的一个去重后的条件，以及写了这个条件的所有规则的动作。"""
+    __slots__ = ('key', 'target', 'condition', 'params', 'source', 'rules', 'actions')
+
+    def __init__(self, key, target, condition, params):
+        self.key = key
+        self.target = target
+        self.condition = condition
+        self.params = params  # 创建 watchdog 时使用的关键字参数（未规范化）
+        self.source = SOURCES[condition]
+        self.rules = []  # 规则名
+        self.actions = []  # 去重后的 (动作名, 位置参数, 关键字参数)
+
+    def add(self, rule_name, actions):
+        self.rules.append(rule_name)
+        for action in actions:
+            if action not in self.actions:
+                self.actions.append(action)
+
+class RulePlan:
+    """编译后的执行计划：规范化条件 -> PlanEntry。"""
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.rule_count = sum(len(e.rules) for e in self.entries.values())
+
+    def sources(self):
+        """按数据源分组的条件。"""
+        groups = {}
+        for entry in self.entries.values():
+            groups.setdefault(entry.source, []).append(entry)
+        return groups
+
+    def describe(self):
+        return {
+            'rules': self.rule_count,
+            'conditions': len(self.entries),
+            'sources': {source: len(entries) for source, entries in self.sources().items()},
+        }
+
+def _target(name):
+    """关注对象的规范名。硬件关键字与 attend() 一样转为小写；进程映像名在 Windows 上不区分大小写，同样转为小写。"""
+    if not isinstance(name, str) or not name:
+        raise ValueError(f"'attend' must be a non-empty string, got {name!r}.")
+    return name.lower()
+
+def _condition(when, base_dir):
+    """把 'when' 解析为 (条件名, 规范化参数, 关键字参数)。"""
+    if isinstance(when, str):
+        condition, params = when, {}
+    elif isinstance(when, dict) and len(when) == 1:
+        (condition, params), = when.items()
+        params = params or {}
+    else:
+        raise ValueError(f"'when' must be a condition name or a single-key mapping, got {when!r}.")
+    if condition not in SOURCES:
+        raise ValueError(f"Unknown condition '{condition}'. Expected one of {tuple(SOURCES)}.")
+    if not isinstance(params, dict):
+        raise ValueError(f"Parameters of '{condition}' must be a mapping, got {params!r}.")
+
+    method = getattr(ProcessWatcher if condition in PROCESS_CONDITIONS else HardwareWatcher, condition)
+    if isinstance(method, property):
+        if params:
+            raise ValueError(f"'{condition}' takes no parameters.")
+        return condition, (), {}
+    try:
+        bound = inspect.signature(method).bind(None, **params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for '{condition}': {e}") from None
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments['self']
+    path = arguments.get('template_image_path')
+    if path and base_dir and not os.path.isabs(path):
+        # 规则文件中的模板路径相对于规则文件所在的目录
+        arguments['template_image_path'] = os.path.normpath(os.path.join(base_dir, path))
+    return condition, tuple(sorted((k, _freeze(v)) for k, v in arguments.items())), arguments
+
+def _actions(do):
+    from . import _LAZY_ACTIONS
+    if isinstance(do, dict):
+        do = [do]
+    if not isinstance(do, list) or not do:
+        raise ValueError(f"'do' must be a non-empty list of actions, got {do!r}.")
+    actions = []
+    for item in do:
+        if isinstance(item, str):
+            name, args = item, []
+        elif isinstance(item, dict) and len(item) == 1:
+            (name, args), = item.items()
+        else:
+            raise ValueError(f"An action must be a name or a single-key mapping, got {item!r}.")
+        if name not in _LAZY_ACTIONS:
+            raise ValueError(f"Unknown action '{name}'. Expected one of {tuple(_LAZY_ACTIONS)}.")
+        if isinstance(args, dict):
+            actions.append((name, (), _freeze(args)))
+        elif isinstance(args, list):
+            actions.append((name, _freeze(args), ()))
+        elif args is None:
+            actions.append((name, (), ()))
+        else:
+            actions.append((name, (args,), ()))
+    return actions
+
+def compile_rules(data, base_dir=None):
+    """
+    把规则文件的内容编译为执行计划。
+
+    Args:
+        data (dict | list): {'rules': [...]} 或规则列表。
+        base_dir (str, optional): 规则中相对模板路径的基准目录。
+
+    Returns:
+        RulePlan: 规范化并去重后的执行计划。
+    """
+    rules = data.get('rules', []) if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise ValueError("The rule file must contain a list of rules.")
+    entries = {}
+    names = set()
+    for i, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Rule #{i + 1} must be a mapping, got {rule!r}.")
+        name = str(rule.get('name') or f'rule #{i + 1}')
+        if name in names:
+            raise ValueError(f"Duplicate rule name '{name}'.")
+        names.add(name)
+        unknown = set(rule) - {'name', 'attend', 'when', 'do', 'enabled'}
+        if unknown:
+            raise ValueError(f"Rule '{name}' has unknown keys {sorted(unknown)}.")
+        if not rule.get('enabled', True):
+            continue
+        try:
+            target = _target(rule.get('attend'))
+            condition, params, kwargs = _condition(rule.get('when'), base_dir)
+            if (rule['attend'] in HARDWARE_KEYWORDS) != (condition in HARDWARE_CONDITIONS):
+                kind = 'hardware' if condition in HARDWARE_CONDITIONS else 'process'
+                raise ValueError(f"'{condition}' is a {kind} condition and cannot attend '{target}'.")
+            actions = _actions(rule.get('do'))
+        except ValueError as e:
+            raise ValueError(f"Rule '{name}': {e}") from None
+        key = (target, condition, params)
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = PlanEntry(key, rule['attend'], condition, kwargs)
+        entry.add(name, actions)
+    return RulePlan(entries)
+
+def read_rule_file(path):
+    """按扩展名读取 .json / .toml / .yaml / .yml 规则文件。"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("Reading TOML rule files on Python < 3.11 requires 'tomli' (pip install tomli).") from None
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML rule files requires 'PyYAML' (pip install pyyaml).") from None
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    raise ValueError(f"Unsupported rule file '{path}'. Expected a .json, .toml, .yaml or .yml file.")
+
+def _run_actions(entry):
+    """条件触发时依次执行 entry 当前的动作。动作在执行时才解析，热加载替换动作后立即生效。"""
+    import sysmaid
+    for name, args, kwargs in list(entry.actions):
+        try:
+            getattr(sysmaid, name)(*args, **dict(kwargs))
+        except Exception as e:
+            logger.error(f"Action '{name}' of rule(s) {', '.join(entry.rules)} failed: {e}", exc_info=True)
+
+class RuleSet:
+    """
+    从规则文件加载的一组规则。每个去重后的条件对应一个 watchdog，
+    watchdog 与 attend() 创建的规则一样登记在全局列表中，由 start() / stop() 统一管理。
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.plan = RulePlan()
+        self._dogs = {}  # 条件 -> watchdog
+        self._signature = None
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _create(self, entry):
+        watcher = maid.attend(entry.target)
+        register = getattr(watcher, entry.condition)
+        if not entry.params:
+            register(lambda: _run_actions(entry))
+        else:
+            register(**entry.params)(lambda: _run_actions(entry))
+        dog, = watcher._watchdogs.values()
+        return dog
+
+    def _retire(self, dog):
+        # 持有共享资源的条件（例如屏幕匹配的帧提供者）提供 close()，停止的同时释放资源
+        getattr(dog, 'close', dog.stop)()
+        # 从中央采样器中注销，采样器不再为它保留缓冲区或在 tick 中遍历它
+        unregister = getattr(getattr(dog, '_driver', None), 'unregister', None)
+        if unregister is not None:
+            unregister(dog)
+        if dog in maid._watchdogs:
+            maid._watchdogs.remove(dog)
+
+    @staticmethod
+    def _is_started():
+        """start() 已经启动了规则（且尚未 stop()）时，新增的条件需要立即启动。"""
+        return any(d._is_running for d in maid._watchdogs)
+
+    def load(self):
+        """读取并编译规则文件，把当前的 watchdog 调整为新的执行计划。编译失败时保留原有计划并抛出异常。"""
+        with self._lock:
+            signature = self._stat()
+            plan = compile_rules(read_rule_file(self.path), os.path.dirname(self.path))
+            started = self._is_started()
+            created = {}
+            try:
+                for key, entry in plan.entries.items():
+                    if key not in self._dogs:
+                        created[key] = self._create(entry)
+            except Exception:
+                for dog in created.values():
+                    self._retire(dog)
+                raise
+
+            for key, dog in list(self._dogs.items()):
+                if key not in plan.entries:
+                    self._retire(self._dogs.pop(key))
+            for key, entry in plan.entries.items():
+                old = self.plan.entries.get(key)
+                if old is not None:
+                    # 保留的条件沿用原来的 watchdog，触发时读取的是同一个 entry 对象
+                    old.rules[:] = entry.rules
+                    old.actions[:] = entry.actions
+                    plan.entries[key] = old
+            self._dogs.update(created)
+            if started:
+                for dog in created.values():
+                    dog.start(maid._scheduler)
+            self.plan = plan
+            self._signature = signature
+
+        summary = plan.describe()
+        logger.info(f"Loaded {summary['rules']} rule(s) from '{self.path}' as {summary['conditions']} condition(s): "
+                    f"{', '.join(f'{k}={v}' for k, v in summary['sources'].items()) or 'none'}. "
+                    f"Added {len(created)}, kept {len(plan.entries) - len(created)}.")
+        return plan
+
+    def reload_if_changed(self):
+        """文件的修改时间或大小变化时重新加载。编译失败时记录错误并保留原有计划。"""
+        try:
+            signature = self._stat()
+        except OSError:
+            return False  # 文件正在被替换或已被删除，保留当前规则
+        if signature == self._signature:
+            return False
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            logger.error(f"Reloading rules from '{self.path}' failed, keeping the current rules: {e}")
+            self._signature = signature  # 文件再次变化前不再重试
+            return False
+
+    def watch(self, interval=1):
+        """创建检查文件变化的 watchdog，随 start() 启动、随 stop() 停止。"""
+        if self._watcher is None:
+            self._watcher = RuleFileWatchdog(self, interval)
+        return self._watcher
+
+    def close(self):
+        """停止并移除本规则集创建的所有 watchdog。"""
+        with self._lock:
+            for dog in self._dogs.values():
+                self._retire(dog)
+            self._dogs.clear()
+            self.plan = RulePlan()
+            if self._watcher is not None:
+                self._retire(self._watcher)
+                self._watcher = None
+
+class RuleFileWatchdog(BaseWatchdog):
+    """每隔 interval 秒检查一次规则文件，变化时热加载。"""
+    def __init__(self, ruleset, interval=1):
+        super().__init__(f'rules:{ruleset.path}')
+        self.ruleset = ruleset
+        self.interval = interval
+
+    def check_state(self):
+        self.ruleset.reload_if_changed()
+
+def load_rules(path, watch=True, interval=1):
+    """
+    从 JSON / TOML / YAML 文件加载规则。
+
+    Args:
+        path (str): 规则文件路径。
+        watch (bool, optional): 文件变化时自动重新加载，无需重启。默认为 True。
+        interval (float, optional): 检查文件变化的间隔（秒）。默认为 1。
+
+    Returns:
+        RuleSet: 可以调用 load() 手动重新加载、close() 移除全部规则。
+    """
+    ruleset = RuleSet(path)
+    started = ruleset._is_started()
+    ruleset.load()
+    if watch:
+        watcher = ruleset.watch(interval)
+        if started:
+            watcher.start(maid._scheduler)
+    return ruleset
@@ -0,0 +1,743 @@
+import heapq
+import logging
+import math
+import threading
+import time
+import numpy as np
+import psutil
+from .metrics import _metrics
+from .polling import due, next_interval, all_paused, announce_exit
+
+logger = logging.getLogger(__name__)
+
+class RingBuffer:
+    """
+    固定容量的环形缓冲区，每一行是某一时刻的一组读数。
+    数据保存在预先分配的 NumPy 数组里，写满后覆盖最旧的一行。
+    """
+    def __init__(self, capacity, width):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.width = width
+        self._data = np.full((capacity, width), np.nan)
+        self._timestamps = np.full(capacity, np.nan)
+        self._next = 0  # 下一次写入的行
+        self.count = 0  # 已写入的有效行数（不超过容量）
+
+    @property
+    def capacity(self):
+        return len(self._timestamps)
+
+    def append(self, timestamp, row):
+        self._data[self._next] = row
+        self._timestamps[self._next] = timestamp
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def resize(self, capacity):
+        """调整容量并保留最新的读数。"""
+        if capacity == self.capacity:
+            return
+        timestamps, data = self.latest()
+        keep = min(len(timestamps), capacity)
+        self._data = np.full((capacity, self.width), np.nan)
+        self._timestamps = np.full(capacity, np.nan)
+        self._data[:keep] = data[len(data) - keep:]
+        self._timestamps[:keep] = timestamps[len(timestamps) - keep:]
+        self._next = keep % capacity
+        self.count = keep
+
+    def latest(self, n=None):
+        """按时间先后返回最近 n 行（默认全部）的 (时间戳, 读数)，返回的是副本。"""
+        n = self.count if n is None else min(n, self.count)
+        rows = (np.arange(self._next - n, self._next)) % self.capacity
+        return self._timestamps[rows], self._data[rows]
+
+    def since(self, timestamp):
+        """按时间先后返回时间戳晚于 timestamp 的 (时间戳, 读数)。"""
+        timestamps, data = self.latest()
+        start = np.searchsorted(timestamps, timestamp, side='right')
+        return timestamps[start:], data[start:]
+
+def busy_since(timestamps, busy):
+    """
+    返回当前这段连续超标的起始时间戳：最后一个未超标读数之后的第一个读数。
+    最新的读数没有超标时返回 None。
+    """
+    if not len(busy) or not busy[-1]:
+        return None
+    idle = np.flatnonzero(~busy)
+    return timestamps[idle[-1] + 1 if idle.size else 0]
+
+class WindowAggregate:
+    """
+    最近 size 个读数（滑动窗口）上的聚合值，每一列独立计算。
+    规则每拿到一个新读数调用一次 update()，窗口填满之前 value() 返回 None。
+    """
+    def __init__(self, size, width):
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+        self.size = size
+        self.width = width
+        self._window = np.zeros((size, width))
+        self._next = 0
+        self.count = 0
+
+    def update(self, row):
+        old = self._window[self._next].copy() if self.count == self.size else None
+        self._window[self._next] = row
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self._on_update(row, old)
+
+    def _on_update(self, row, old):
+        pass
+
+    def reset(self):
+        self._window.fill(0)
+        self._next = 0
+        self.count = 0
+
+    def value(self):
+        return self._value() if self.count == self.size else None
+
+    def _value(self):
+        raise NotImplementedError
+
+class MeanAggregate(WindowAggregate):
+    """滑动平均。维护窗口内的累加和，每个读数 O(1)。"""
+    def __init__(self, size, width):
+        super().__init__(size, width)
+        self._sum = np.zeros(width)
+
+    def _on_update(self, row, old):
+        self._sum += row
+        if old is not None:
+            self._sum -= old
+        if self._next == 0:
+            # 每绕一圈重新求和一次，避免浮点误差累积
+            self._sum = self._window.sum(axis=0)
+
+    def reset(self):
+        super().reset()
+        self._sum.fill(0)
+
+    def _value(self):
+        return self._sum / self.size
+
+class PercentileAggregate(WindowAggregate):
+    """滑动百分位数，对整个窗口做一次向量化计算。"""
+    def __init__(self, size, width, q=95):
+        super().__init__(size, width)
+        if not 0 <= q <= 100:
+            raise ValueError("q must be between 0 and 100.")
+        self.q = q
+
+    def _value(self):
+        return np.percentile(self._window, self.q, axis=0)
+
+class EwmaAggregate(WindowAggregate):
+    """指数加权移动平均，每个读数 O(1)。窗口只用来决定预热所需的读数个数。"""
+    def __init__(self, size, width, alpha=None):
+        super().__init__(size, width)
+        # 默认让权重的“质心”与同样长度的滑动平均一致
+        self.alpha = 2 / (size + 1) if alpha is None else alpha
+        if not 0 < self.alpha <= 1:
+            raise ValueError("alpha must be in (0, 1].")
+        self._ewma = None
+
+    def _on_update(self, row, old):
+        if self._ewma is None:
+            self._ewma = np.array(row, dtype=float)
+        else:
+            self._ewma += self.alpha * (row - self._ewma)
+
+    def reset(self):
+        super().reset()
+        self._ewma = None
+
+    def _value(self):
+        return self._ewma
+
+class CountAboveAggregate(WindowAggregate):
+    """窗口内超过阈值的读数个数（“M 个读数中有 N 个超过”），维护计数，每个读数 O(1)。"""
+    def __init__(self, size, width, thresholds):
+        super().__init__(size, width)
+        self.thresholds = np.broadcast_to(np.asarray(thresholds, dtype=float), (width,))
+        self._counts = np.zeros(width, dtype=int)
+
+    def _on_update(self, row, old):
+        self._counts += row > self.thresholds
+        if old is not None:
+            self._counts -= old > self.thresholds
+
+    def reset(self):
+        super().reset()
+        self._counts.fill(0)
+
+    def _value(self):
+        return self._counts
+
+class Metric:
+    """
+    一类硬件读数。每个 tick 由采样器调用一次 sample()，返回写入环形缓冲区的一行：
+    第 0 列是总体读数，其余列是分项（逻辑核心、读/写、发送/接收、各块 GPU）。
+    """
+    name = None
+    unit = '%'
+    parts = ()  # 分项的名称
+
+    def part_count(self):
+        """分项的个数，用来校验按分项给出的阈值列表；无法确定时返回 None。"""
+        return len(self.parts)
+
+    def sample(self, timestamp):
+        raise NotImplementedError
+
+class CpuMetric(Metric):
+    """CPU 占用率：cpu_times 两次读数之差，分项为各逻辑核心。"""
+    name = 'cpu'
+    # Windows 上 cpu_times 没有 iowait；Linux 上 guest 时间已计入 user，不能重复累加
+    _IDLE_FIELDS = ('idle', 'iowait')
+    _EXCLUDED_FIELDS = ('guest', 'guest_nice')
+
+    def __init__(self):
+        self._prev = None
+        self._busy_cols = None
+        self._idle_cols = None
+
+    def part_count(self):
+        return psutil.cpu_count()
+
+    def sample(self, timestamp):
+        raw = psutil.cpu_times(percpu=True)
+        times = np.array(raw, dtype=float)
+        if self._busy_cols is None:
+            fields = type(raw[0])._fields
+            self._busy_cols = [i for i, f in enumerate(fields) if f not in self._EXCLUDED_FIELDS]
+            self._idle_cols = [i for i, f in enumerate(fields) if f in self._IDLE_FIELDS]
+        prev, self._prev = self._prev, times
+        if prev is None or prev.shape != times.shape:
+            return None
+
+        delta = times - prev
+        total = delta[:, self._busy_cols].sum(axis=1)
+        idle = delta[:, self._idle_cols].sum(axis=1)
+        row = np.empty(len(total) + 1)
+        row[0] = 100.0 * (total.sum() - idle.sum()) / max(total.sum(), 1e-9)
+        row[1:] = 100.0 * (total - idle) / np.maximum(total, 1e-9)
+        return np.clip(row, 0.0, 100.0, out=row)
+
+class MemoryMetric(Metric):
+    """物理内存占用率。"""
+    name = 'ram'
+
+    def sample(self, timestamp):
+        return np.array([psutil.virtual_memory().percent])
+
+class SwapMetric(Metric):
+    """页面文件（交换空间）占用率。"""
+    name = 'swap'
+
+    def sample(self, timestamp):
+        return np.array([psutil.swap_memory().percent])
+
+class RateMetric(Metric):
+    """
+    由累计计数器换算出的速率（每秒），两次读数之间做一次向量化的差分。
+    总体读数是各分项之和。
+    """
+    unit = 'B/s'
+
+    def __init__(self):
+        self._prev = None
+        self._prev_timestamp = None
+
+    def counters(self):
+        raise NotImplementedError
+
+    def sample(self, timestamp):
+        counters = self.counters()
+        if counters is None:
+            return None
+        counters = np.asarray(counters, dtype=float)
+        prev, prev_timestamp = self._prev, self._prev_timestamp
+        self._prev, self._prev_timestamp = counters, timestamp
+        if prev is None or timestamp <= prev_timestamp:
+            return None
+        # 计数器在网卡重置或磁盘热插拔后可能回绕，此时按 0 处理
+        rates = np.maximum(counters - prev, 0.0) / (timestamp - prev_timestamp)
+        row = np.empty(len(rates) + 1)
+        row[0] = rates.sum()
+        row[1:] = rates
+        return row
+
+class DiskMetric(RateMetric):
+    """所有磁盘的读写吞吐量，分项为读、写。"""
+    name = 'disk'
+    parts = ('read', 'write')
+
+    def counters(self):
+        io = psutil.disk_io_counters()
+        return None if io is None else (io.read_bytes, io.write_bytes)
+
+class NetworkMetric(RateMetric):
+    """所有网卡的吞吐量，分项为发送、接收。"""
+    name = 'net'
+    parts = ('sent', 'recv')
+
+    def counters(self):
+        io = psutil.net_io_counters()
+        return None if io is None else (io.bytes_sent, io.bytes_recv)
+
+class NvmlGpuBackend:
+    """通过 NVIDIA 的 NVML（可选依赖 pynvml）读取各块 GPU 的占用率。"""
+    def __init__(self):
+        import pynvml
+        pynvml.nvmlInit()
+        self._nvml = pynvml
+        self._handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+        if not self._handles:
+            raise RuntimeError("No NVIDIA GPU found.")
+
+    def device_count(self):
+        return len(self._handles)
+
+    def utilization(self):
+        return [self._nvml.nvmlDeviceGetUtilizationRates(h).gpu for h in self._handles]
+
+class GpuMetric(Metric):
+    """
+    GPU 占用率，分项为各块 GPU，总体读数取最忙的一块。
+    读数来自可替换的后端（需提供 device_count() 与 utilization()），
+    默认尝试 NVML；没有可用后端时跳过，不产生读数。
+    """
+    name = 'gpu'
+    backend_factories = [NvmlGpuBackend]
+
+    def __init__(self):
+        self._backend = None
+        self._probed = False
+
+    @property
+    def backend(self):
+        if not self._probed:
+            self._probed = True
+            for factory in self.backend_factories:
+                try:
+                    self._backend = factory()
+                    break
+                except Exception as e:
+                    logger.debug(f"GPU backend {factory.__name__} is unavailable: {e}")
+            else:
+                logger.warning("No GPU backend is available. GPU rules will be skipped.")
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+        self._probed = True
+
+    def part_count(self):
+        return None if self.backend is None else self.backend.device_count()
+
+    def sample(self, timestamp):
+        if self.backend is None:
+            return None
+        usages = np.asarray(self.backend.utilization(), dtype=float)
+        row = np.empty(len(usages) + 1)
+        row[0] = usages.max() if len(usages) else 0.0
+        row[1:] = usages
+        return row
+
+METRICS = {cls.name: cls for cls in (CpuMetric, MemoryMetric, SwapMetric, DiskMetric, NetworkMetric, GpuMetric)}
+
+class _ProcessEntry:
+    __slots__ = ('create_time', 'process', 'name', 'cpu_percent')
+
+    def __init__(self, create_time, process, name):
+        self.create_time = create_time
+        self.process = process
+        self.name = name
+        self.cpu_percent = 0.0
+
+class ProcessCache:
+    """
+    全部进程的 PID -> psutil.Process 缓存（用创建时间识别 PID 复用）。
+    每次 refresh() 对缓存中的对象调用 cpu_percent(interval=None)，
+    读数是相对上一次 refresh 的增量，因此只要定期刷新，随时都有预热好的 CPU 占用率。
+    """
+    def __init__(self, max_age=1.0):
+        self.max_age = max_age  # refresh_if_stale() 认为读数仍然新鲜的时长（秒）
+        self.refreshes = 0
+        self.refreshed_at = None
+        self._entries = {}  # PID -> _ProcessEntry
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """遍历一次进程表，更新每个进程的 CPU 占用率并清理已退出的进程。"""
+        with self._lock:
+            entries = {}
+            start = time.perf_counter()
+            for proc in psutil.process_iter(['name', 'create_time']):
+                info = proc.info
+                entry = self._entries.get(proc.pid)
+                if entry is None or entry.create_time != info['create_time']:
+                    entry = _ProcessEntry(info['create_time'], proc, info['name'])
+                try:
+                    entry.cpu_percent = entry.process.cpu_percent(interval=None)  # 新对象的第一次调用只记录基准
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                entries[proc.pid] = entry
+            self._entries = entries
+            _metrics.record_call('psutil.process_iter', time.perf_counter() - start)
+            self.refreshes += 1
+            self.refreshed_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.max_age:
+            self.refresh()
+
+    def is_warm(self):
+        """是否已经刷新过至少两次，即 CPU 占用率已有可比较的基准。"""
+        return self.refreshes >= 2
+
+    def top(self, count, exclude=()):
+        """
+        按最近一次刷新的 CPU 占用率取前 count 个进程，使用堆选择而不是整表排序。
+
+        Returns:
+            list[dict]: 每项包含 pid、name、cpu_percent。
+        """
+        with self._lock:
+            candidates = [(entry.cpu_percent, pid, entry.name) for pid, entry in self._entries.items()
+                          if entry.name not in exclude]
+        return [{'pid': pid, 'name': name, 'cpu_percent': cpu}
+                for cpu, pid, name in heapq.nlargest(count, candidates)]
+
+_process_cache = ProcessCache()
+
+class BackgroundSampler:
+    """
+    后台采样器的公共部分：每个 tick 调用一次 sample() 把读数写入环形缓冲区，
+    然后通知已注册的规则基于缓冲区做非阻塞的判断。
+    可以运行在独立线程上，也可以作为调度单元交给 PoolScheduler / AsyncScheduler。
+
+    已经放慢轮询的规则只在到期时判断；所有规则都放慢时采样也随之变稀，
+    规则按读数的时间戳判断持续时长，读数变稀不影响结果。
+    """
+    def __init__(self, capacity=60):
+        self.interval = 1
+        self.base_interval = 1  # 各规则基础间隔中最短的一个
+        self.ticks = 0  # 累计的采样轮数，供测试与基准观察
+        self.capacity = capacity
+        self.buffers = {}  # 键 -> RingBuffer，首次读数后按列数创建
+        self._dogs = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._scheduler = None
+
+    @property
+    def name(self):
+        raise NotImplementedError
+
+    @property
+    def _is_running(self):
+        """调度器接口：只要还有一条已启动的规则，采样器就继续工作。"""
+        with self._lock:
+            return any(d._is_running for d in self._dogs)
+
+    @property
+    def _is_paused(self):
+        """调度器接口：所有已启动的规则都暂停时采样器也暂停，直到其中一条恢复。"""
+        with self._lock:
+            return all_paused(self._dogs)
+
+    def register(self, dog, window=0):
+        """
+        注册一条规则。
+
+        Args:
+            dog (BaseWatchdog): 需要在每个 tick 后重新判断的规则。
+            window (float): 该规则需要回看的时长（秒），用来决定缓冲区的容量。
+        """
+        with self._lock:
+            if dog not in self._dogs:
+                self._dogs.append(dog)
+            self.interval = self.base_interval = min(d.base_interval for d in self._dogs)
+            # 多留两行：一行是窗口起点之前的读数，一行用来容纳采样抖动
+            self.capacity = max(self.capacity, math.ceil(window / self.base_interval) + 2)
+            for buffer in self.buffers.values():
+                buffer.resize(self.capacity)
+        self.wake(dog)
+
+    def wake(self, dog=None):
+        """有规则恢复或新加入时立即唤醒采样器，不必等到当前间隔结束。"""
+        self._wakeup.set()
+        scheduler = self._scheduler
+        if scheduler is not None:
+            scheduler.wake(self)
+
+    def unregister(self, dog):
+        with self._lock:
+            if dog in self._dogs:
+                self._dogs.remove(dog)
+                if self._dogs:
+                    # 移除的可能正是间隔最短的规则，按剩余规则重新计算
+                    self.interval = self.base_interval = min(d.base_interval for d in self._dogs)
+
+    def _append(self, key, timestamp, row):
+        with self._lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                buffer = self.buffers[key] = RingBuffer(self.capacity, len(row))
+            buffer.append(timestamp, row)
+
+    def _since(self, key, timestamp):
+        with self._lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                return np.empty(0), np.empty((0, 0))
+            return buffer.since(timestamp)
+
+    def sample(self):
+        """
+        读取一轮读数并写入缓冲区。
+
+        Returns:
+            float | None: 本轮读数的时间戳；没有产生任何读数时为 None。
+        """
+        raise NotImplementedError
+
+    def tick(self):
+        """采样一次并让所有处于工作状态且已到期的规则基于最新的缓冲区重新判断。"""
+        now = time.monotonic()
+        with self._lock:
+            dogs = due(self._dogs, now)
+        timestamp = self.sample() if dogs else None
+        if timestamp is not None:
+            for dog in dogs:
+                try:
+                    _metrics.run_check(dog)
+                except Exception as e:
+                    # 单条规则的异常不应影响同一 tick 内的其它规则
+                    logger.error(f"Watchdog for '{dog.name}' failed during check: {e}", exc_info=True)
+                dog._next_check = now + dog.interval
+        with self._lock:
+            self.interval = next_interval(self._dogs, now, self.base_interval)
+        return timestamp
+
+    def check_state(self):
+        """调度器接口，等同于 tick()。"""
+        self.tick()
+
+    def _loop(self):
+        logger.info(f"{self.name.capitalize()} started in thread {threading.get_ident()}.")
+        try:
+            while True:
+                with self._lock:
+                    if not any(d._is_running for d in self._dogs):
+                        self._thread = None
+                        break
+                self._wakeup.clear()
+                if self._is_paused:
+                    self._wakeup.wait()
+                    continue
+                _metrics.run_check(self)
+                self._wakeup.wait(self.interval)
+        except Exception as e:
+            logger.critical(f"{self.name.capitalize()} has crashed: {e}", exc_info=True)
+            with self._lock:
+                self._thread = None
+        finally:
+            logger.info(f"{self.name.capitalize()} is shutting down.")
+            announce_exit()
+
+    def start(self, scheduler=None):
+        """
+        确保采样器在运行，并返回承载它的线程。
+
+        Args:
+            scheduler (PoolScheduler, optional): 为 None 时使用独立的采样线程，
+                否则把采样器作为一个调度单元交给调度器。
+        """
+        if scheduler is not None:
+            with self._lock:
+                if self._scheduler is scheduler:
+                    return scheduler._thread
+                self._scheduler = scheduler
+            return scheduler.add(self)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._thread
+
+class HardwareSampler(BackgroundSampler):
+    """
+    中央硬件采样器。后台每个 tick 只做一轮 psutil 采样，
+    一次性读取所有已注册规则关心的硬件（CPU、内存、交换空间、磁盘、网络、GPU），
+    把读数写入各自的环形缓冲区，然后通知这些规则基于缓冲区做非阻塞的判断。
+
+    每个缓冲区的行格式见 Metric：第 0 列是总体读数，其余列是分项。
+    """
+    def __init__(self, capacity=60, process_cache=_process_cache):
+        super().__init__(capacity)
+        self.metrics = {}  # 硬件名 -> Metric，只采样有规则关注的硬件
+        self.process_cache = process_cache  # 有 CPU 规则时顺带保持预热，供 get_top_processes 使用
+
+    @property
+    def name(self):
+        return 'hardware sampler'
+
+    def metric(self, name):
+        """返回（必要时创建）指定硬件的 Metric。"""
+        with self._lock:
+            if name not in self.metrics:
+                if name not in METRICS:
+                    raise ValueError(f"Unknown hardware '{name}'. Expected one of {tuple(METRICS)}.")
+                self.metrics[name] = METRICS[name]()
+            return self.metrics[name]
+
+    def register(self, dog, window=0):
+        """注册一条规则，它关注的硬件由 dog.name 决定。"""
+        self.metric(dog.name)
+        super().register(dog, window)
+
+    def record(self, timestamp, overall, parts, metric='cpu'):
+        """把一组读数（总体读数与各分项）写入指定硬件的缓冲区。"""
+        row = np.empty(len(parts) + 1)
+        row[0] = overall
+        row[1:] = parts
+        self._append(metric, timestamp, row)
+
+    def since(self, timestamp, metric='cpu'):
+        """返回指定硬件时间戳晚于 timestamp 的读数 (时间戳, 读数)。还没有读数时返回空数组。"""
+        return self._since(metric, timestamp)
+
+    def sample(self):
+        """
+        对所有被关注的硬件各读一次计数器并写入缓冲区。
+        需要差分的读数（CPU、磁盘、网络）在首次采样时只记录基准。
+        """
+        timestamp = time.time()
+        with self._lock:
+            metrics = list(self.metrics.values())
+        self.ticks += 1
+        recorded = False
+        for metric in metrics:
+            start = time.perf_counter()
+            try:
+                row = metric.sample(timestamp)
+            except Exception as e:
+                # 某一类硬件读取失败（例如驱动异常）不应影响其它硬件
+                logger.error(f"Sampling '{metric.name}' failed: {e}")
+                continue
+            finally:
+                _metrics.record_call(f'sample.{metric.name}', time.perf_counter() - start)
+            if row is not None:
+                self._append(metric.name, timestamp, row)
+                recorded = True
+
+        if 'cpu' in self.metrics and self.process_cache is not None:
+            # CPU 告警的回调通常会调用 get_top_processes，提前预热可以让它在 CPU 风暴中直接取结果
+            try:
+                self.process_cache.refresh_if_stale()
+            except Exception as e:
+                logger.error(f"Refreshing the process cache failed: {e}")
+        return timestamp if recorded else None
+
+_hardware_sampler = HardwareSampler()
+
+class _CachedProcess:
+    __slots__ = ('create_time', 'process', 'io', 'io_timestamp')
+
+    def __init__(self, create_time, process):
+        self.create_time = create_time
+        self.process = process
+        self.io = None  # 上一次的累计 IO 字节数，用来计算速率
+        self.io_timestamp = None
+
+class ProcessResourceSampler(BackgroundSampler):
+    """
+    进程资源采样器。每个 tick 只遍历一次 psutil.process_iter，
+    只为有规则关注的映像名读取资源占用，并按映像名把所有 PID 的读数相加。
+
+    psutil.Process 对象按 PID 缓存（用创建时间识别 PID 复用），
+    这样 cpu_percent 和 IO 速率可以基于上一个 tick 的读数直接求差，不需要每次重新预热。
+
+    每个映像名一个缓冲区，列依次为 COLUMNS。
+    """
+    COLUMNS = ('cpu', 'rss', 'handles', 'io')  # %（单核为 100）、字节、句柄数、字节每秒
+
+    def __init__(self, capacity=60):
+        super().__init__(capacity)
+        self._processes = {}  # PID -> _CachedProcess
+
+    @property
+    def name(self):
+        return 'process resource sampler'
+
+    def since(self, timestamp, image_name):
+        """返回指定映像名时间戳晚于 timestamp 的读数 (时间戳, 读数)。"""
+        return self._since(image_name.lower(), timestamp)
+
+    def _read(self, cached, timestamp):
+        p = cached.process
+        row = np.zeros(len(self.COLUMNS))
+        with p.oneshot():
+            row[0] = p.cpu_percent(interval=None)  # 第一次调用只记录基准，返回 0
+            row[1] = p.memory_info().rss
+            try:
+                # num_handles 只在 Windows 上存在，其它平台退而统计文件描述符
+                row[2] = p.num_handles() if hasattr(p, 'num_handles') else p.num_fds()
+            except psutil.AccessDenied:
+                pass
+            try:
+                io = p.io_counters()
+            except (psutil.AccessDenied, AttributeError):
+                io = None
+        if io is not None:
+            total = io.read_bytes + io.write_bytes
+            if cached.io is not None and timestamp > cached.io_timestamp:
+                row[3] = max(total - cached.io, 0) / (timestamp - cached.io_timestamp)
+            cached.io, cached.io_timestamp = total, timestamp
+        return row
+
+    def sample(self):
+        with self._lock:
+            names = {d.name.lower() for d in self._dogs if d._is_running}
+        if not names:
+            return None
+        timestamp = time.time()
+        totals = {name: np.zeros(len(self.COLUMNS)) for name in names}
+        seen = set()
+        start = time.perf_counter()
+        for proc in psutil.process_iter(['name', 'create_time']):
+            name = (proc.info['name'] or '').lower()
+            if name not in totals:
+                continue
+            pid = proc.pid
+            cached = self._processes.get(pid)
+            if cached is None or cached.create_time != proc.info['create_time']:
+                # 新进程，或者 PID 已被另一个进程复用
+                cached = self._processes[pid] = _CachedProcess(proc.info['create_time'], proc)
+            try:
+                totals[name] += self._read(cached, timestamp)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                logger.debug(f"Access denied while reading resources of '{name}' (PID {pid}).")
+            seen.add(pid)
+        for pid in self._processes.keys() - seen:
+            del self._processes[pid]
+        _metrics.record_call('psutil.process_iter', time.perf_counter() - start)
+
+        self.ticks += 1
+        for name, row in totals.items():
+            self._append(name, timestamp, row)
+        return timestamp
+
+_process_resource_sampler = ProcessResourceSampler()
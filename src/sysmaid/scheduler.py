@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import _metrics
+from .polling import announce_exit
+
+logger = logging.getLogger(__name__)
+
+class PoolScheduler:
+    """
+    堆排序的定时器 + 有界工作线程池，用来替代“每条规则一个守护线程”的模型。
+
+    调度单元（watchdog 或中央采样器）只需提供 interval、_is_running、_is_paused
+    和 check_state()。单元到期后由定时器线程交给线程池执行一次 check_state，
+    执行结束后才按自己（可能已经放慢）的 interval 重新入堆，因此同一单元永远不会并发执行。
+    暂停的单元不再入堆，而是停放起来，直到 resume() 通过 wake() 把它放回。
+    """
+    def __init__(self, max_workers=8, initializer=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='sysmaid-worker',
+            initializer=initializer,
+        )
+        self._heap = []  # (到期时间, 序号, 单元)
+        self._parked = set()  # 暂停中的单元
+        self._counter = itertools.count()  # 到期时间相同时保持先来先服务，避免比较单元本身
+        self._inflight = 0
+        self._is_shutdown = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, unit):
+        """加入一个调度单元并立即安排首次执行，返回定时器线程。"""
+        with self._cond:
+            if self._is_shutdown:
+                raise RuntimeError("Cannot add units to a scheduler that has been shut down.")
+            heapq.heappush(self._heap, (time.monotonic(), next(self._counter), unit))
+            self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._timer_loop, name='sysmaid-timer')
+                self._thread.daemon = True
+                self._thread.start()
+            return self._thread
+
+    def _timer_loop(self):
+        logger.info(f"Pool scheduler started with up to {self.max_workers} worker(s) in thread {threading.get_ident()}.")
+        with self._cond:
+            # 堆空、没有正在执行也没有暂停中的单元时，说明所有规则都已停止或崩溃
+            while self._heap or self._inflight or self._parked:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, unit = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if not unit._is_running:
+                    continue
+                self._inflight += 1
+                self._executor.submit(self._run, unit, due)
+            self._thread = None
+        logger.info("Pool scheduler has no more units to run and is shutting down.")
+        announce_exit()
+
+    def _run(self, unit, due):
+        try:
+            if not unit._is_paused:
+                _metrics.run_check(unit)
+        except Exception as e:
+            # 与独立线程模型一致：崩溃的单元不再被调度
+            logger.critical(f"Watchdog for '{getattr(unit, 'name', unit)}' has crashed: {e}", exc_info=True)
+            unit = None
+        with self._cond:
+            self._inflight -= 1
+            if unit is not None and unit._is_running and not self._is_shutdown:
+                if unit._is_paused:
+                    self._parked.add(unit)
+                else:
+                    # 以计划时间为基准保持节拍；若已经落后，则不补跑错过的 tick
+                    next_due = max(due + unit.interval, time.monotonic())
+                    heapq.heappush(self._heap, (next_due, next(self._counter), unit))
+            self._cond.notify()
+
+    def wake(self, unit):
+        """把暂停时停放的单元放回堆中立即执行；单元没有被停放时什么也不做。"""
+        with self._cond:
+            if unit in self._parked:
+                self._parked.discard(unit)
+                heapq.heappush(self._heap, (time.monotonic(), next(self._counter), unit))
+                self._cond.notify()
+
+    def shutdown(self):
+        """丢弃所有尚未到期的单元并让定时器线程退出；正在执行的检查会自然结束。"""
+        with self._cond:
+            self._is_shutdown = True
+            self._heap.clear()
+            self._parked.clear()
+            self._cond.notify()
+        self._executor.shutdown(wait=False)
+
+class AsyncScheduler:
+    """
+    asyncio 调度器：每个调度单元是同一个事件循环上的一个任务，
+    阻塞的 check_state（WMI/psutil 调用）通过有界线程池桥接执行。
+    """
+    _thread = None  # 与 PoolScheduler 接口保持一致；协程模式下没有专属的调度线程
+
+    def __init__(self, loop, executor):
+        self._loop = loop
+        self._executor = executor
+        self._tasks = set()
+        self._waiters = {}  # 暂停中的单元 -> 等待 wake() 的 Future
+
+    def add(self, unit):
+        """为调度单元创建轮询任务。可以在事件循环线程之外调用。"""
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._spawn(unit)
+        else:
+            self._loop.call_soon_threadsafe(self._spawn, unit)
+        return self._thread
+
+    def _spawn(self, unit):
+        task = self._loop.create_task(self._poll(unit))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _poll(self, unit):
+        try:
+            while unit._is_running:
+                if unit._is_paused:
+                    await self._park(unit)
+                    continue
+                start = self._loop.time()
+                await self._loop.run_in_executor(self._executor, _metrics.run_check, unit)
+                # 检查之后再读取 interval，自适应轮询可能刚刚调整过它
+                await asyncio.sleep(max(0, start + unit.interval - self._loop.time()))
+        except Exception as e:
+            logger.critical(f"Watchdog task for '{getattr(unit, 'name', unit)}' has crashed: {e}", exc_info=True)
+
+    async def _park(self, unit):
+        """暂停中的单元等待 wake()，不再定时醒来。"""
+        waiter = self._loop.create_future()
+        self._waiters[unit] = waiter
+        # 登记之后再确认一次，避免 resume() 恰好发生在两者之间而丢失唤醒
+        if unit._is_paused:
+            await waiter
+        self._waiters.pop(unit, None)
+
+    def wake(self, unit):
+        """唤醒暂停中的单元。可以在事件循环线程之外调用。"""
+        waiter = self._waiters.pop(unit, None)
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(self._release, waiter)
+
+    @staticmethod
+    def _release(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def shutdown(self):
+        """取消所有轮询任务。可以在事件循环线程之外调用。"""
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._cancel)
+
+    def _cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def join(self):
+        """等待所有轮询任务结束（规则全部停止或崩溃）。"""
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from .metrics import _metrics
+
+logger = logging.getLogger(__name__)
+
+class WmiConnectionPool:
+    """
+    按线程（即 COM 套间）和命名空间缓存 WMI 连接。
+
+    WMI 连接只能在创建它的套间中使用，而建立连接需要几百毫秒，
+    pythoncom / wmi 本身的导入也不便宜，所以直到第一次需要连接时才导入它们；
+    因此每个线程第一次需要某个命名空间时才初始化 COM 并连接，之后一直复用。
+    闲置超过 health_check_interval 的连接在交出前先做一次轻量查询，失效则重连；
+    调用方遇到 x_wmi 错误时可以 invalidate() 让下一次 get() 重新连接。
+    """
+    DEFAULT_NAMESPACE = 'root/cimv2'
+
+    def __init__(self, health_check_interval=60):
+        self.health_check_interval = health_check_interval
+        self.connects = 0  # 新建连接的次数
+        self.reuses = 0  # 复用已有连接的次数
+        self.reconnects = 0  # 因健康检查失败或调用方报告错误而重建连接的次数
+        self._local = threading.local()
+        self._lock = threading.Lock()  # 只保护计数器，连接本身不跨线程共享
+
+    def _connections(self):
+        """当前线程的 {命名空间: [连接, 最近一次确认可用的时间]}，首次调用时初始化 COM。"""
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            import pythoncom
+            pythoncom.CoInitialize()
+            connections = self._local.connections = {}
+        return connections
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _connect(self, namespace):
+        import wmi
+        if namespace == self.DEFAULT_NAMESPACE:
+            return wmi.WMI()
+        return wmi.WMI(namespace=namespace)
+
+    def _is_healthy(self, c):
+        try:
+            # 每个命名空间都有 __NAMESPACE 系统类，查询它几乎没有开销
+            c.query("SELECT Name FROM __NAMESPACE")
+            return True
+        except Exception as e:
+            logger.warning(f"WMI connection failed its health check: {e}. Reconnecting.")
+            return False
+
+    def get(self, namespace=None):
+        """
+        返回当前线程在指定命名空间上的 WMI 连接。
+
+        Args:
+            namespace (str, optional): 例如 BitLocker 所在的 'root/cimv2/security/microsoftvolumeencryption'。
+                默认为 'root/cimv2'。
+        """
+        namespace = namespace or self.DEFAULT_NAMESPACE
+        connections = self._connections()
+        entry = connections.get(namespace)
+        now = time.monotonic()
+        if entry is not None:
+            c, checked_at = entry
+            if now - checked_at < self.health_check_interval or self._is_healthy(c):
+                entry[1] = now
+                self._count('reuses')
+                return c
+            self._count('reconnects')
+        start = time.perf_counter()
+        c = self._connect(namespace)
+        _metrics.record_call('wmi.connect', time.perf_counter() - start)
+        connections[namespace] = [c, now]
+        self._count('connects')
+        return c
+
+    def invalidate(self, namespace=None):
+        """丢弃当前线程在指定命名空间上的连接，通常在遇到 x_wmi 错误之后调用。"""
+        connections = getattr(self._local, 'connections', None)
+        if connections and connections.pop(namespace or self.DEFAULT_NAMESPACE, None) is not None:
+            self._count('reconnects')
+
+    def call(self, func, namespace=None):
+        """
+        用当前线程的连接执行 func(连接)。遇到 x_wmi 错误时重连并重试一次。
+        """
+        import wmi
+        try:
+            return func(self.get(namespace))
+        except wmi.x_wmi as e:
+            logger.warning(f"WMI call failed: {e}. Reconnecting and retrying once.")
+            self.invalidate(namespace)
+            return func(self.get(namespace))
+
+    def release_thread(self):
+        """线程退出前调用：丢弃它的所有连接并反初始化 COM。"""
+        connections = getattr(self._local, 'connections', None)
+        if connections is not None:
+            connections.clear()
+            self._local.connections = None
+            import pythoncom
+            pythoncom.CoUninitialize()
+
+    def stats(self):
+        with self._lock:
+            return {'connects': self.connects, 'reuses': self.reuses, 'reconnects': self.reconnects}
+
+_wmi_pool = WmiConnectionPool()
@@ -0,0 +1,104 @@
+"""
+Shared setup for the test modules: mocks the Windows-only dependencies before
+sysmaid is imported and provides a TestCase that simulates the OS state.
+"""
+import os
+import sys
+# Add the project's 'src' directory to the Python path to allow imports from it.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from unittest.mock import MagicMock
+
+# We need to mock 'sysmaid' and its dependencies BEFORE they are imported by the code under test.
+# So, we create fake modules in sys.modules.
+sys.modules['wmi'] = MagicMock()
+sys.modules['win32gui'] = MagicMock()
+sys.modules['win32process'] = MagicMock()
+sys.modules['pythoncom'] = MagicMock()
+# Exercise the Windows backend against the mocked modules above, whatever the host platform
+os.environ['SYSMAID_BACKEND'] = 'windows'
+
+# Now we can safely import the package to be tested
+import sysmaid as maid
+# We also need to import the 'maid' module specifically to access its internal '_watchdogs' list for testing.
+from sysmaid import maid as maid_module
+
+# We will patch the action functions directly on the imported package
+maid.kill_process = MagicMock()
+maid.stop_service = MagicMock()
+
+
+class WatchdogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """
+        This method is called before each test.
+        It sets up the mock environment.
+        """
+        # Reset mocks and maid's internal state for test isolation
+        maid.kill_process.reset_mock()
+        maid.stop_service.reset_mock()
+
+        # VERY IMPORTANT: Clear the global watchdog list in the maid module
+        maid_module._watchdogs.clear()
+
+        # Shared state for mocks to read from. This simulates the OS state.
+        self.mock_os_state = {
+            'processes': {},  # 'proc_name': {'pid': pid}
+            'windows': {}     # 'hwnd': pid
+        }
+
+        # Configure the mocks
+        self.configure_mocks()
+
+    def tearDown(self):
+        """
+        This method is called after each test.
+        It stops all watchdog threads to prevent them from running into the next test.
+        """
+        maid_module.stop(timeout=2)  # Wakes every sleeping or paused thread and joins them
+        maid_module._watchdogs.clear() # Final cleanup
+        # Drop connections the main thread cached from this test's mock WMI
+        maid_module.get_backend().release_thread()
+
+    def mock_wmi_constructor(self):
+        """Mocks `wmi.WMI()`"""
+        mock_wmi_instance = MagicMock()
+
+        def mock_win32_process(fields=None, name=None):
+            if name is None:
+                # A full process-table enumeration, as issued by the central sampler
+                processes = []
+                for proc_name, info in self.mock_os_state['processes'].items():
+                    mock_process = MagicMock()
+                    mock_process.Name = proc_name
+                    mock_process.ProcessId = info['pid']
+                    mock_process.ParentProcessId = 4
+                    processes.append(mock_process)
+                return processes
+            if name in self.mock_os_state['processes']:
+                pid = self.mock_os_state['processes'][name]['pid']
+                mock_process = MagicMock()
+                mock_process.ProcessId = pid
+                return [mock_process]
+            return []
+
+        mock_wmi_instance.Win32_Process = mock_win32_process
+        return mock_wmi_instance
+
+    def mock_enum_windows(self, callback, _):
+        """Mocks `win32gui.EnumWindows`"""
+        for hwnd, pid in self.mock_os_state['windows'].items():
+            # Mock the functions called by the real callback
+            sys.modules['win32gui'].IsWindowVisible.return_value = True
+            sys.modules['win32gui'].GetWindowText.return_value = "Mock Window"
+            sys.modules['win32process'].GetWindowThreadProcessId.return_value = (0, pid)
+            callback(hwnd, None)
+
+    def configure_mocks(self):
+        """Apply all mock configurations."""
+        sys.modules['wmi'].WMI.side_effect = self.mock_wmi_constructor
+        sys.modules['win32gui'].EnumWindows.side_effect = self.mock_enum_windows
+        sys.modules['pythoncom'].CoInitialize.return_value = None
+        sys.modules['pythoncom'].CoUninitialize.return_value = None
@@ -0,0 +1,222 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class BackendTest(WatchdogTestCase):
+
+    def test_fake_backend_drives_process_rules(self):
+        """
+        The engine runs unchanged on the in-memory backend: the sampler, window index
+        and event multiplexer only talk to the selected platform backend.
+        """
+        from sysmaid.backends.fake import FakeBackend
+
+        backend = FakeBackend()
+        subscribed = threading.Condition()
+        subscriptions = []
+        subscribe = backend.subscribe
+        def counting_subscribe(kind, names):
+            subscription = subscribe(kind, names)
+            with subscribed:
+                subscriptions.append(kind)
+                subscribed.notify_all()
+            return subscription
+        backend.subscribe = counting_subscribe
+
+        pids = [backend.add_process(f'proc_{i}.exe', windows=1) for i in range(100)]
+        fired = {'no_window': [], 'running': [], 'exited': []}
+        running, exited = threading.Event(), threading.Event()
+        for i in range(100):
+            watcher = maid.attend(f'proc_{i}.exe')
+            watcher.has_no_window(lambda i=i: fired['no_window'].append(i))
+        watcher = maid.attend('late.exe')
+        watcher.is_running(lambda: fired['running'].append('late.exe') or running.set())
+        watcher.is_exited(lambda: fired['exited'].append('late.exe') or exited.set())
+
+        with patch('sysmaid.backends._backend', backend):
+            sampler = maid_module.ProcessSampler()
+            mux = {kind: maid_module.ProcessEventMultiplexer(kind) for kind in ('started', 'exited')}
+            for dog in maid_module._watchdogs:
+                dog._is_running = True
+                if isinstance(dog, maid_module.BaseProcessEvent):
+                    mux[dog.event_type].add(dog)
+                    dog._thread = mux[dog.event_type].start()
+                else:
+                    sampler.register(dog)
+
+            for pid in pids[:10]:
+                backend.set_windows(pid, 0)
+            for _ in range(3):
+                sampler.tick()
+            self.assertEqual(backend.enumerations, 3)
+            self.assertEqual(sorted(fired['no_window']), list(range(10)))
+
+            with subscribed:
+                self.assertTrue(subscribed.wait_for(lambda: len(subscriptions) == 2, timeout=2))
+            late = backend.add_process('LATE.EXE')
+            backend.remove_process(late)
+            self.assertTrue(running.wait(timeout=2))
+            self.assertTrue(exited.wait(timeout=2))
+            self.assertEqual(fired['running'], ['late.exe'])
+            self.assertEqual(fired['exited'], ['late.exe'])
+
+            for dog in maid_module._watchdogs:
+                dog._is_running = False
+            for dog in maid_module._watchdogs:
+                if dog._thread is not None:
+                    dog._thread.join(timeout=2)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "reads /proc")
+    def test_linux_backend_reads_proc(self):
+        """
+        The Linux backend enumerates /proc (recovering names longer than the 15-char
+        comm field) and turns process starts and exits into events.
+        """
+        import shutil
+        import subprocess
+        import tempfile
+        from sysmaid.backends.linux import LinuxBackend
+
+        sleep = shutil.which('sleep')
+        if sleep is None:
+            self.skipTest("needs the sleep binary")
+        backend = LinuxBackend()
+        name = 'sysmaid_probe_with_a_long_name'
+        with tempfile.TemporaryDirectory() as tmp:
+            probe = os.path.join(tmp, name)
+            shutil.copy(sleep, probe)
+            started = backend.subscribe('started', [name])
+            exited = backend.subscribe('exited', [name])
+            started.rescan = exited.rescan = 0.02
+            try:
+                self.assertIsNone(started.next_event(0))  # the first scan only sets the baseline
+                child = subprocess.Popen([probe, '60'])
+                try:
+                    self.assertIn((child.pid, os.getpid(), name), backend.list_processes())
+                    self.assertEqual(backend.process_pids(name.upper()), {child.pid})
+
+                    deadline = time.monotonic() + 5
+                    event = None
+                    while event is None and time.monotonic() < deadline:
+                        event = started.next_event(0.05)
+                    self.assertEqual(event, name)
+
+                    self.assertIsNone(exited.next_event(0))  # watches the running probe
+                    child.kill()
+                    child.wait(timeout=5)
+                    events = []
+                    while not events and time.monotonic() < deadline:
+                        events.append(exited.next_event(0.05))
+                        events = [e for e in events if e is not None]
+                    # Later rescans must not report the exit reported by the pidfd again
+                    scans = []
+                    scan = exited._scan
+                    exited._scan = lambda: scans.append(1) or scan()
+                    while len(scans) < 3 and time.monotonic() < deadline:
+                        event = exited.next_event(0.05)
+                        if event is not None:
+                            events.append(event)
+                    self.assertEqual(events, [name])
+                    self.assertEqual(backend.process_pids(name), set())
+                finally:
+                    if child.poll() is None:
+                        child.kill()
+            finally:
+                started.close()
+                exited.close()
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "reads /proc")
+    def test_linux_subscription_updates_names_in_place(self):
+        """
+        A name added to a running /proc subscription starts from the current state:
+        a process already running is not reported as started, but its exit is.
+        """
+        import shutil
+        import subprocess
+        import tempfile
+        from sysmaid.backends.linux import LinuxBackend
+
+        sleep = shutil.which('sleep')
+        if sleep is None:
+            self.skipTest("needs the sleep binary")
+        backend = LinuxBackend()
+        name = 'sysmaid_update_probe'
+        with tempfile.TemporaryDirectory() as tmp:
+            probe = os.path.join(tmp, name)
+            shutil.copy(sleep, probe)
+            started = backend.subscribe('started', ['other.exe'])
+            exited = backend.subscribe('exited', ['other.exe'])
+            started.rescan = exited.rescan = 0.02
+            child = subprocess.Popen([probe, '60'])
+            try:
+                self.assertIsNone(started.next_event(0))
+                self.assertIsNone(exited.next_event(0))
+                self.assertTrue(started.update(['other.exe', name]))
+                self.assertTrue(exited.update(['other.exe', name]))
+                self.assertEqual([n for _, n in exited._pidfds.values()], [name])  # watches the running probe
+
+                scans = []
+                scan = started._scan
+                started._scan = lambda: scans.append(1) or scan()
+                deadline = time.monotonic() + 5
+                events = []
+                while len(scans) < 3 and time.monotonic() < deadline:
+                    events.append(started.next_event(0.05))
+                self.assertEqual([e for e in events if e is not None], [])
+
+                child.kill()
+                child.wait(timeout=5)
+                event = None
+                while event is None and time.monotonic() < deadline:
+                    event = exited.next_event(0.05)
+                self.assertEqual(event, name)
+            finally:
+                if child.poll() is None:
+                    child.kill()
+                started.close()
+                exited.close()
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "reads /proc")
+    def test_linux_force_kill_terminates_the_process_tree(self):
+        """
+        Like taskkill /T, the Linux forced kill also takes down the descendants of
+        the matching processes, whatever their own names are.
+        """
+        import shutil
+        import subprocess
+        import tempfile
+        import psutil
+        from sysmaid.backends.linux import LinuxBackend
+
+        shell = shutil.which('sh')
+        with tempfile.TemporaryDirectory() as tmp:
+            victim = os.path.join(tmp, 'sysmaid_tree_root')
+            shutil.copy(shell, victim)
+            root = subprocess.Popen([victim, '-c', 'sleep 60 & echo ready; wait'], stdout=subprocess.PIPE)
+            children = []
+            try:
+                self.assertEqual(root.stdout.readline(), b'ready\n')
+                children = psutil.Process(root.pid).children(recursive=True)
+                self.assertEqual(len(children), 1)
+
+                self.assertTrue(LinuxBackend().force_kill('sysmaid_tree_root'))
+                root.wait(timeout=5)
+                gone, alive = psutil.wait_procs(children, timeout=5)
+                self.assertEqual(alive, [])
+            finally:
+                if root.poll() is None:
+                    root.kill()
+                for child in children:
+                    if child.is_running():
+                        child.kill()
+                root.stdout.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import sys
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import maid_module, WatchdogTestCase
+
+
+class DispatcherTest(WatchdogTestCase):
+
+    def test_action_dispatcher_coalesces_and_bounds_queue(self):
+        """
+        A busy worker must not block submitters: duplicate pending actions are
+        coalesced and the queue never grows beyond its bound.
+        """
+        from sysmaid.dispatcher import ActionDispatcher
+
+        gate, busy = threading.Event(), threading.Event()
+        ran = []
+        dispatcher = ActionDispatcher(workers=1, maxsize=10, overflow='drop_new')
+        dispatcher.submit(lambda: busy.set() or gate.wait())  # a slow action occupying the only worker
+        self.assertTrue(busy.wait(timeout=2))
+
+        for _ in range(100):
+            dispatcher.submit(ran.append, 'proc.exe', key=(ran.append, 'proc.exe'))
+        for i in range(20):
+            dispatcher.submit(ran.append, i)
+
+        stats = dispatcher.stats()
+        self.assertEqual(stats['coalesced'], 99)
+        self.assertEqual(stats['depth'], 10)
+        self.assertEqual(stats['dropped'], 11)
+
+        gate.set()
+        self.assertTrue(dispatcher.join(timeout=2))
+        self.assertEqual(ran, ['proc.exe'] + list(range(9)))
+        self.assertGreater(dispatcher.stats()['latency_max'], 0)
+        self.assertTrue(dispatcher.shutdown(timeout=2))
+
+    def test_drop_oldest_never_evicts_a_pending_batch(self):
+        """
+        Filling the queue under drop_oldest evicts plain actions only: a pending
+        batch stays queued and every Future handed out by batch() resolves.
+        """
+        from sysmaid.dispatcher import ActionDispatcher
+
+        gate, busy = threading.Event(), threading.Event()
+        ran = []
+        dispatcher = ActionDispatcher(workers=1, maxsize=5, overflow='drop_oldest')
+        dispatcher.submit(lambda: busy.set() or gate.wait())
+        self.assertTrue(busy.wait(timeout=2))
+
+        batch_func = lambda items: {item: item.upper() for item in items}
+        first = dispatcher.batch(batch_func, 'a')  # the batch sits at the head of the queue
+        for i in range(20):
+            dispatcher.submit(ran.append, i)
+        second = dispatcher.batch(batch_func, 'b')  # joins the batch that is still queued
+
+        stats = dispatcher.stats()
+        self.assertEqual(stats['depth'], 6)
+        self.assertEqual(stats['dropped'], 15)
+
+        gate.set()
+        self.assertEqual(first.result(timeout=2), 'A')
+        self.assertEqual(second.result(timeout=2), 'B')
+        self.assertTrue(dispatcher.join(timeout=2))
+        self.assertEqual(ran, list(range(15, 20)))
+        # The batch ran and was cleared, so a later batch() is queued again
+        self.assertEqual(dispatcher.batch(batch_func, 'c').result(timeout=2), 'C')
+        self.assertEqual(dispatcher.stats()['batch_runs'], 2)
+        self.assertTrue(dispatcher.shutdown(timeout=2))
+
+    def test_block_policy_runs_inline_when_a_worker_submits(self):
+        """
+        A worker submitting to a full queue under 'block' would wait for itself
+        to free a slot; the action runs inline in the worker instead.
+        """
+        from sysmaid.dispatcher import ActionDispatcher
+
+        ran = []
+        dispatcher = ActionDispatcher(workers=1, maxsize=1, overflow='block')
+        def fan_out():
+            for i in range(3):
+                dispatcher.submit(ran.append, i)
+
+        dispatcher.submit(fan_out)
+        self.assertTrue(dispatcher.join(timeout=2))
+        # 0 is queued; the queue is then full, so 1 and 2 run inline before the worker dequeues 0
+        self.assertEqual(ran, [1, 2, 0])
+        self.assertTrue(dispatcher.shutdown(timeout=2))
+
+    def test_action_workers_exit_when_the_engine_stops(self):
+        """
+        Every start()/stop() cycle creates a fresh action dispatcher; stopping must
+        drain it and join its worker threads instead of leaving them parked.
+        """
+        fired = []
+        all_fired = threading.Event()
+
+        def record(i):
+            fired.append(i)
+            if len(fired) == 8:
+                all_fired.set()
+
+        class FiringWatchdog(maid_module.BaseWatchdog):
+            def check_state(self):
+                for i in range(8):
+                    self._fire(lambda i=i: record(i))
+
+        FiringWatchdog('firing')
+        before = set(threading.enumerate())
+        for _ in range(5):
+            with maid_module.running():
+                self.assertTrue(all_fired.wait(timeout=2))
+            fired.clear()
+            all_fired.clear()
+        workers = [t for t in set(threading.enumerate()) - before if t.name.startswith('sysmaid-action')]
+        self.assertEqual(workers, [])
+
+    def test_actions_fired_in_one_tick_are_batched(self):
+        """
+        kill_process / stop_service calls made from callbacks in the same tick are
+        merged by the dispatcher into one batch; services resolve with one OR query.
+        """
+        from sysmaid.action import kill_process as kill_module
+        from sysmaid.action import stop_service as stop_module
+        from sysmaid.backends import windows as windows_backend
+        from sysmaid.dispatcher import ActionDispatcher
+        from sysmaid.wmi_pool import WmiConnectionPool
+
+        services = {f'Svc{i}': 'Running' for i in range(40)}
+        services['Svc0'] = 'Stopped'
+        mock_wmi = MagicMock()
+        def query(wql):
+            found = []
+            for name, state in services.items():
+                if f"Name = '{name}'" in wql:
+                    service = MagicMock()
+                    service.Name = name
+                    service.State = state
+                    service.StopService.return_value = (0,)
+                    found.append(service)
+            return found
+        mock_wmi.WMI.return_value.query.side_effect = query
+
+        kill_batches = []
+        def fake_kill(names, timeout):
+            kill_batches.append(sorted(names))
+            return {name: (1, 0) for name in names}
+
+        # A single worker keeps the order deterministic: the whole tick is queued behind the gate
+        dispatcher = ActionDispatcher(workers=1)
+        gate = threading.Event()
+        dispatcher.submit(gate.wait, 5)
+        results = {}
+        def callback(i):
+            results[i] = (kill_module.kill_process(f'proc_{i % 25}.exe'),
+                          stop_module.stop_service(f'Svc{i}' if i < 45 else 'Svc1'))
+
+        with patch.object(maid_module, '_dispatcher', dispatcher), \
+                patch.object(windows_backend, '_wmi_pool', WmiConnectionPool()), \
+                patch.dict(sys.modules, {'wmi': mock_wmi}), \
+                patch.object(kill_module, '_kill_with_psutil', side_effect=fake_kill):
+            for i in range(50):
+                dispatcher.submit(callback, i)
+            gate.set()
+            self.assertTrue(dispatcher.join(timeout=5))
+
+            # Direct calls outside the dispatcher's workers run immediately
+            direct = kill_module.kill_process('direct.exe')
+            self.assertTrue(direct.done())
+            self.assertEqual(direct.result()['killed'], 1)
+
+        self.assertEqual(kill_batches, [sorted(f'proc_{i}.exe' for i in range(25)), ['direct.exe']])
+        self.assertEqual(mock_wmi.WMI.call_count, 1)
+        self.assertEqual(mock_wmi.WMI.return_value.query.call_count, 1)
+        self.assertEqual(results[3][0].result(timeout=1)['killed'], 1)
+        self.assertEqual(results[0][1].result(timeout=1)['status'], 'already_stopped')
+        self.assertEqual(results[7][1].result(timeout=1)['status'], 'stopped')
+        self.assertEqual(results[42][1].result(timeout=1)['status'], 'not_found')
+        self.assertEqual(dispatcher.stats()['batch_runs'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
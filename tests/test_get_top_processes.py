@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import patch
+
+from support import maid, WatchdogTestCase
+
+
+class GetTopProcessesTest(WatchdogTestCase):
+
+    def test_get_top_processes_uses_warm_cache(self):
+        """
+        get_top_processes reads CPU usage from a persistent PID cache, primes it only
+        when cold and returns either the i18n string or a structured list.
+        """
+        from sysmaid.action import get_top_processes as top_module
+        from sysmaid.sampler import ProcessCache
+
+        class FakeProcess:
+            def __init__(self, pid, name, cpu):
+                self.pid = pid
+                self.info = {'name': name, 'create_time': float(pid)}
+                self.cpu = cpu
+                self.cpu_calls = 0
+
+            def cpu_percent(self, interval=None):
+                self.cpu_calls += 1
+                return self.cpu
+
+        table = [FakeProcess(0, 'System Idle Process', 800.0)]
+        table += [FakeProcess(pid, f'proc_{pid}.exe', float(pid % 97)) for pid in range(1, 5000)]
+        cache = ProcessCache(max_age=60)
+
+        with patch.object(top_module, '_process_cache', cache), \
+                patch.object(top_module, '_PRIME_DELAY', 0), \
+                patch('sysmaid.sampler.psutil.process_iter', return_value=table) as process_iter:
+            top = maid.get_top_processes(3, structured=True)
+            self.assertEqual(process_iter.call_count, 2)  # cold cache: baseline + reading
+
+            text = maid.get_top_processes(2)
+            self.assertEqual(process_iter.call_count, 2)  # warm cache is reused
+
+        self.assertEqual([p['cpu_percent'] for p in top], [96.0, 96.0, 96.0])
+        self.assertEqual([p['pid'] for p in top], [4946, 4849, 4752])
+        self.assertNotIn('System Idle Process', [p['name'] for p in top])
+        self.assertEqual(len(text.splitlines()), 3)
+        self.assertIn('proc_4946.exe', text)
+        self.assertEqual(table[5].cpu_calls, 2)  # same Process object, no re-priming
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import WatchdogTestCase
+
+
+class ScreenMatchingTest(WatchdogTestCase):
+
+    def test_screen_matching_only_rematches_changed_regions(self):
+        """
+        The incremental matcher keeps matches in unchanged areas, finds templates in
+        changed areas and drops matches whose area has changed.
+        """
+        import tempfile
+        import cv2
+        import numpy as np
+        from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider
+
+        rng = np.random.default_rng(0)
+        template = rng.integers(0, 256, (40, 60), dtype=np.uint8)
+        background = rng.integers(0, 256, (720, 1280), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'template.png')
+            cv2.imencode('.png', template)[1].tofile(path)
+            dog = WindowsMatchingWatchdog('screen', template_image_path=path)
+        provider = dog.frame_provider = SharedFrameProvider()
+
+        self.assertFalse(dog.match_frame(*provider.update(background)))
+
+        frame = background.copy()
+        frame[100:140, 200:260] = template
+        with patch('sysmaid.condition.has_windows_look_like.cv2.matchTemplate', wraps=cv2.matchTemplate) as match:
+            self.assertTrue(dog.match_frame(*provider.update(frame)))
+            # Only the dirty region around the template is matched, not the full frame
+            self.assertEqual(match.call_count, 1)
+            self.assertLess(match.call_args[0][0].size, frame.size // 10)
+
+            match.reset_mock()
+            self.assertTrue(dog.match_frame(*provider.update(frame.copy())))  # nothing changed
+            match.assert_not_called()
+
+        moved = frame.copy()
+        moved[600:640, 1000:1060] = template  # a second copy appears elsewhere
+        self.assertTrue(dog.match_frame(*provider.update(moved)))
+        self.assertEqual(len({tuple(m) for m in dog._matches}), 2)
+
+        self.assertFalse(dog.match_frame(*provider.update(background)))
+
+    def test_screen_rules_share_one_capture_per_tick(self):
+        """
+        Ten has_windows_look_like rules checked in the same tick cost one screen
+        capture, and every matcher sees the very same buffer.
+        """
+        import tempfile
+        import cv2
+        import numpy as np
+        from sysmaid.condition import has_windows_look_like
+        from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider
+
+        screen = np.zeros((720, 1280, 4), dtype=np.uint8)
+        mock_mss = MagicMock()
+        mock_mss.mss.return_value.grab.return_value = screen
+        provider = SharedFrameProvider(ttl=60)
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(has_windows_look_like, 'mss', mock_mss), \
+                patch.object(has_windows_look_like, '_frame_provider', provider):
+            dogs = []
+            for i in range(10):
+                path = os.path.join(tmp, f'template_{i}.png')
+                cv2.imencode('.png', np.full((20, 20), i * 20, dtype=np.uint8))[1].tofile(path)
+                dogs.append(WindowsMatchingWatchdog('screen', template_image_path=path))
+            seen = []
+            for dog in dogs:
+                dog.match_frame = lambda img_gray, frame_id: seen.append(img_gray) or False
+                dog.check_state()
+
+        self.assertEqual(provider.captures, 1)
+        self.assertEqual(provider.stats()['captures_per_tick'], 1.0)
+        self.assertTrue(all(img is seen[0] for img in seen))
+
+    def test_screen_frames_are_not_overwritten_by_later_ticks(self):
+        """
+        A frame handed out for one tick stays intact while later captures run, so a
+        matcher still working on it under the pool scheduler never sees another tick.
+        """
+        import numpy as np
+        from sysmaid.condition.has_windows_look_like import SharedFrameProvider
+
+        provider = SharedFrameProvider(ttl=0)
+        held, _ = provider.update(np.full((128, 128), 1, dtype=np.uint8))
+        for value in range(40, 240, 40):
+            frame, _ = provider.update(np.full((128, 128), value, dtype=np.uint8))
+            self.assertFalse(np.shares_memory(frame, held))
+            self.assertFalse(frame.flags.writeable)
+        self.assertTrue((held == 1).all())
+        # Change detection still diffs against the previous tick
+        self.assertEqual(provider.changed_regions(provider.frame_id - 1), [(0, 0, 128, 128)])
+        provider.update(np.full((128, 128), 200, dtype=np.uint8))
+        self.assertEqual(provider.changed_regions(provider.frame_id - 1), [])
+
+    def test_screen_frames_are_recycled_only_after_release(self):
+        """
+        A frame buffer is reused once every lease on it is released and a newer
+        frame has replaced it; retiring a rule drops it from the consumer count.
+        """
+        import tempfile
+        import cv2
+        import numpy as np
+        from sysmaid.condition import has_windows_look_like
+        from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider
+
+        provider = SharedFrameProvider(ttl=0)
+        first, first_id = provider.update(np.full((128, 128), 1, dtype=np.uint8))
+        second, second_id = provider.update(np.full((128, 128), 40, dtype=np.uint8))
+        # Still leased: the next frame gets a buffer of its own
+        third, third_id = provider.update(np.full((128, 128), 80, dtype=np.uint8))
+        self.assertFalse(np.shares_memory(third, first))
+        self.assertTrue((first == 1).all())
+
+        provider.release(first_id)
+        fourth, fourth_id = provider.update(np.full((128, 128), 120, dtype=np.uint8))
+        self.assertTrue(np.shares_memory(fourth, first))
+        # The latest frame is the diff baseline and is not reused even when released
+        provider.release(fourth_id)
+        fifth, _ = provider.update(np.full((128, 128), 160, dtype=np.uint8))
+        self.assertFalse(np.shares_memory(fifth, fourth))
+        self.assertTrue((second == 40).all() and (third == 80).all())
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(has_windows_look_like, '_frame_provider', SharedFrameProvider()) as shared:
+            path = os.path.join(tmp, 'template.png')
+            cv2.imencode('.png', np.zeros((20, 20), dtype=np.uint8))[1].tofile(path)
+            dogs = [WindowsMatchingWatchdog('screen', template_image_path=path) for _ in range(3)]
+            self.assertEqual(shared.consumers, 3)
+            dogs[0].close()
+            dogs[0].close()  # closing twice does not count twice
+            self.assertEqual(shared.consumers, 2)
+
+    def test_screen_pyramid_matching_handles_dpi_scales(self):
+        """
+        Pyramid mode finds the template through the coarse-to-fine path, and extra
+        scales find a copy rendered at 125% DPI that the 100% template misses.
+        """
+        import tempfile
+        import cv2
+        import numpy as np
+        from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider
+
+        rng = np.random.default_rng(1)
+
+        def smooth_noise(shape):
+            img = cv2.GaussianBlur(rng.random(shape).astype(np.float32), (0, 0), 2)
+            return cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+        template = smooth_noise((80, 120))
+        frame = smooth_noise((720, 1280))
+        scaled = cv2.resize(template, None, fx=1.25, fy=1.25, interpolation=cv2.INTER_LINEAR)
+        frame[300:300 + scaled.shape[0], 500:500 + scaled.shape[1]] = scaled
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'template.png')
+            cv2.imencode('.png', template)[1].tofile(path)
+            single = WindowsMatchingWatchdog('screen', template_image_path=path, pyramid=True)
+            multi = WindowsMatchingWatchdog('screen', template_image_path=path, pyramid=True, scales=(1.0, 1.25))
+
+        for dog in (single, multi):
+            dog.frame_provider = SharedFrameProvider()
+        self.assertFalse(single.match_frame(*single.frame_provider.update(frame.copy())))
+        self.assertTrue(multi.match_frame(*multi.frame_provider.update(frame.copy())))
+        x, y, w, h = multi._matches[0]
+        self.assertEqual((w, h), scaled.shape[::-1])
+        self.assertLessEqual(abs(x - 500) + abs(y - 300), 4)
+
+    def test_screen_matching_steady_state_allocations(self):
+        """
+        Once buffers are warm, a capture-and-match tick must not allocate anything
+        close to a frame: grayscale conversion, diffing and tile bookkeeping all
+        write into preallocated buffers and the mss session is reused.
+        """
+        import tempfile
+        import tracemalloc
+        import cv2
+        import numpy as np
+        from sysmaid.condition import has_windows_look_like
+        from sysmaid.condition.has_windows_look_like import WindowsMatchingWatchdog, SharedFrameProvider
+
+        rng = np.random.default_rng(2)
+        template = rng.integers(0, 256, (40, 60), dtype=np.uint8)
+        static = rng.integers(0, 256, (720, 1280, 4), dtype=np.uint8)
+        blinking = static.copy()
+        blinking[300:340, 600:700] = 255  # e.g. a blinking caret or tray icon
+        mock_mss = MagicMock()
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(has_windows_look_like, 'mss', mock_mss):
+            path = os.path.join(tmp, 'template.png')
+            cv2.imencode('.png', template)[1].tofile(path)
+            dog = WindowsMatchingWatchdog('screen', template_image_path=path)
+            dog.frame_provider = SharedFrameProvider(ttl=0)
+
+            for screens in ([static], [static, blinking]):
+                grab = mock_mss.mss.return_value.grab
+                grab.side_effect = screens * 50
+                for _ in range(4):
+                    dog.check_state()  # warm-up: allocate buffers, first full match
+
+                tracemalloc.start()
+                try:
+                    for _ in range(20):
+                        before, _ = tracemalloc.get_traced_memory()
+                        tracemalloc.reset_peak()
+                        dog.check_state()
+                        _, peak = tracemalloc.get_traced_memory()
+                        self.assertLess(peak - before, static.size // 4 // 20)
+                finally:
+                    tracemalloc.stop()
+
+        self.assertEqual(mock_mss.mss.call_count, 1)  # one persistent capture session
+
+
+if __name__ == '__main__':
+    unittest.main()
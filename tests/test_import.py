@@ -0,0 +1,75 @@
+import os
+import sys
+import unittest
+
+from support import WatchdogTestCase
+
+
+class ImportTest(WatchdogTestCase):
+
+    def test_import_defers_heavy_dependencies(self):
+        """
+        `import sysmaid` and process rules must not load cv2/numpy (or psutil);
+        the screen stack is only imported once a screen rule is defined.
+        """
+        import json
+        import subprocess
+        import tempfile
+        import cv2
+        import numpy as np
+
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, 'template.png')
+            cv2.imencode('.png', np.zeros((8, 8), dtype=np.uint8))[1].tofile(template)
+            script = (
+                "import json, sys\n"
+                "heavy = lambda: sorted(m for m in ('cv2', 'numpy', 'mss', 'psutil') if m in sys.modules)\n"
+                "stages = {}\n"
+                "import sysmaid\n"
+                "stages['import'] = heavy()\n"
+                "watcher = sysmaid.attend('app.exe')\n"
+                "watcher.is_running(lambda: None)\n"
+                "watcher.is_exited(lambda: None)\n"
+                "watcher.has_no_window(lambda: None)\n"
+                "stages['process rules'] = heavy()\n"
+                f"sysmaid.attend('Screen').has_windows_look_like({template!r})(lambda: None)\n"
+                "stages['screen rule'] = heavy()\n"
+                "print(json.dumps(stages))\n"
+            )
+            src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+            env = dict(os.environ, CI='1', SYSMAID_BACKEND='fake', PYTHONPATH=src)
+            result = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                    text=True, env=env, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        stages = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(stages['import'], [])
+        self.assertEqual(stages['process rules'], [])
+        self.assertIn('cv2', stages['screen rule'])
+        self.assertIn('numpy', stages['screen rule'])
+
+    @unittest.skipUnless(hasattr(os, 'geteuid'), "needs POSIX user ids")
+    def test_import_without_root_does_not_exit_on_linux(self):
+        """
+        Outside CI, a non-root `import sysmaid` on Linux only warns: the Windows
+        elevation prompt and exit must not take down the host process.
+        """
+        import subprocess
+
+        script = (
+            "import os\n"
+            "os.geteuid = lambda: 1000\n"
+            "import sysmaid\n"
+            "print(sysmaid.get_backend().name)\n"
+        )
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+        env = dict(os.environ, SYSMAID_BACKEND='linux', PYTHONPATH=src, LANG='en_US.UTF-8')
+        env.pop('CI', None)
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                text=True, env=env, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], 'linux')
+        self.assertIn('not running as root', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class IsTooBusyTest(WatchdogTestCase):
+
+    def test_cpu_rules_share_one_sample_per_tick(self):
+        """
+        Any number of is_too_busy thresholds are evaluated against one ring buffer,
+        filled by a single non-blocking psutil call per tick.
+        """
+        from collections import namedtuple
+        from sysmaid.sampler import HardwareSampler
+
+        cputimes = namedtuple('scputimes', ['user', 'system', 'idle', 'interrupt', 'dpc'])
+        cores = 4
+
+        def cpu_times(busy):
+            # busy: per-core utilisation for the next second, cumulative like the real counters
+            state = [0.0] * cores
+            def fake(percpu=False):
+                self.assertTrue(percpu)
+                result = []
+                for i in range(cores):
+                    state[i] += 1.0
+                    result.append(cputimes(state[i] * busy[i], 0.0, state[i] * (1 - busy[i]), 0.0, 0.0))
+                return result
+            return fake
+
+        sampler = HardwareSampler()
+        fired = []
+        with patch('sysmaid.sampler.psutil.cpu_count', return_value=cores):
+            for over in range(10, 100, 10):
+                maid.attend('cpu').is_too_busy(over=over, duration=2)(lambda over=over: fired.append(over))
+            maid.attend('cpu').is_too_busy(over=[-1, -1, -1, 90], duration=2)(lambda: fired.append('core3'))
+        dogs = [d for d in maid_module._watchdogs if d.name == 'cpu']
+        self.assertEqual(len(dogs), 10)
+        for dog in dogs:
+            dog.sampler = sampler
+            dog._is_running = True
+            sampler.register(dog, window=dog.duration)
+
+        fake = MagicMock(side_effect=cpu_times([0.5, 0.5, 0.5, 0.95]))
+        with patch('sysmaid.sampler.psutil.cpu_times', fake), \
+                patch('sysmaid.sampler.time.time', side_effect=range(100, 200)):
+            for _ in range(4):
+                sampler.tick()
+        for dog in dogs:
+            dog._is_running = False
+
+        # 4 ticks, 4 psutil calls, no matter how many thresholds are configured
+        self.assertEqual(fake.call_count, 4)
+        self.assertEqual(sampler.ticks, 4)
+        _, readings = sampler.since(float('-inf'))
+        self.assertEqual(readings.shape, (3, cores + 1))  # the first call only sets the baseline
+        self.assertAlmostEqual(readings[-1, 0], 61.25)
+        self.assertAlmostEqual(readings[-1, 4], 95.0)
+        self.assertEqual(sorted(fired, key=str), sorted([10, 20, 30, 40, 50, 60, 'core3'], key=str))
+
+    def test_cpu_windowed_aggregates_tolerate_dips_and_spikes(self):
+        """
+        A single dip must not reset a windowed rule and a single spike must not trip it,
+        while the plain 'all' rule reacts to both.
+        """
+        import numpy as np
+        from sysmaid.sampler import HardwareSampler, MeanAggregate, EwmaAggregate
+
+        sampler = HardwareSampler()
+        fired = []
+        for aggregate, kwargs in (('all', {}), ('mean', {}), ('percentile', {'q': 50}),
+                                  ('ewma', {}), ('n_of_m', {'n': 8})):
+            maid.attend('cpu').is_too_busy(over=80, duration=10, aggregate=aggregate, **kwargs)(
+                lambda aggregate=aggregate: fired.append(aggregate))
+        dogs = maid_module._watchdogs[-5:]
+        for dog in dogs:
+            dog.sampler = sampler
+        self.assertEqual(dogs[-1].window, 10)
+
+        def feed(usages, start):
+            for i, usage in enumerate(usages):
+                sampler.record(start + i, usage, [usage] * 2)
+                for dog in dogs:
+                    dog.check_state()
+
+        # A lone spike in an otherwise quiet window
+        feed([20] * 9 + [100] + [20] * 9, start=0)
+        self.assertEqual(fired, [])
+
+        # Sustained load with one dip: 'all' keeps restarting its timer, the windowed rules fire once
+        feed([95] * 5 + [10] + [95] * 8, start=100)
+        self.assertEqual(sorted(fired), ['ewma', 'mean', 'n_of_m', 'percentile'])
+        self.assertNotIn('all', fired)
+
+        # Aggregates update incrementally and agree with a full recomputation
+        rng = np.random.default_rng(3)
+        rows = rng.uniform(0, 100, (57, 3))
+        mean, ewma = MeanAggregate(7, 3), EwmaAggregate(7, 3, alpha=0.5)
+        for row in rows:
+            mean.update(row)
+            ewma.update(row)
+        expected = rows[0]
+        for row in rows[1:]:
+            expected = expected + 0.5 * (row - expected)
+        self.assertTrue(np.allclose(mean.value(), rows[-7:].mean(axis=0)))
+        self.assertTrue(np.allclose(ewma.value(), expected))
+
+        with self.assertRaises(ValueError):
+            maid.attend('cpu').is_too_busy(over=80, duration=10, aggregate='median')
+
+    def test_hardware_rules_share_one_sampling_pass(self):
+        """
+        RAM, swap, disk, network and GPU rules use the same is_too_busy API and the
+        same sampler; rates come from counter deltas and a missing GPU backend is skipped.
+        """
+        from collections import namedtuple
+        from sysmaid.sampler import HardwareSampler
+
+        mem = namedtuple('svmem', ['total', 'percent'])
+        disk = namedtuple('sdiskio', ['read_bytes', 'write_bytes'])
+        net = namedtuple('snetio', ['bytes_sent', 'bytes_recv'])
+
+        class FakeGpu:
+            def device_count(self):
+                return 2
+            def utilization(self):
+                return [30, 97]
+
+        sampler = HardwareSampler()
+        sampler.metric('gpu').backend = FakeGpu()
+        fired = []
+        rules = (('ram', 90), ('swap', 50), ('disk', [-1, 5e6]), ('net', 1e6), ('gpu', [-1, 95]))
+        for name, over in rules:
+            with patch('sysmaid.condition.is_too_busy._hardware_sampler', sampler):
+                maid.attend(name.upper()).is_too_busy(over=over, duration=2)(lambda name=name: fired.append(name))
+        dogs = maid_module._watchdogs[-len(rules):]
+        for dog in dogs:
+            dog._is_running = True
+            sampler.register(dog, window=dog.duration)
+
+        counters = {'disk': [0, 0], 'net': [0, 0]}
+        def disk_io():
+            counters['disk'][1] += 8e6  # 8 MB/s of writes
+            return disk(*counters['disk'])
+        def net_io():
+            counters['net'][0] += 1e5  # 100 kB/s, well below the limit
+            return net(*counters['net'])
+
+        with patch('sysmaid.sampler.psutil.virtual_memory', return_value=mem(16, 95.0)) as vm, \
+                patch('sysmaid.sampler.psutil.swap_memory', return_value=mem(4, 10.0)), \
+                patch('sysmaid.sampler.psutil.disk_io_counters', side_effect=disk_io), \
+                patch('sysmaid.sampler.psutil.net_io_counters', side_effect=net_io), \
+                patch('sysmaid.sampler.psutil.cpu_times') as cpu_times, \
+                patch('sysmaid.sampler.time.time', side_effect=range(100, 200)):
+            for _ in range(4):
+                sampler.tick()
+        for dog in dogs:
+            dog._is_running = False
+
+        cpu_times.assert_not_called()  # nobody watches the CPU, so it is not sampled
+        self.assertEqual(vm.call_count, 4)  # one read per tick for all rules on the same hardware
+        _, disk_rows = sampler.since(float('-inf'), metric='disk')
+        self.assertEqual(disk_rows.shape, (3, 3))  # [total, read, write], first tick is the baseline
+        self.assertTrue((disk_rows[:, 2] == 8e6).all())
+        self.assertEqual(sorted(fired), ['disk', 'gpu', 'ram'])
+
+        # Without any GPU backend the rule is skipped instead of failing
+        sampler = HardwareSampler()
+        gpu = sampler.metric('gpu')
+        gpu.backend_factories = []
+        self.assertIsNone(sampler.sample())
+        with self.assertRaises(ValueError):
+            maid.attend('ram').is_too_busy(over=[50, 50], duration=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from support import maid_module, WatchdogTestCase
+
+
+class KillProcessTest(WatchdogTestCase):
+
+    @unittest.skipUnless(os.name == 'posix', "spawns POSIX sh/sleep processes")
+    def test_kill_process_terminates_tree_in_process(self):
+        """
+        kill_process resolves the image to PIDs, kills the whole tree through psutil,
+        waits for all victims together and only falls back to taskkill for survivors.
+        """
+        import shutil
+        import subprocess
+        import tempfile
+        import psutil
+        from sysmaid.action import kill_process as kill_module
+        from sysmaid.backends import windows as windows_backend
+
+        shell = shutil.which('sh')
+        maid_module._process_sampler.last_snapshot = None  # force a fresh psutil index
+        with tempfile.TemporaryDirectory() as tmp:
+            victim = os.path.join(tmp, 'sysmaid_victim')
+            shutil.copy(shell, victim)
+            # The shell reports back once both children have been forked
+            root = subprocess.Popen([victim, '-c', 'sleep 60 & sleep 60 & echo ready; wait'], stdout=subprocess.PIPE)
+            try:
+                self.assertEqual(root.stdout.readline(), b'ready\n')
+                children = psutil.Process(root.pid).children()
+                self.assertEqual(len(children), 2)
+
+                with patch.object(windows_backend.subprocess, 'run') as taskkill:
+                    result = kill_module.kill_process('sysmaid_victim', timeout=5).result()
+                root.wait(timeout=5)
+            finally:
+                if root.poll() is None:
+                    root.kill()
+                root.stdout.close()
+
+        taskkill.assert_not_called()
+        self.assertEqual(result['killed'], 3)
+        self.assertEqual(result['survivors'], 0)
+        self.assertGreater(result['latency'], 0)
+        self.assertFalse(any(c.is_running() for c in children))
+
+        # Survivors (e.g. access denied) are handed to taskkill
+        with patch.object(kill_module, '_kill_with_psutil', return_value={'protected.exe': (0, 1)}), \
+                patch.object(windows_backend.subprocess, 'CREATE_NO_WINDOW', 0, create=True), \
+                patch.object(windows_backend.subprocess, 'run') as taskkill:
+            taskkill.return_value.returncode = 0
+            result = kill_module.kill_process('protected.exe').result()
+        self.assertEqual(taskkill.call_args.args[0], ['taskkill', '/F', '/T', '/IM', 'protected.exe'])
+        self.assertEqual(result['survivors'], 0)
+
+    @unittest.skipUnless(os.name == 'posix', "spawns POSIX sh/sleep processes")
+    def test_forced_kill_reports_the_processes_it_terminated(self):
+        """
+        With backend='taskkill' the kill goes through the platform backend's forced
+        kill, and the result counts the processes that actually exited.
+        """
+        import shutil
+        import signal
+        import subprocess
+        import tempfile
+        from unittest.mock import MagicMock
+        from sysmaid.action import kill_process as kill_module
+
+        sleep = shutil.which('sleep')
+        maid_module._process_sampler.last_snapshot = None  # force a fresh psutil index
+        with tempfile.TemporaryDirectory() as tmp:
+            victim = os.path.join(tmp, 'sysmaid_forced')
+            shutil.copy(sleep, victim)
+            children = [subprocess.Popen([victim, '60']) for _ in range(2)]
+            backend = MagicMock()
+            def force_kill(name):
+                for child in children:
+                    os.kill(child.pid, signal.SIGKILL)
+                    child.wait(timeout=5)
+                return True
+            backend.force_kill.side_effect = force_kill
+            try:
+                # The psutil index built here must not leak into the other tests
+                with patch.object(kill_module, 'get_backend', return_value=backend), \
+                        patch.object(kill_module, '_psutil_index', None):
+                    result = kill_module.kill_process('sysmaid_forced', backend='taskkill', batch=False).result()
+            finally:
+                for child in children:
+                    if child.poll() is None:
+                        child.kill()
+                        child.wait(timeout=5)
+
+        backend.force_kill.assert_called_once_with('sysmaid_forced')
+        self.assertEqual(result['killed'], 2)
+        self.assertEqual(result['survivors'], 0)
+
+    @unittest.skipUnless(os.name == 'posix', "spawns POSIX sh/sleep processes")
+    def test_kill_process_skips_reused_pids_from_a_stale_snapshot(self):
+        """
+        The sampler's snapshot may be up to SNAPSHOT_MAX_AGE old. If a PID it lists
+        has since been reused by an unrelated process, that process must survive.
+        """
+        import shutil
+        import subprocess
+        import psutil
+        from sysmaid.action import kill_process as kill_module
+
+        sleep = shutil.which('sleep')
+        bystander = subprocess.Popen([sleep, '60'])
+        try:
+            # A snapshot taken just before 'sysmaid_victim' exited and its PID went to `sleep`
+            stale = maid_module.ProcessSnapshot({'sysmaid_victim': {bystander.pid}}, 1)
+            with patch.object(maid_module._process_sampler, 'last_snapshot', stale):
+                result = kill_module.kill_process('sysmaid_victim', batch=False).result()
+            self.assertEqual(result['killed'], 0)
+            self.assertIsNone(bystander.poll())
+            self.assertTrue(psutil.Process(bystander.pid).is_running())
+        finally:
+            bystander.kill()
+            bystander.wait(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class EngineTest(WatchdogTestCase):
+
+    def test_stop_shuts_down_thousands_of_rules_immediately(self):
+        """
+        stop() wakes every rule out of its interval wait or pause, shuts the
+        scheduler down and joins all threads well under a second; a blocking
+        start() returns as soon as stop() is called and running() stops on exit.
+        """
+        from sysmaid.backends.fake import FakeBackend
+
+        checked = threading.Condition()
+
+        class CountingWatchdog(maid_module.BaseWatchdog):
+            def __init__(self, name):
+                super().__init__(name)
+                self.interval = 60  # far longer than the test
+                self.checks = 0
+
+            def check_state(self):
+                with checked:
+                    self.checks += 1
+                    checked.notify_all()
+
+        backend = FakeBackend()
+        with patch('sysmaid.backends._backend', backend):
+            polling = [CountingWatchdog(f'rule_{i}') for i in range(1000)]
+            polling[0].pause()
+            for i in range(100):
+                maid.attend(f'app_{i}.exe').has_no_window(lambda: None)
+                maid.attend(f'app_{i}.exe').is_running(lambda: None)
+
+            maid_module.start(wait=False)
+            with checked:
+                self.assertTrue(checked.wait_for(lambda: sum(dog.checks for dog in polling) == 999, timeout=5))
+            threads = {dog._thread for dog in maid_module._watchdogs}
+            self.assertEqual(len(threads), 1000 + 2)  # one per polling rule, the sampler, the multiplexer
+
+            start = time.perf_counter()
+            self.assertTrue(maid_module.stop())
+            self.assertLess(time.perf_counter() - start, 1)
+            self.assertFalse(any(thread.is_alive() for thread in threads))
+            self.assertEqual(polling[0].checks, 0)
+
+            # A blocking start() returns as soon as another thread calls stop()
+            maid_module._watchdogs.clear()
+            dog = CountingWatchdog('blocking')
+            def stop_once_checked():
+                with checked:
+                    checked.wait_for(lambda: dog.checks == 1, timeout=5)
+                maid_module.stop()
+            threading.Thread(target=stop_once_checked).start()
+            start = time.perf_counter()
+            maid_module.start(scheduler='pool', max_workers=2)
+            self.assertLess(time.perf_counter() - start, 1)
+            self.assertEqual(dog.checks, 1)
+
+            # The context manager starts in the background and stops on exit
+            maid_module._watchdogs.clear()
+            dog = CountingWatchdog('scoped')
+            with maid_module.running(scheduler='pool', max_workers=2):
+                with checked:
+                    self.assertTrue(checked.wait_for(lambda: dog.checks == 1, timeout=2))
+                timer_thread = dog._thread
+                self.assertTrue(timer_thread.is_alive())
+            self.assertFalse(timer_thread.is_alive())
+            self.assertFalse(dog._is_running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class PollingTest(WatchdogTestCase):
+
+    @patch.dict('sysmaid.polling._polling_config', adaptive=True)
+    def test_adaptive_polling_backs_off_and_snaps_back(self):
+        """
+        With adaptive polling enabled (it is opt-in), a rule whose state is stable
+        polls exponentially slower up to max_interval or the condition's own cap;
+        the central sampler skips it until it is due and stretches its own tick.
+        Moving toward a trigger snaps the rule back to its configured interval.
+        Rules with a sample-count aggregate window never back off.
+        """
+        from sysmaid.backends.fake import FakeBackend
+        from sysmaid.sampler import HardwareSampler
+
+        backend = FakeBackend()
+        fired = []
+        maid.attend('ghost.exe').has_no_window(lambda: fired.append('ghost.exe'))
+        dog = maid_module._watchdogs[-1]
+        clock = [0.0]
+
+        with patch('sysmaid.backends._backend', backend), \
+                patch('sysmaid.maid.time.monotonic', lambda: clock[0]), \
+                patch.object(dog, 'MAX_INTERVAL', None):
+            sampler = maid_module.ProcessSampler()
+            dog._is_running = True
+            sampler.register(dog)
+
+            intervals = []
+            for now in (0, 1, 2, 6, 14, 20, 24):
+                clock[0] = now
+                sampler.tick()
+                intervals.append(dog.interval)
+            # Absent process: 1 -> 2 -> 4 -> 8 -> 10 (max_interval); the ticks at 1 and 20 were not due
+            self.assertEqual(intervals, [2, 2, 4, 8, 10, 10, 10])
+            self.assertEqual(sampler.enumerations, 5)
+            self.assertEqual(sampler.interval, 10)
+
+            backend.add_process('ghost.exe')  # starts without a window
+            for now in (34, 35, 36):
+                clock[0] = now
+                sampler.tick()
+                self.assertEqual(dog.interval, 1)
+            self.assertEqual(sampler.interval, 1)
+        self.assertEqual(fired, ['ghost.exe'])
+
+        # has_no_window caps its back-off so zombie detection is delayed by at most 2 s
+        for _ in range(5):
+            dog._back_off()
+        self.assertEqual(dog.interval, 2)
+
+        # CPU far below the threshold backs off, approaching it snaps back
+        sampler = HardwareSampler()
+        maid.attend('cpu').is_too_busy(over=90, duration=5)(lambda: None)
+        cpu = maid_module._watchdogs[-1]
+        cpu.sampler = sampler
+        for t, usage in enumerate((10, 12, 11, 80)):
+            sampler.record(100 + t, usage, [usage] * 2)
+            cpu.check_state()
+            if t == 2:
+                self.assertEqual(cpu.interval, 8)
+        self.assertEqual(cpu.interval, 1)
+
+        # A windowed aggregate counts samples, so its rule keeps the base interval
+        maid.attend('cpu').is_too_busy(over=90, duration=5, aggregate='mean')(lambda: None)
+        mean = maid_module._watchdogs[-1]
+        mean.sampler = sampler
+        for t in range(4, 10):
+            sampler.record(100 + t, 10, [10] * 2)
+            mean.check_state()
+        self.assertEqual(mean.interval, 1)
+
+        # Fixed-rate polling when disabled
+        with patch.dict('sysmaid.polling._polling_config', adaptive=False):
+            cpu._back_off()
+        self.assertEqual(cpu.interval, 1)
+
+    def test_paused_rules_block_until_resumed(self):
+        """
+        Paused rules do not wake up periodically: the thread model blocks on an
+        event and the pool scheduler parks the unit until resume() wakes it.
+        """
+        from sysmaid.scheduler import PoolScheduler
+
+        checked = threading.Condition()
+
+        class CountingWatchdog(maid_module.BaseWatchdog):
+            def __init__(self, name):
+                super().__init__(name)
+                self.interval = 0.02
+                self.checks = 0
+
+            def check_state(self):
+                with checked:
+                    self.checks += 1
+                    if self.checks == 3:
+                        # Pausing from inside the check leaves no other check in flight
+                        self.pause()
+                    checked.notify_all()
+
+        threaded = CountingWatchdog('threaded')
+        pooled = CountingWatchdog('pooled')
+        pool = PoolScheduler(max_workers=2)
+        threaded.start()
+        pooled.start(pool)
+        with checked:
+            self.assertTrue(checked.wait_for(lambda: threaded.checks == pooled.checks == 3, timeout=2))
+            # Nothing may check a paused rule, however long we wait
+            self.assertFalse(checked.wait_for(lambda: threaded.checks + pooled.checks > 6, timeout=0.3))
+        self.assertIn(pooled, pool._parked)
+        self.assertTrue(pool._thread.is_alive())  # parked units keep the scheduler alive
+
+        threaded.resume()
+        pooled.resume()
+        with checked:
+            self.assertTrue(checked.wait_for(lambda: threaded.checks > 3 and pooled.checks > 3, timeout=2))
+        self.assertNotIn(pooled, pool._parked)
+
+        timer_thread = pool._thread
+        pool.shutdown()
+        timer_thread.join(timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
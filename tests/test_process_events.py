@@ -0,0 +1,177 @@
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class ProcessEventTest(WatchdogTestCase):
+
+    def test_process_event_multiplexer_dispatches_by_name(self):
+        """
+        All is_running rules should share one subscription whose query chunks cover every
+        watched name, and events must only reach the rule for that process.
+        """
+        num_rules = 100
+        from sysmaid.backends.windows import build_event_queries, QUERY_CHUNK
+
+        mux = maid_module.ProcessEventMultiplexer('started')
+        actions = {}
+        for i in range(num_rules):
+            proc_name = f'proc_{i}.exe'
+            actions[proc_name] = MagicMock()
+            maid.attend(proc_name).is_running(actions[proc_name])
+        for dog in maid_module._watchdogs:
+            dog._is_running = True
+            mux.add(dog)
+
+        queries = build_event_queries('started', mux.names())
+        # The names are split into bounded queries instead of one unlimited OR clause
+        self.assertEqual(len(queries), -(-num_rules // QUERY_CHUNK))
+        self.assertTrue(all(q.count('TargetInstance.Name') <= QUERY_CHUNK for q in queries))
+        self.assertEqual(sum(q.count('TargetInstance.Name') for q in queries), num_rules)
+        self.assertIn("TargetInstance.Name = 'proc_42.exe'", ''.join(queries))
+
+        mux.dispatch('PROC_42.EXE')
+        actions['proc_42.exe'].assert_called_once()
+        self.assertEqual(sum(a.call_count for a in actions.values()), 1)
+
+        mux.remove(maid_module._watchdogs[42])
+        self.assertNotIn('proc_42.exe', mux.names())
+
+    def test_wmi_subscription_waits_on_every_query_chunk(self):
+        """
+        A WMI subscription over more names than fit in one query opens one watcher
+        per chunk and picks up events from any of them.
+        """
+        from sysmaid.backends import windows
+
+        class ComError(Exception):
+            pass
+
+        timeout = ComError(None, None, (0, 0, 0, 0, 0, windows.WmiSubscription.WBEM_S_TIMEDOUT))
+        watchers = []
+        def exec_query(query):
+            watcher = MagicMock()
+            watcher.NextEvent.side_effect = timeout
+            watchers.append(watcher)
+            return watcher
+        connection = MagicMock()
+        connection.ExecNotificationQuery.side_effect = exec_query
+        names = [f'proc_{i}.exe' for i in range(150)]
+        with patch.dict(sys.modules, {'pywintypes': MagicMock(com_error=ComError)}), \
+                patch.object(windows._wmi_pool, 'get', return_value=connection):
+            subscription = windows.WmiSubscription('exited', names)
+
+        self.assertEqual(len(watchers), 3)
+        self.assertIsNone(subscription.next_event(0.3))
+        for watcher in watchers:
+            watcher.NextEvent.assert_called_once_with(100)
+            watcher.NextEvent.reset_mock()
+        # A timeout shorter than one millisecond per chunk never turns into a zero-wait spin
+        self.assertIsNone(subscription.next_event(0.001))
+        for watcher in watchers:
+            watcher.NextEvent.assert_called_once_with(1)
+
+        event = MagicMock()
+        event.TargetInstance.Name = 'proc_149.exe'
+        watchers[2].NextEvent.side_effect = [event]
+        self.assertEqual(subscription.next_event(0.3), 'proc_149.exe')
+
+    def test_wmi_subscription_rebuilds_only_the_changed_chunk(self):
+        """
+        Adding or removing a name re-issues only the query of the chunk that holds
+        it; the other chunks keep their open watchers and pending events.
+        """
+        from sysmaid.backends import windows
+
+        queries = []
+        connection = MagicMock()
+        connection.ExecNotificationQuery.side_effect = lambda query: queries.append(query) or MagicMock()
+        names = [f'proc_{i:03}.exe' for i in range(150)]
+        with patch.dict(sys.modules, {'pywintypes': MagicMock()}), \
+                patch.object(windows._wmi_pool, 'get', return_value=connection):
+            subscription = windows.WmiSubscription('started', names)
+            before = list(subscription._watchers)
+            self.assertEqual(len(queries), 3)
+
+            # proc_070.exe lives in the second chunk; the new name takes its slot there
+            self.assertTrue(subscription.update([n for n in names if n != 'proc_070.exe'] + ['new.exe']))
+            self.assertEqual(len(queries), 4)
+            self.assertIn("'new.exe'", queries[-1])
+            self.assertNotIn("'proc_070.exe'", queries[-1])
+            self.assertIs(subscription._watchers[0], before[0])
+            self.assertIsNot(subscription._watchers[1], before[1])
+            self.assertIs(subscription._watchers[2], before[2])
+
+            # Emptying a chunk drops its watcher without touching the others
+            self.assertTrue(subscription.update(names[:128]))
+            self.assertEqual(len(queries), 5)  # the second chunk again; the third is dropped without a query
+            self.assertEqual(len(subscription._watchers), 2)
+            self.assertIs(subscription._watchers[0], before[0])
+
+    def test_multiplexer_updates_its_subscription_in_place(self):
+        """
+        A rule for a new name joins the running subscription instead of closing and
+        resubscribing, so events for the names already watched keep flowing.
+        """
+        import threading
+        from sysmaid.backends.fake import FakeBackend, FakeSubscription
+
+        backend = FakeBackend()
+        mux = maid_module.ProcessEventMultiplexer('started')
+        changed = threading.Condition()
+        fired, updates = [], []
+        def record(name):
+            with changed:
+                fired.append(name)
+                changed.notify_all()
+
+        subscribe, update = backend.subscribe, FakeSubscription.update
+        def counting_subscribe(kind, names):
+            subscription = subscribe(kind, names)
+            with changed:
+                updates.append(sorted(names))
+                changed.notify_all()
+            return subscription
+        def counting_update(subscription, names):
+            result = update(subscription, names)
+            with changed:
+                updates.append(sorted(names))
+                changed.notify_all()
+            return result
+        backend.subscribe = counting_subscribe
+
+        def watch(name):
+            maid.attend(name).is_running(lambda: record(name))
+            dog = maid_module._watchdogs[-1]
+            dog._is_running = True
+            mux.add(dog)
+            return mux.start()
+
+        with patch('sysmaid.backends._backend', backend), \
+                patch.object(FakeSubscription, 'update', counting_update):
+            thread = watch('first.exe')
+            with changed:
+                self.assertTrue(changed.wait_for(lambda: updates == [['first.exe']], timeout=2))
+                backend.add_process('first.exe')
+                self.assertTrue(changed.wait_for(lambda: fired == ['first.exe'], timeout=2))
+
+            watch('second.exe')
+            with changed:
+                self.assertTrue(changed.wait_for(lambda: len(updates) == 2, timeout=2))
+                backend.add_process('second.exe')
+                backend.add_process('first.exe')
+                self.assertTrue(changed.wait_for(lambda: len(fired) == 3, timeout=2))
+            self.assertEqual(updates[1], ['first.exe', 'second.exe'])
+            self.assertEqual(sorted(fired), ['first.exe', 'first.exe', 'second.exe'])
+            self.assertEqual(mux.subscriptions, 1)
+
+            for dog in maid_module._watchdogs:
+                dog._is_running = False
+            thread.join(timeout=2)
+            self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
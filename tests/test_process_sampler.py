@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class ProcessSamplerTest(WatchdogTestCase):
+
+    def test_process_sampler_enumerates_once_per_tick(self):
+        """
+        The central sampler should take a single process-table snapshot per tick
+        and fan it out to every registered ProcessWatchdog, sharing a single
+        desktop window walk between all of them.
+        """
+        num_rules = 1000
+        for i in range(num_rules):
+            self.mock_os_state['processes'][f'proc_{i}.exe'] = {'pid': 1000 + i}
+            self.mock_os_state['windows'][5000 + i] = 1000 + i
+
+        sampler = maid_module.ProcessSampler()
+        for i in range(num_rules):
+            proc_name = f'proc_{i}.exe'
+            watcher = maid.attend(proc_name)
+            watcher.has_no_window(lambda name=proc_name: maid.kill_process(name))
+        for dog in maid_module._watchdogs:
+            dog._is_running = True
+            sampler.register(dog)
+
+        walks_before = maid_module._window_index.walks
+        # Fixed-rate polling: every direct tick() checks every rule
+        with patch.dict('sysmaid.polling._polling_config', adaptive=False):
+            sampler.tick()
+            self.assertEqual(sampler.enumerations, 1)
+            self.assertEqual(maid_module._window_index.walks, walks_before + 1)
+            maid.kill_process.assert_not_called()
+
+            self.mock_os_state['windows'].clear()
+            for _ in range(3):
+                sampler.tick()
+
+        self.assertEqual(sampler.enumerations, 4)
+        self.assertEqual(maid_module._window_index.walks, walks_before + 4)
+        self.assertEqual(maid.kill_process.call_count, num_rules)
+
+    def test_window_index_is_rebuilt_once_per_generation_and_shared(self):
+        """
+        The window index walks the desktop once per snapshot generation; every
+        window rule checked in that generation receives the very same index, and
+        an index handed out for an older generation is never modified.
+        """
+        from sysmaid.backends.fake import FakeBackend
+
+        backend = FakeBackend()
+        pids = [backend.add_process(f'app_{i}.exe', windows=1) for i in range(5)]
+        for i in range(5):
+            maid.attend(f'app_{i}.exe').has_no_window(lambda: None)
+        index = maid_module.WindowIndex()
+        seen = []
+        def check_process_state(dog, pids_with_windows, pids=None):
+            seen.append((dog.name, pids_with_windows))
+
+        with patch('sysmaid.backends._backend', backend), \
+                patch.object(maid_module, '_window_index', index), \
+                patch.object(type(maid_module._watchdogs[0]), 'check_process_state', check_process_state):
+            sampler = maid_module.ProcessSampler()
+            for dog in maid_module._watchdogs:
+                dog._is_running = True
+                sampler.register(dog)
+
+            sampler.tick()
+            self.assertEqual(index.walks, 1)
+            self.assertEqual(index.generation, sampler.generation)
+            first = seen[0][1]
+            self.assertEqual(len(seen), 5)
+            self.assertTrue(all(counts is first for _, counts in seen))
+            self.assertEqual(first, {pid: 1 for pid in pids})
+
+            backend.set_windows(pids[0], 0)
+            seen.clear()
+            sampler.tick()
+            self.assertEqual(index.walks, 2)
+            second = seen[0][1]
+            self.assertIsNot(second, first)
+            self.assertTrue(all(counts is second for _, counts in seen))
+            self.assertNotIn(pids[0], second)
+            self.assertEqual(first[pids[0]], 1)  # the previous generation's index is untouched
+
+            # Repeated requests for the current generation reuse it; unscheduled checks always walk
+            self.assertIs(index.get(sampler.generation), second)
+            self.assertEqual(index.walks, 2)
+            index.get()
+            self.assertEqual(index.walks, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
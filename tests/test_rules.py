@@ -0,0 +1,145 @@
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class RulesTest(WatchdogTestCase):
+
+    def test_rule_file_compiles_to_deduplicated_plan_and_hot_reloads(self):
+        """
+        Thousands of declarative rules compile to one watchdog per distinct condition
+        (targets and default parameters canonicalized), grouped by data source, with
+        each condition's actions deduplicated. Editing the file reloads it in place:
+        only added conditions get new watchdogs and kept ones keep theirs.
+        """
+        import json
+        import tempfile
+        from sysmaid.backends.fake import FakeBackend
+        from sysmaid.rules import compile_rules
+
+        def write(rules):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'rules': rules}, f)
+
+        def app_rules(apps):
+            return [{'attend': f'APP_{i % apps}.EXE' if i % 2 else f'app_{i % apps}.exe', 'when': 'has_no_window',
+                     'do': [{'kill_process': f'app_{i % apps}.exe'}]} for i in range(1000)]
+
+        other_rules = []
+        for i in range(500):
+            other_rules.append({'attend': f'svc_{i % 10}.exe', 'when': {'is_running': None},
+                          'do': ['alarm', {'stop_service': {'service_name': f'svc_{i % 10}'}}]})
+        for i in range(500):
+            when = {'over': 80 + 10 * (i % 2), 'duration': 5}
+            if i % 4 < 2:
+                when['aggregate'] = 'all'  # the default, spelled out
+            other_rules.append({'name': f'cpu_{i}', 'attend': 'CPU' if i % 3 else 'cpu',
+                          'when': {'is_too_busy': when}, 'do': [{'alarm': 'busy'}]})
+        other_rules.append({'attend': 'off.exe', 'when': 'is_exited', 'do': ['alarm'], 'enabled': False})
+
+        backend = FakeBackend()
+        with tempfile.TemporaryDirectory() as tmp, patch('sysmaid.backends._backend', backend):
+            path = os.path.join(tmp, 'rules.json')
+            write(app_rules(50) + other_rules)
+            ruleset = maid.load_rules(path, interval=0.05)
+            # Notify the test after every check the file watcher makes
+            checked = threading.Condition()
+            reload_if_changed = ruleset.reload_if_changed
+            def notifying_reload():
+                try:
+                    return reload_if_changed()
+                finally:
+                    with checked:
+                        checked.notify_all()
+            ruleset.reload_if_changed = notifying_reload
+
+            plan = ruleset.plan
+            self.assertEqual(plan.rule_count, 2000)
+            self.assertEqual(plan.describe()['sources'], {'window_index': 50, 'process_events': 10, 'hardware': 2})
+            self.assertEqual(len(maid_module._watchdogs), 62 + 1)  # plus the file watcher
+            entry = plan.entries[('app_3.exe', 'has_no_window', ())]
+            self.assertEqual(len(entry.rules), 20)
+            self.assertEqual(entry.actions, [('kill_process', ('app_3.exe',), ())])
+
+            dog = ruleset._dogs[entry.key]
+            dog._callbacks['has_no_window']()
+            maid.kill_process.assert_called_once_with('app_3.exe')
+
+            maid_module.start(wait=False)
+            self.assertTrue(all(d._is_running for d in ruleset._dogs.values()))
+
+            # Drop app_40..49, add a new condition and change the actions of app_3
+            rules = app_rules(40) + other_rules
+            for rule in rules:
+                if rule['attend'].lower() == 'app_3.exe':
+                    rule['do'] = [{'kill_processes': [['app_3.exe', 'helper.exe']]}]
+            rules.append({'attend': 'new.exe', 'when': 'has_no_window', 'do': [{'kill_process': 'new.exe'}]})
+            retired = [ruleset._dogs[(f'app_{i}.exe', 'has_no_window', ())] for i in range(40, 50)]
+            write(rules)
+
+            with checked:
+                self.assertTrue(checked.wait_for(lambda: ruleset.plan is not plan, timeout=5))
+            plan = ruleset.plan
+            self.assertEqual(plan.describe()['sources'], {'window_index': 41, 'process_events': 10, 'hardware': 2})
+            self.assertIs(ruleset._dogs[entry.key], dog)
+            self.assertIs(plan.entries[entry.key], entry)
+            self.assertFalse(any(d._is_running or d in maid_module._watchdogs for d in retired))
+            self.assertTrue(ruleset._dogs[('new.exe', 'has_no_window', ())]._is_running)
+
+            with patch.object(maid, 'kill_processes') as kill_processes:
+                dog._callbacks['has_no_window']()
+            kill_processes.assert_called_once_with(('app_3.exe', 'helper.exe'))
+
+            # A broken edit is reported and the running rules are kept
+            write(rules + [{'attend': 'x.exe', 'when': 'is_sleepy', 'do': ['alarm']}])
+            with checked:
+                # A failed reload still records the file's signature so it is not retried
+                self.assertTrue(checked.wait_for(lambda: ruleset._signature == ruleset._stat(), timeout=5))
+            self.assertIs(ruleset.plan, plan)
+            self.assertTrue(dog._is_running)
+
+            with self.assertRaisesRegex(ValueError, "cannot attend 'cpu'"):
+                compile_rules([{'attend': 'cpu', 'when': 'has_no_window', 'do': ['alarm']}])
+
+    def test_retiring_a_condition_recomputes_the_sampler_interval(self):
+        """
+        When the fastest condition on a central sampler is retired by a reload,
+        the sampler slows down to the shortest interval among the remaining ones.
+        """
+        from sysmaid.rules import RuleSet
+        from sysmaid.sampler import HardwareSampler
+
+        ruleset = RuleSet('rules.json')
+        for sampler in (maid_module.ProcessSampler(), HardwareSampler()):
+            fast, slow = maid_module.BaseWatchdog('cpu'), maid_module.BaseWatchdog('cpu')
+            fast.interval, slow.interval = 0.5, 2
+            for dog in (fast, slow):
+                dog._driver = sampler
+                sampler.register(dog)
+            self.assertEqual(sampler.base_interval, 0.5)
+
+            ruleset._retire(fast)
+            self.assertEqual((sampler.base_interval, sampler.interval), (2, 2))
+            self.assertNotIn(fast, maid_module._watchdogs)
+
+    def test_failing_rule_action_is_logged_with_its_traceback(self):
+        """A failing action is logged with exc_info so the traceback is not lost."""
+        from sysmaid.rules import PlanEntry, _run_actions
+
+        entry = PlanEntry(('x.exe', 'is_running', ()), 'x.exe', 'is_running', {})
+        entry.add('broken', [('kill_process', ('x.exe',), ())])
+        maid.kill_process.side_effect = RuntimeError('boom')
+        try:
+            with self.assertLogs('sysmaid.rules', level='ERROR') as logs:
+                _run_actions(entry)
+        finally:
+            maid.kill_process.side_effect = None
+        self.assertIsNotNone(logs.records[0].exc_info)
+        self.assertIn('boom', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import unittest
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class SchedulerTest(WatchdogTestCase):
+
+    def test_pool_scheduler_honours_intervals_with_bounded_threads(self):
+        """
+        1000 polling rules on the pool scheduler: every rule keeps being checked at
+        its own interval while the number of threads stays capped.
+        """
+        from sysmaid.scheduler import PoolScheduler
+
+        warmed_up = threading.Condition()
+        fast_ready = []  # fast rules that have been checked three times
+
+        class CountingWatchdog(maid_module.BaseWatchdog):
+            def __init__(self, name, interval):
+                super().__init__(name)
+                self.interval = interval
+                self.checks = 0
+
+            def check_state(self):
+                self.checks += 1
+                if self.checks == 3 and self.interval < 1:
+                    with warmed_up:
+                        fast_ready.append(self)
+                        warmed_up.notify_all()
+
+        max_workers = 4
+        threads_before = threading.active_count()
+        pool = PoolScheduler(max_workers=max_workers)
+        fast = [CountingWatchdog(f'fast_{i}', 0.05) for i in range(500)]
+        slow = [CountingWatchdog(f'slow_{i}', 10) for i in range(500)]
+        for dog in fast + slow:
+            dog.start(pool)
+
+        with warmed_up:
+            self.assertTrue(warmed_up.wait_for(lambda: len(fast_ready) == len(fast), timeout=10))
+        self.assertLessEqual(threading.active_count() - threads_before, max_workers + 1)
+        self.assertTrue(all(dog.checks >= 3 for dog in fast))
+        self.assertTrue(all(dog.checks == 1 for dog in slow))
+
+        timer_thread = pool._thread
+        pool.shutdown()
+        timer_thread.join(timeout=2)
+        self.assertFalse(timer_thread.is_alive())
+
+    def test_start_async_awaits_coroutine_callbacks(self):
+        """
+        Polling rules run as tasks on one event loop and coroutine callbacks are
+        awaited on that loop rather than on the executor thread.
+        """
+        loop_threads = []
+        all_fired = None  # an asyncio.Event, created on the loop inside main()
+
+        class FiringWatchdog(maid_module.BaseWatchdog):
+            def __init__(self, name):
+                super().__init__(name)
+                self.interval = 0.01
+                self.checks = 0
+
+            def check_state(self):
+                self.checks += 1
+                if self.checks == 3:
+                    maid_module.invoke_callback(on_fire)
+                    self._is_running = False
+
+        async def on_fire():
+            loop_threads.append(threading.get_ident())
+            if len(loop_threads) == len(dogs):
+                all_fired.set()
+
+        dogs = [FiringWatchdog(f'dog_{i}') for i in range(200)]
+
+        async def main():
+            nonlocal all_fired
+            all_fired = asyncio.Event()
+            await maid.start_async(max_workers=4)
+            # The last callbacks may still be scheduled on the loop when start_async returns
+            await asyncio.wait_for(all_fired.wait(), timeout=5)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(main())
+        self.assertTrue(all(dog.checks == 3 for dog in dogs))
+        self.assertEqual(loop_threads, [loop_thread] * len(dogs))
+
+
+if __name__ == '__main__':
+    unittest.main()
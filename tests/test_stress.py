@@ -1,94 +1,10 @@
-import os
-import sys
-# Add the project's 'src' directory to the Python path to allow imports from it.
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
-
 import unittest
 from unittest.mock import patch, MagicMock, call
 
-# We need to mock 'sysmaid' and its dependencies BEFORE they are imported by the code under test.
-# So, we create fake modules in sys.modules.
-import sys
-sys.modules['wmi'] = MagicMock()
-sys.modules['win32gui'] = MagicMock()
-sys.modules['win32process'] = MagicMock()
-sys.modules['pythoncom'] = MagicMock()
-
-# Now we can safely import the package to be tested
-import sysmaid as maid
-# We also need to import the 'maid' module specifically to access its internal '_watchdogs' list for testing.
-from sysmaid import maid as maid_module
-
-# We will patch the action functions directly on the imported package
-maid.kill_process = MagicMock()
-maid.stop_service = MagicMock()
-
-
-class StressTest(unittest.TestCase):
-    
-    def setUp(self):
-        """
-        This method is called before each test.
-        It sets up the mock environment.
-        """
-        # Reset mocks and maid's internal state for test isolation
-        maid.kill_process.reset_mock()
-        maid.stop_service.reset_mock()
-        
-        # VERY IMPORTANT: Clear the global watchdog list in the maid module
-        maid_module._watchdogs.clear()
+from support import maid, maid_module, WatchdogTestCase
 
-        # Shared state for mocks to read from. This simulates the OS state.
-        self.mock_os_state = {
-            'processes': {},  # 'proc_name': {'pid': pid}
-            'windows': {}     # 'hwnd': pid
-        }
-
-        # Configure the mocks
-        self.configure_mocks()
-
-    def tearDown(self):
-        """
-        This method is called after each test.
-        It stops all watchdog threads to prevent them from running into the next test.
-        """
-        for dog in maid_module._watchdogs:
-            dog._is_running = False
-            if dog._thread and dog._thread.is_alive():
-                dog._thread.join(timeout=2) # Give threads a moment to die
-        maid_module._watchdogs.clear() # Final cleanup
-
-    def mock_wmi_constructor(self):
-        """Mocks `wmi.WMI()`"""
-        mock_wmi_instance = MagicMock()
-        
-        def mock_win32_process(name):
-            if name in self.mock_os_state['processes']:
-                pid = self.mock_os_state['processes'][name]['pid']
-                mock_process = MagicMock()
-                mock_process.ProcessId = pid
-                return [mock_process]
-            return []
-            
-        mock_wmi_instance.Win32_Process = mock_win32_process
-        return mock_wmi_instance
-
-    def mock_enum_windows(self, callback, _):
-        """Mocks `win32gui.EnumWindows`"""
-        for hwnd, pid in self.mock_os_state['windows'].items():
-            # Mock the functions called by the real callback
-            sys.modules['win32gui'].IsWindowVisible.return_value = True
-            sys.modules['win32gui'].GetWindowText.return_value = "Mock Window"
-            sys.modules['win32process'].GetWindowThreadProcessId.return_value = (0, pid)
-            callback(hwnd, None)
-
-    def configure_mocks(self):
-        """Apply all mock configurations."""
-        sys.modules['wmi'].WMI.side_effect = self.mock_wmi_constructor
-        sys.modules['win32gui'].EnumWindows.side_effect = self.mock_enum_windows
-        sys.modules['pythoncom'].CoInitialize.return_value = None
-        sys.modules['pythoncom'].CoUninitialize.return_value = None
 
+class StressTest(WatchdogTestCase):
 
     @patch('sysmaid.maid.BaseWatchdog.start')
     def test_1000_rules_triggered_simultaneously(self, mock_watchdog_start):
@@ -143,49 +59,46 @@ class StressTest(unittest.TestCase):
         maid.kill_process.assert_has_calls(expected_calls, any_order=True)
 
         print(f"--- Stress test successful! {maid.kill_process.call_count} actions were triggered. ---")
-    @patch('sysmaid.condition.is_too_busy.time')
-    @patch('sysmaid.condition.is_too_busy.psutil.cpu_percent')
-    @patch('sysmaid.maid.BaseWatchdog.start')
-    def test_cpu_is_too_busy_triggers_action(self, mock_start, mock_cpu_percent, mock_time):
+
+    def test_cpu_is_too_busy_triggers_action(self):
         """
         Tests that the is_too_busy condition for CPU triggers an action correctly.
         """
-        mock_start.return_value = None
+        from sysmaid.sampler import HardwareSampler
         action_mock = MagicMock()
 
-        # 1. Configure mocks
-        # Simulate time moving forward
-        mock_time.time.side_effect = [100, 101, 102, 103, 110, 111]
-        # Simulate CPU usage
-        mock_cpu_percent.side_effect = [95, 96, 98, 50] # High, High, High, then Low
-
-        # 2. Define the rule
+        # 1. Define the rule
         watcher = maid.attend('cpu')
         watcher.is_too_busy(over=90, duration=2)(action_mock)
 
-        # 3. Manually trigger checks
+        # 2. Feed readings into a private sampler
         dog = maid_module._watchdogs[-1] # Get the watchdog we just created
+        sampler = dog.sampler = HardwareSampler()
+        cores = [0.0] * 4
 
         # First check: CPU is busy, timer starts
+        sampler.record(100, 95, cores)
         dog.check_state()
         action_mock.assert_not_called()
         self.assertIsNotNone(dog.busy_start_time)
 
         # Second check: Still busy, but duration not met
+        sampler.record(101, 96, cores)
         dog.check_state()
         action_mock.assert_not_called()
 
         # Third check: Still busy, duration is met, action fires
+        sampler.record(102, 98, cores)
         dog.check_state()
         action_mock.assert_called_once()
         self.assertIsNone(dog.busy_start_time) # Timer should reset after firing
 
         # Fourth check: CPU usage drops, should not fire again
         action_mock.reset_mock()
+        sampler.record(103, 50, cores)
         dog.check_state()
         action_mock.assert_not_called()
-
-
+        self.assertIsNone(dog.busy_start_time)
 
 if __name__ == '__main__':
     # Configure logging to see output from maid
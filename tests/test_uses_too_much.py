@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import maid, maid_module, WatchdogTestCase
+
+
+class UsesTooMuchTest(WatchdogTestCase):
+
+    def test_process_resource_rules_share_one_process_iter(self):
+        """
+        uses_too_much rules are evaluated from one process_iter pass per tick, summed
+        across all PIDs of an image, with Process objects cached by PID and create time.
+        """
+        from collections import namedtuple
+        import contextlib
+        from sysmaid.sampler import ProcessResourceSampler
+
+        meminfo = namedtuple('pmem', ['rss'])
+        iocounters = namedtuple('pio', ['read_bytes', 'write_bytes'])
+
+        def fake_process(pid, name, create_time, rss, cpu=0.0, io_step=0):
+            proc = MagicMock()
+            proc.pid = pid
+            proc.info = {'name': name, 'create_time': create_time}
+            proc.oneshot.return_value = contextlib.nullcontext()
+            proc.cpu_percent.return_value = cpu
+            proc.memory_info.return_value = meminfo(rss)
+            proc.num_handles.return_value = 100
+            io = {'total': 0}
+            def io_counters():
+                io['total'] += io_step
+                return iocounters(io['total'], 0)
+            proc.io_counters.side_effect = io_counters
+            return proc
+
+        table = [
+            fake_process(10, 'Leaky.exe', 1.0, rss=300 << 20),
+            fake_process(11, 'leaky.exe', 2.0, rss=300 << 20),
+            fake_process(20, 'spinner.exe', 3.0, rss=10 << 20, cpu=99.0, io_step=5000),
+            fake_process(30, 'idle.exe', 4.0, rss=1 << 20),
+        ] + [fake_process(100 + i, f'other_{i}.exe', 5.0, rss=1) for i in range(500)]
+
+        sampler = ProcessResourceSampler()
+        fired = []
+        rules = (('leaky.exe', {'rss': 500 << 20}), ('spinner.exe', {'cpu': 90}),
+                 ('spinner.exe', {'io': 10000}), ('idle.exe', {'rss': 500 << 20, 'handles': 1000}))
+        for name, limits in rules:
+            maid.attend(name).uses_too_much(duration=2, **limits)(lambda name=name, limits=limits: fired.append((name, *limits)))
+        dogs = maid_module._watchdogs[-len(rules):]
+        for dog in dogs:
+            dog.sampler = sampler
+            dog._is_running = True
+            sampler.register(dog, window=dog.duration)
+
+        with patch('sysmaid.sampler.psutil.process_iter', return_value=table) as process_iter, \
+                patch('sysmaid.sampler.time.time', side_effect=range(100, 200)):
+            for _ in range(2):
+                sampler.tick()
+            cached = sampler._processes[11].process
+            # PID 11 exits and the PID is reused by a new leaky.exe instance
+            table[1] = fake_process(11, 'leaky.exe', 9.0, rss=300 << 20)
+            for _ in range(2):
+                sampler.tick()
+        for dog in dogs:
+            dog._is_running = False
+
+        self.assertEqual(process_iter.call_count, 4)
+        self.assertIsNot(sampler._processes[11].process, cached)
+        self.assertEqual(set(sampler._processes), {10, 11, 20, 30})  # only watched images are read
+        table[40].memory_info.assert_not_called()
+        self.assertEqual(table[0].cpu_percent.call_count, 4)  # primed once, never re-created
+        _, leaky = sampler.since(float('-inf'), 'LEAKY.EXE')
+        self.assertEqual(leaky[-1, 1], 600 << 20)
+        _, spinner = sampler.since(float('-inf'), 'spinner.exe')
+        self.assertEqual(list(spinner[:, 3]), [0, 5000, 5000, 5000])
+        self.assertEqual(sorted(fired), [('leaky.exe', 'rss'), ('spinner.exe', 'cpu')])
+
+        with self.assertRaises(ValueError):
+            maid.attend('leaky.exe').uses_too_much(duration=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
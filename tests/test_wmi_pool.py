@@ -0,0 +1,62 @@
+import sys
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from support import WatchdogTestCase
+
+
+class WmiPoolTest(WatchdogTestCase):
+
+    def test_wmi_pool_reuses_connections_per_thread_and_namespace(self):
+        """
+        Each thread keeps one connection per namespace; stale connections are
+        health-checked and x_wmi failures trigger a reconnect.
+        """
+        from sysmaid.wmi_pool import WmiConnectionPool
+
+        class XWmi(Exception):
+            pass
+        mock_wmi = MagicMock()
+        mock_wmi.x_wmi = XWmi
+        mock_wmi.WMI.side_effect = lambda **kwargs: MagicMock(namespace=kwargs.get('namespace'))
+        bitlocker = 'root/cimv2/security/microsoftvolumeencryption'
+
+        with patch.dict(sys.modules, {'wmi': mock_wmi}):
+            pool = WmiConnectionPool(health_check_interval=3600)
+            c = pool.get()
+            for _ in range(99):
+                self.assertIs(pool.get(), c)
+            volumes = pool.get(namespace=bitlocker)
+            self.assertIsNot(volumes, c)
+            self.assertEqual(volumes.namespace, bitlocker)
+
+            others = []
+            thread = threading.Thread(target=lambda: (others.append(pool.get()), pool.release_thread()))
+            thread.start()
+            thread.join()
+            self.assertIsNot(others[0], c)
+            self.assertEqual(pool.stats(), {'connects': 3, 'reuses': 99, 'reconnects': 0})
+
+            # A failing call reconnects once and retries on the new connection
+            calls = []
+            def flaky(conn):
+                calls.append(conn)
+                if len(calls) == 1:
+                    raise XWmi('RPC server is unavailable')
+                return 'ok'
+            self.assertEqual(pool.call(flaky), 'ok')
+            self.assertIs(calls[0], c)
+            self.assertIsNot(calls[1], c)
+
+            # Idle connections that fail their health check are replaced
+            pool.health_check_interval = 0
+            stale = pool.get()
+            stale.query.side_effect = XWmi('disconnected')
+            self.assertIsNot(pool.get(), stale)
+            self.assertEqual(pool.stats()['reconnects'], 2)
+            pool.release_thread()
+
+
+if __name__ == '__main__':
+    unittest.main()